@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# benchmarks/__main__.py
+
+import argparse
+import datetime
+import os
+import platform
+import sys
+import tempfile
+
+from benchmarks import results, startup
+
+# Размеры таблиц по умолчанию
+SIZES = (10000, 100000, 1000000)
+
+# Число повторов каждого сценария
+REPEAT = 3
+
+# Начальное значение генератора данных
+SEED = 42
+
+# Файл результатов по умолчанию
+OUTPUT_PATH = os.path.join('benchmarks', 'results', 'latest.json')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Бенчмарки insert, select, update, delete, load и save',
+    )
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=list(SIZES),
+        help='размеры таблиц (записей)'
+    )
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument(
+        '--storages', nargs='+', default=None,
+        help='форматы хранения для load и save (по умолчанию все)'
+    )
+    parser.add_argument('--no-startup', action='store_true',
+                        help='не замерять время запуска database -c')
+    parser.add_argument('--output', default=OUTPUT_PATH,
+                        help='куда записать результаты (json)')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='сравнить с результатами прошлого запуска '
+                             '(нет файла - код выхода 1)')
+    parser.add_argument('--save', metavar='FILE',
+                        help='записать результаты как эталон для --compare')
+    parser.add_argument(
+        '--threshold', type=float, default=results.REGRESSION_THRESHOLD,
+        help='допустимый рост лучшего времени (доля), при превышении - код выхода 1'
+    )
+    args = parser.parse_args()
+    # Эталон проверяется до замеров: без него проверка не может пройти
+    if args.compare is not None and not os.path.exists(args.compare):
+        print(
+            f"Ошибка: Эталон {args.compare} не найден. "
+            f"Запишите его: python -m benchmarks --save {args.compare}"
+        )
+        return 1
+
+    report = {
+        'meta': {
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': args.sizes,
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': {},
+    }
+
+    with tempfile.TemporaryDirectory() as home:
+        # Каталог базы задается до импорта модулей базы данных:
+        # пути к файлам вычисляются в constants при импорте
+        os.environ['PRIMITIVE_DB_HOME'] = home
+        from benchmarks import crud
+
+        for size in args.sizes:
+            print(f"Таблица на {size} записей...", flush=True)
+            measured = crud.run_size(
+                size, args.seed, args.repeat, args.storages or crud.STORAGES
+            )
+            for key, result in measured.items():
+                report['results'][f"{key}@{size}"] = result
+
+    if not args.no_startup:
+        print("Время запуска database -c...", flush=True)
+        for key, result in startup.run().items():
+            report['results'][f"{key}@{startup.STARTUP_ROWS}"] = result
+
+    print('\n'.join(results.format_results(report)))
+    results.save(args.output, report)
+    print(f"Результаты записаны в {args.output}.")
+    if args.save is not None:
+        results.save(args.save, report)
+        print(f"Эталон записан в {args.save}.")
+
+    if args.compare is None:
+        return 0
+    compared = results.compare(report, results.load(args.compare), args.threshold)
+    print('\n'.join(results.format_comparison(compared)))
+    regressions = [row for row in compared if row[3]]
+    if regressions:
+        print(
+            f"Ошибка: Замедлились сценарии ({len(regressions)}) "
+            f"больше чем на {args.threshold:.0%}."
+        )
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
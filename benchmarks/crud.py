@@ -0,0 +1,223 @@
+# benchmarks/crud.py
+
+import gc
+import statistics
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from benchmarks.data import bench_schema, generate_columns
+from src.primitive_db import core, parser, utils
+from src.primitive_db.catalog import Catalog
+from src.primitive_db.constants import DB_META_PATH, DEFAULT_STORAGE
+from src.primitive_db.decorators import set_confirmations
+from src.primitive_db.table import Table
+
+TABLE_NAME = 'bench'
+
+# Сколько записей добавляется в сценариях insert (по одной и одной командой)
+INSERT_OPS = 1000
+
+# Форматы хранения для сценариев load и save
+STORAGES = ('json', 'log', 'segments', 'binary')
+
+# Условия where: одна запись по ID, около 0.1% записей и половина записей
+FILTERS = {
+    'point': 'ID = {middle}',
+    'selective': 'c_int = 7',
+    'nonselective': 'c_bool = true',
+}
+
+
+def measure(
+    run: Callable[[Any], Any],
+    repeat: int,
+    setup: Optional[Callable[[], Any]] = None,
+    ops: int = 1
+) -> Dict[str, float]:
+    '''
+    Функция замера сценария: setup готовит состояние (не входит в замер),
+    run выполняет операцию. Как и timeit, на время замера сборщик мусора
+    отключается. Возвращает медиану и минимум времени в секундах.
+
+    Переменная run: Операция, получает результат setup
+    Переменная repeat: Число повторов
+    Переменная setup: Подготовка состояния перед каждым повтором
+    Переменная ops: Число операций в одном повторе
+    '''
+    timings = []
+    for _ in range(repeat):
+        state = setup() if setup is not None else None
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run(state)
+            timings.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return {
+        'median': statistics.median(timings),
+        'min': min(timings),
+        'runs': repeat,
+        'ops': ops,
+    }
+
+
+def _copy(table: Table) -> Table:
+    '''
+    Функция копирования таблицы для сценариев, которые ее изменяют
+
+    Переменная table: Таблица
+    '''
+    return table.slice(0, len(table), table.names)
+
+
+def _checked(result: Any) -> Any:
+    '''
+    Функция проверки результата core: при ошибке декоратор handle_db_errors
+    возвращает первый аргумент вместо кортежа
+
+    Переменная result: Результат функции core
+    '''
+    if not isinstance(result, tuple):
+        raise RuntimeError("Операция завершилась ошибкой (см. сообщение выше)")
+    return result
+
+
+def _consume(result: Any) -> int:
+    '''
+    Функция чтения всех записей результата select (записи ленивые)
+
+    Переменная result: Результат core.select
+    '''
+    _, rows = _checked(result)
+    return sum(1 for _ in rows)
+
+
+def _where(template: str, size: int) -> tuple:
+    '''
+    Функция разбора условия сценария
+
+    Переменная template: Условие с {middle} - средний ID таблицы
+    Переменная size: Число записей таблицы
+    '''
+    text = template.format(middle=size // 2)
+    return parser.parse_where(f"select from {TABLE_NAME} where {text}")
+
+
+def _insert_values(schema: List[Dict[str, str]], seed: int) -> List[List[str]]:
+    '''
+    Функция создания значений для сценариев insert (в виде текста команды)
+
+    Переменная schema: Столбцы таблицы
+    Переменная seed: Начальное значение генератора случайных чисел
+    '''
+    columns = generate_columns(schema, INSERT_OPS, seed + 1)
+    return [
+        [str(columns[col['name']][pos]).lower() for col in schema[1:]]
+        for pos in range(INSERT_OPS)
+    ]
+
+
+def run_size(
+    size: int, seed: int, repeat: int, storages: Iterable[str] = STORAGES
+) -> Dict[str, Dict[str, float]]:
+    '''
+    Функция замера всех сценариев на таблице из size записей.
+    Возвращает результаты по названию сценария.
+
+    Переменная size: Число записей
+    Переменная seed: Начальное значение генератора данных
+    Переменная repeat: Число повторов каждого сценария
+    Переменная storages: Форматы хранения для load и save
+    '''
+    set_confirmations(False)
+    schema = bench_schema()
+    table = Table(schema)
+    table.extend_columns(generate_columns(schema, size, seed))
+    results: Dict[str, Dict[str, float]] = {}
+
+    # insert: по одной записи и одной командой
+    values = _insert_values(schema, seed)
+
+    def insert_setup():
+        metadata = {TABLE_NAME: {'columns': schema, 'sequence': size}}
+        return metadata, _copy(table)
+
+    def insert_single(state):
+        metadata, data = state
+        for row_values in values:
+            new_rows, _ = _checked(core.insert(metadata, TABLE_NAME, [row_values]))
+            data.extend(new_rows)
+
+    def insert_batch(state):
+        metadata, data = state
+        new_rows, _ = _checked(core.insert(metadata, TABLE_NAME, values))
+        data.extend(new_rows)
+
+    results['insert.single'] = measure(
+        insert_single, repeat, insert_setup, INSERT_OPS
+    )
+    results['insert.batch'] = measure(insert_batch, repeat, insert_setup, INSERT_OPS)
+
+    # Таблица на диске для load и для select без кэшей
+    metadata = {TABLE_NAME: {
+        'columns': schema, 'storage': DEFAULT_STORAGE, 'sequence': size
+    }}
+    utils.save_metadata(DB_META_PATH, metadata)
+    utils.save_table_data(TABLE_NAME, table, DEFAULT_STORAGE)
+
+    # select в трех состояниях кэшей:
+    # cold - таблица читается с диска, кэш результатов пуст;
+    # loaded - таблица в памяти, кэш результатов пуст;
+    # warm - таблица в памяти, результат уже в кэше (если он не длиннее
+    # CACHE_MAX_RESULT_ROWS записей, иначе совпадает с loaded)
+    for name, template in FILTERS.items():
+        where = _where(template, size)
+
+        def cold_setup():
+            core.select_cache.clear()
+            return Catalog(DB_META_PATH)
+
+        def cold(catalog, where=where):
+            data = catalog.table(TABLE_NAME)
+            _consume(core.select(
+                data, where, catalog.indexes(TABLE_NAME), TABLE_NAME
+            ))
+
+        def loaded_setup():
+            core.select_cache.clear()
+
+        def warm_setup(where=where):
+            core.select_cache.clear()
+            _consume(core.select(table, where, {}, TABLE_NAME))
+
+        def select(_, where=where):
+            _consume(core.select(table, where, {}, TABLE_NAME))
+
+        results[f'select.{name}.cold'] = measure(cold, repeat, cold_setup)
+        results[f'select.{name}.loaded'] = measure(select, repeat, loaded_setup)
+        results[f'select.{name}.warm'] = measure(select, repeat, warm_setup)
+
+        def update(data, where=where):
+            _checked(core.update(data, {'c_str': 'updated'}, where, {}, TABLE_NAME))
+
+        def delete(data, where=where):
+            _checked(core.delete(data, where, {}, TABLE_NAME))
+
+        results[f'update.{name}'] = measure(update, repeat, lambda: _copy(table))
+        results[f'delete.{name}'] = measure(delete, repeat, lambda: _copy(table))
+
+    for storage in storages:
+        results[f'save.{storage}'] = measure(
+            lambda _, storage=storage: utils.save_table_data(
+                TABLE_NAME, table, storage
+            ),
+            repeat
+        )
+        results[f'load.{storage}'] = measure(
+            lambda _, storage=storage: utils.load_table(TABLE_NAME, schema, storage),
+            repeat
+        )
+    core.select_cache.clear()
+    return results
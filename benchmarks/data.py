@@ -0,0 +1,64 @@
+# benchmarks/data.py
+
+import random
+from typing import Any, Callable, Dict, List
+
+from src.primitive_db.constants import ALLOWED_TYPES
+
+# Число различных значений столбцов int и str: условие c_int = <n>
+# выбирает примерно 1/INT_CARDINALITY записей
+INT_CARDINALITY = 1000
+STR_CARDINALITY = 10000
+
+
+def _ints(rng: random.Random, count: int) -> List[int]:
+    return [rng.randrange(INT_CARDINALITY) for _ in range(count)]
+
+
+def _strings(rng: random.Random, count: int) -> List[str]:
+    return [f"v{rng.randrange(STR_CARDINALITY):05d}" for _ in range(count)]
+
+
+def _bools(rng: random.Random, count: int) -> List[bool]:
+    return [rng.random() < 0.5 for _ in range(count)]
+
+
+# Генератор значений для каждого типа из constants.ALLOWED_TYPES
+GENERATORS: Dict[str, Callable[[random.Random, int], List[Any]]] = {
+    'int': _ints,
+    'str': _strings,
+    'bool': _bools,
+}
+
+
+def bench_schema() -> List[Dict[str, str]]:
+    '''
+    Функция получения схемы таблицы для бенчмарков: ID и по одному
+    столбцу c_<тип> каждого допустимого типа
+    '''
+    missing = ALLOWED_TYPES - set(GENERATORS)
+    if missing:
+        raise KeyError(f"Нет генератора значений для типов: {sorted(missing)}")
+    return [{'name': 'ID', 'type': 'int'}] + [
+        {'name': f"c_{col_type}", 'type': col_type}
+        for col_type in sorted(ALLOWED_TYPES)
+    ]
+
+
+def generate_columns(
+    schema: List[Dict[str, str]], count: int, seed: int
+) -> Dict[str, List[Any]]:
+    '''
+    Функция создания значений столбцов: ID от 1 до count, остальные
+    столбцы - по генератору типа. Одинаковые seed и count дают
+    одинаковые данные, поэтому результаты разных запусков сравнимы.
+
+    Переменная schema: Столбцы таблицы
+    Переменная count: Число записей
+    Переменная seed: Начальное значение генератора случайных чисел
+    '''
+    rng = random.Random(seed)
+    columns = {'ID': list(range(1, count + 1))}
+    for col in schema[1:]:
+        columns[col['name']] = GENERATORS[col['type']](rng, count)
+    return columns
@@ -0,0 +1,102 @@
+# benchmarks/results.py
+
+import json
+import os
+from typing import Any, Dict, List, Tuple
+
+# Сценарий считается замедлившимся, если лучшее время (min) выросло больше
+# чем на эту долю: минимум меньше медианы зависит от фоновой нагрузки
+REGRESSION_THRESHOLD = 0.25
+
+# и больше чем на столько секунд (меньшие изменения - шум измерений)
+MIN_DELTA = 0.001
+
+
+def save(path: str, report: Dict[str, Any]) -> None:
+    '''
+    Функция сохранения результатов в json
+
+    Переменная path: Путь до файла
+    Переменная report: Результаты и сведения о запуске
+    '''
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4, ensure_ascii=False)
+
+
+def load(path: str) -> Dict[str, Any]:
+    '''
+    Функция загрузки результатов прошлого запуска
+
+    Переменная path: Путь до файла
+    '''
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = REGRESSION_THRESHOLD
+) -> List[Tuple[str, float, float, bool]]:
+    '''
+    Функция сравнения двух запусков по лучшему времени сценариев, которые
+    есть в обоих. Возвращает (сценарий, время до, время после, замедление).
+
+    Переменная current: Результаты текущего запуска
+    Переменная baseline: Результаты, с которыми сравнивается запуск
+    Переменная threshold: Допустимый рост времени (доля)
+    '''
+    rows = []
+    for key, result in current['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        before, after = base['min'], result['min']
+        regressed = (
+            after > before * (1 + threshold) and after - before > MIN_DELTA
+        )
+        rows.append((key, before, after, regressed))
+    return rows
+
+
+def format_results(report: Dict[str, Any]) -> List[str]:
+    '''
+    Функция форматирования результатов: медиана, минимум и время
+    одной операции в миллисекундах
+
+    Переменная report: Результаты запуска
+    '''
+    lines = [
+        f"{'сценарий':<36} {'медиана, мс':>12} {'min, мс':>10} "
+        f"{'на операцию':>12}"
+    ]
+    for key, result in report['results'].items():
+        per_op = result['median'] / result['ops'] * 1000
+        lines.append(
+            f"{key:<36} {result['median'] * 1000:>12.3f} "
+            f"{result['min'] * 1000:>10.3f} {per_op:>12.4f}"
+        )
+    return lines
+
+
+def format_comparison(rows: List[Tuple[str, float, float, bool]]) -> List[str]:
+    '''
+    Функция форматирования сравнения запусков
+
+    Переменная rows: Результат compare
+    '''
+    lines = [
+        f"{'сценарий (min)':<36} {'было, мс':>10} {'стало, мс':>10} "
+        f"{'изменение':>10}"
+    ]
+    for key, before, after, regressed in rows:
+        change = (after / before - 1) if before else 0.0
+        mark = '  ЗАМЕДЛЕНИЕ' if regressed else ''
+        lines.append(
+            f"{key:<36} {before * 1000:>10.3f} {after * 1000:>10.3f} "
+            f"{change:>+10.1%}{mark}"
+        )
+    return lines
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# benchmarks/startup.py
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+# Допустимая медиана времени запуска команды database -c, мс
+STARTUP_BUDGET_MS = 150.0
+# Число запусков для медианы
+STARTUP_RUNS = 15
+# Записей в таблице, из которой читается одна запись
+STARTUP_ROWS = 100000
+
+# Запрос одной записи по ID - типичный вызов из скрипта
+QUERY = 'select from bench where ID = 5'
+
+
+def _database(home: str, *args: str, **kwargs) -> subprocess.CompletedProcess:
+    '''
+    Функция запуска программы в отдельном процессе с каталогом базы home
+
+    Переменная home: Каталог базы данных (PRIMITIVE_DB_HOME)
+    Переменная args: Аргументы командной строки
+    '''
+    env = dict(os.environ, PRIMITIVE_DB_HOME=home)
+    return subprocess.run(
+        [sys.executable, '-m', 'src.primitive_db.main', *args],
+        env=env, check=True, **kwargs
+    )
+
+
+def prepare(home: str, rows: int) -> None:
+    '''
+    Функция создания таблицы bench (хранится сегментами) в пакетном режиме
+
+    Переменная home: Каталог базы данных
+    Переменная rows: Число записей
+    '''
+    csv_path = os.path.join(home, 'bench.csv')
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.write('name,age,active\n')
+        for number in range(rows):
+            f.write(f"user{number},{number % 90},{number % 2 == 0}\n")
+    script = (
+        'create_table bench name:str age:int active:bool storage=segments\n'
+        f'import bench from {csv_path}\n'
+    )
+    _database(
+        home, '--script', '-', input=script, text=True,
+        stdout=subprocess.DEVNULL
+    )
+
+
+def measure(command: List[str], env: Dict[str, str], runs: int) -> List[float]:
+    '''
+    Функция замера времени запуска: каждый раз запускается новый процесс,
+    который выполняет команду и завершается. Возвращает время запусков
+    в миллисекундах.
+
+    Переменная command: Команда
+    Переменная env: Переменные окружения процесса
+    Переменная runs: Число запусков
+    '''
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summary(timings: List[float]) -> Dict[str, float]:
+    '''
+    Функция расчета медианы и минимума замеров (в секундах, как в отчете
+    python -m benchmarks)
+
+    Переменная timings: Время запусков, мс
+    '''
+    return {
+        'median': statistics.median(timings) / 1000,
+        'min': min(timings) / 1000,
+        'runs': len(timings),
+        'ops': 1,
+    }
+
+
+def run(rows: int = STARTUP_ROWS, runs: int = STARTUP_RUNS) -> Dict[str, Dict]:
+    '''
+    Функция замера времени запуска интерпретатора (нижняя граница)
+    и команды database -c с запросом одной записи по ID
+
+    Переменная rows: Записей в таблице
+    Переменная runs: Число запусков
+    '''
+    with tempfile.TemporaryDirectory() as home:
+        prepare(home, rows)
+        env = dict(os.environ, PRIMITIVE_DB_HOME=home)
+        return {
+            'startup.interpreter': summary(
+                measure([sys.executable, '-c', 'pass'], env, runs)
+            ),
+            'startup.point_query': summary(measure(
+                [sys.executable, '-m', 'src.primitive_db.main', '-c', QUERY],
+                env, runs
+            )),
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='Замер времени запуска однократного режима (database -c)'
+    )
+    parser.add_argument('--runs', type=int, default=STARTUP_RUNS)
+    parser.add_argument('--rows', type=int, default=STARTUP_ROWS)
+    parser.add_argument(
+        '--budget-ms', type=float, default=STARTUP_BUDGET_MS,
+        help='допустимая медиана, мс (превышение - код выхода 1)'
+    )
+    args = parser.parse_args()
+
+    results = run(args.rows, args.runs)
+    baseline = results['startup.interpreter']
+    result = results['startup.point_query']
+    print(f"Запуск интерпретатора: {baseline['median'] * 1000:.1f} мс")
+    print(
+        f"database -c '{QUERY}' ({args.rows} записей): "
+        f"медиана {result['median'] * 1000:.1f} мс, "
+        f"min {result['min'] * 1000:.1f} мс "
+        f"(бюджет {args.budget_ms:.0f} мс)"
+    )
+    if result['median'] * 1000 > args.budget_ms:
+        print("Ошибка: Время запуска превышает бюджет.")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
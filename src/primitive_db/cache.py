@@ -0,0 +1,189 @@
+# src/primitive_db/cache.py
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+# Сколько записей результата учитывается при оценке его размера
+SIZE_SAMPLE_ROWS = 16
+
+
+def estimate_size(rows: List[Dict[str, Any]]) -> int:
+    '''
+    Функция приблизительной оценки размера результата в байтах.
+    Размер считается по первым записям и умножается на их общее количество.
+
+    Переменная rows: Записи результата
+    '''
+    sample = rows[:SIZE_SAMPLE_ROWS]
+    if not sample:
+        return sys.getsizeof(rows)
+    sample_size = sum(
+        sys.getsizeof(row) + sum(sys.getsizeof(val) for val in row.values())
+        for row in sample
+    )
+    return sys.getsizeof(rows) + sample_size * len(rows) // len(sample)
+
+
+class QueryCache:
+    '''
+    Кэш результатов select с вытеснением давно не использованных записей (LRU).
+    Ключ - (таблица, версия таблицы, условие, список столбцов). Запись в таблицу
+    увеличивает ее версию, поэтому устаревают только результаты этой таблицы.
+    Методы можно вызывать из нескольких потоков (режим сервера).
+    '''
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self._versions: Dict[Optional[str], int] = {}
+        # Увеличивается при сбросе всего кэша
+        self._epoch = 0
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.RLock()
+
+    def version(self, table_name: Optional[str]) -> int:
+        '''
+        Функция для получения текущей версии таблицы
+
+        Переменная table_name: Название таблицы
+        '''
+        return self._epoch + self._versions.get(table_name, 0)
+
+    def make_key(
+        self, table_name: Optional[str], predicate: Hashable, projection: Hashable
+    ) -> Tuple[Hashable, ...]:
+        '''
+        Функция для получения ключа кэша с текущей версией таблицы.
+        Ключ нужно получить до чтения таблицы: если таблицу изменят, пока
+        результат вычисляется, он будет сохранен под устаревшей версией.
+
+        Переменная table_name: Название таблицы
+        Переменная predicate: Нормализованное условие where
+        Переменная projection: Выбранные столбцы
+        '''
+        return (table_name, self.version(table_name), predicate, projection)
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[List[Dict[str, Any]]]:
+        '''
+        Функция получения результата из кэша (None - промах)
+
+        Переменная key: Ключ кэша
+        '''
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            self.misses += 1
+            return None
+
+    def __contains__(self, key: Tuple[Hashable, ...]) -> bool:
+        '''
+        Функция проверки наличия результата без учета в счетчиках (explain)
+
+        Переменная key: Ключ кэша
+        '''
+        with self._lock:
+            return key in self._entries
+
+    def get_or_compute(
+        self,
+        table_name: Optional[str],
+        predicate: Hashable,
+        projection: Hashable,
+        compute: Callable[[], List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        '''
+        Функция получения результата из кэша или его вычисления
+
+        Переменная table_name: Название таблицы
+        Переменная predicate: Нормализованное условие where
+        Переменная projection: Выбранные столбцы
+        Переменная compute: Функция вычисления результата
+        '''
+        key = self.make_key(table_name, predicate, projection)
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            self.put(key, result)
+        return result
+
+    def put(self, key: Tuple[Hashable, ...], result: List[Dict[str, Any]]) -> None:
+        '''
+        Функция добавления результата с вытеснением старых записей
+
+        Переменная key: Ключ кэша
+        Переменная result: Результат запроса
+        '''
+        size = estimate_size(result)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key[1] != self.version(key[0]):
+                # Таблицу изменили, пока результат вычислялся
+                return
+
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                self.evictions += 1
+
+    def invalidate(self, table_name: Optional[str] = None) -> None:
+        '''
+        Функция увеличения версии таблицы после записи.
+        Без названия таблицы сбрасывается весь кэш.
+
+        Переменная table_name: Название таблицы
+        '''
+        with self._lock:
+            if table_name is None:
+                self._epoch += 1
+                self._entries.clear()
+                self._bytes = 0
+                return
+
+            self._versions[table_name] = self._versions.get(table_name, 0) + 1
+            stale = [key for key in self._entries if key[0] == table_name]
+            for key in stale:
+                _, size = self._entries.pop(key)
+                self._bytes -= size
+
+    def clear(self) -> None:
+        '''
+        Функция полной очистки кэша и счетчиков
+        '''
+        self.invalidate()
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        '''
+        Функция сброса счетчиков без очистки кэша
+        '''
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        '''
+        Функция для получения счетчиков кэша
+        '''
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,649 @@
+# src/primitive_db/catalog.py
+
+import copy
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.primitive_db import index, journal, utils
+from src.primitive_db.constants import DB_META_PATH
+from src.primitive_db.decorators import log_time
+from src.primitive_db.storage import Change, get_backend
+from src.primitive_db.table import Table
+
+
+def file_stamp(filepath: str) -> List[int]:
+    '''
+    Функция для получения отпечатка файла: размер, время изменения и inode.
+    Если отпечаток изменился, файл был перезаписан (возможно, другим процессом).
+
+    Переменная filepath: Путь до файла
+    '''
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        return [0, 0, 0]
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+
+class Catalog:
+    '''
+    Кэш сессии: разобранные метаданные, таблицы (table.Table) и их индексы.
+    Файл читается повторно только тогда, когда его отпечаток отличается
+    от запомненного при последнем чтении или записи. Все записи на диск
+    проходят через каталог, поэтому собственные изменения не вызывают
+    повторного чтения.
+
+    В режиме отложенной записи (deferred) изменения копятся в памяти
+    и записываются вызовом flush: по одной записи на каждую измененную таблицу,
+    атомарно для всех таблиц (через журнал фиксации, см. journal.py).
+    Транзакция (begin/commit/rollback) - это отложенная запись, которую можно
+    отменить.
+    '''
+
+    def __init__(
+        self, meta_path: str = DB_META_PATH, on_reload=None, deferred: bool = False
+    ):
+        '''
+        Переменная meta_path: Путь до файла метаданных
+        Переменная on_reload: Вызывается с названием таблицы, если ее файл
+        изменился вне сессии
+        Переменная deferred: Откладывать запись до вызова flush
+        '''
+        self.meta_path = meta_path
+        self.on_reload = on_reload
+        # Метаданные общие для всех таблиц: в режиме сервера их читают
+        # и записывают команды из разных потоков
+        self._meta_lock = threading.RLock()
+        self.deferred = deferred
+        # Отложенные изменения: таблица -> изменения (None - переписать целиком)
+        self._pending: Dict[str, Optional[List[Change]]] = {}
+        # Удаленные таблицы -> файлы, которые нужно удалить при записи
+        self._dropped: Dict[str, List[str]] = {}
+        # Файлы удаленных индексов (удаляются при записи)
+        self._dropped_indexes: List[str] = []
+        self._meta_dirty = False
+        # Блокировка кэша сессии для фоновой записи (flush_behind): команды
+        # выполняются под ней, а фоновая запись берет ее, чтобы скопировать
+        # изменения и зафиксировать файлы
+        self.lock = threading.RLock()
+        self._written = threading.Condition(self.lock)
+        # Идет фоновая запись
+        self._writing = False
+        # Таблицы, индексы которых записываются при следующем flush
+        # (записанные в фоне и с новыми индексами)
+        self._stale_indexes: set = set()
+        # Режим записи до начала транзакции (None - транзакции нет)
+        self._outer_deferred: Optional[bool] = None
+        self._metadata: Optional[Dict[str, Any]] = None
+        self._meta_stamp: Optional[List[int]] = None
+        # Название таблицы -> (отпечаток файла, таблица)
+        self._tables: Dict[str, Any] = {}
+        # Название таблицы -> индексы по столбцам
+        self._indexes: Dict[str, Dict[str, Any]] = {}
+        # Название таблицы -> отпечаток файла при последнем чтении части
+        # (table_part): части не кэшируются, но результаты select по ним
+        # кэшируются и сбрасываются, когда файл изменяется вне сессии
+        self._part_stamps: Dict[str, List[int]] = {}
+
+    def metadata(self) -> Dict[str, Any]:
+        '''
+        Функция для получения метаданных
+        '''
+        with self._meta_lock:
+            stamp = file_stamp(self.meta_path)
+            if self._metadata is None or stamp != self._meta_stamp:
+                self._metadata = utils.load_metadata(self.meta_path)
+                self._meta_stamp = stamp
+            return self._metadata
+
+    def save_metadata(self, metadata: Dict[str, Any]) -> None:
+        '''
+        Функция для сохранения метаданных
+
+        Переменная metadata: Метаданные
+        '''
+        with self._meta_lock:
+            self._metadata = metadata
+            if self.deferred:
+                self._meta_dirty = True
+                return
+            utils.save_metadata(self.meta_path, metadata)
+            self._meta_stamp = file_stamp(self.meta_path)
+            self._meta_dirty = False
+
+    def storage(self, table_name: str) -> str:
+        '''
+        Функция для получения формата хранения таблицы
+
+        Переменная table_name: Название таблицы
+        '''
+        table_meta = self.metadata().get(table_name)
+        if table_meta is None:
+            return 'json'
+        return table_meta.get('storage', 'json')
+
+    def _stamp(self, table_name: str) -> List[int]:
+        backend = get_backend(self.storage(table_name))
+        return file_stamp(backend.path(table_name))
+
+    def table(self, table_name: str) -> Table:
+        '''
+        Функция для получения таблицы. Записи из файла раскладываются
+        по столбцам по схеме из метаданных.
+
+        Переменная table_name: Название таблицы
+        '''
+        table_meta = self.metadata().get(table_name)
+        schema = table_meta['columns'] if table_meta else [
+            {'name': 'ID', 'type': 'int'}
+        ]
+        stamp = self._stamp(table_name)
+        cached = self._tables.get(table_name)
+        # Схема сравнивается, если таблицу пересоздали с другими столбцами
+        stats = table_meta.get('stats') if table_meta else None
+        if cached is not None and cached[0] == stamp and cached[1].schema == schema:
+            cached[1].stats = stats
+            return cached[1]
+
+        if table_name in self._dropped:
+            # Таблица удалена и создана заново, старый файл еще не удален
+            data = Table(schema)
+        else:
+            data = utils.load_table(table_name, schema, self.storage(table_name))
+        data.stats = stats
+        self._tables[table_name] = (stamp, data)
+        self._indexes.pop(table_name, None)
+        if cached is not None and self.on_reload is not None:
+            # Таблицу изменил другой процесс
+            self.on_reload(table_name)
+        return data
+
+    def table_part(
+        self,
+        table_name: str,
+        id_range: Optional[tuple],
+        columns: Optional[List[str]] = None
+    ) -> Optional[Table]:
+        '''
+        Функция чтения части таблицы по диапазону ID и нужным столбцам,
+        не загружая остальное. Возвращает None, если таблица уже в кэше
+        сессии или хранилище не может пропустить ни одной части - тогда
+        нужна table. Часть не кэшируется, а индексы к ней не относятся.
+        Если файл изменился после прошлого чтения, вызывается on_reload
+        (как в table), чтобы сбросить кэш select.
+
+        Переменная table_name: Название таблицы
+        Переменная id_range: Наименьший и наибольший ID (None - без границы)
+        Переменная columns: Нужные столбцы (None - все)
+        '''
+        table_meta = self.metadata().get(table_name)
+        if (id_range is None and columns is None) or (
+            table_meta is None or table_name in self._dropped
+        ):
+            return None
+        stamp = self._stamp(table_name)
+        cached = self._tables.get(table_name)
+        if cached is not None and cached[0] == stamp:
+            return None
+        known = self._part_stamps.get(table_name, cached and cached[0])
+        if known is not None and known != stamp and self.on_reload is not None:
+            # Таблицу изменил другой процесс
+            self.on_reload(table_name)
+        self._part_stamps[table_name] = stamp
+        backend = get_backend(self.storage(table_name))
+        part = backend.load_part(
+            table_name, table_meta['columns'], *(id_range or (None, None)), columns
+        )
+        if part is not None:
+            part.stats = table_meta.get('stats')
+        return part
+
+    def indexes(self, table_name: str) -> Dict[str, Any]:
+        '''
+        Функция для получения индексов таблицы
+
+        Переменная table_name: Название таблицы
+        '''
+        table_meta = self.metadata().get(table_name)
+        if table_meta is None:
+            return {}
+
+        data = self.table(table_name)
+        columns = table_meta.get('indexes', [])
+        sorted_columns = table_meta.get('sorted_indexes', [])
+        wanted = {column: 'hash' for column in columns}
+        wanted.update({column: 'sorted' for column in sorted_columns})
+
+        cached = self._indexes.get(table_name)
+        if cached is None or wanted != {
+            column: index.kind_of(entries) for column, entries in cached.items()
+        }:
+            cached = index.load_indexes(
+                table_name, columns, data, self.storage(table_name), sorted_columns
+            )
+            self._indexes[table_name] = cached
+        return cached
+
+    def save_table(
+        self,
+        table_name: str,
+        data: Table,
+        changes: Optional[List[Change]] = None,
+        with_indexes: bool = True
+    ) -> None:
+        '''
+        Функция для сохранения записей таблицы и ее индексов
+
+        Переменная table_name: Название таблицы
+        Переменная data: Таблица
+        Переменная changes: Изменения с прошлого сохранения (None - записать все)
+        Переменная with_indexes: Сохранить и индексы. Устаревший файл индекса
+        не используется, а перестраивается при загрузке
+        '''
+        if self.deferred:
+            pending = self._pending.get(table_name, [])
+            if changes is None or pending is None or table_name in self._dropped:
+                self._pending[table_name] = None
+            else:
+                self._pending[table_name] = pending + changes
+            # Файл не изменился, поэтому отпечаток остается прежним
+            self._tables[table_name] = (self._stamp(table_name), data)
+            return
+
+        storage = self.storage(table_name)
+        utils.save_table_data(table_name, data, storage, changes)
+        if with_indexes:
+            self.save_indexes(table_name)
+        self._tables[table_name] = (self._stamp(table_name), data)
+
+    @log_time
+    def flush(self) -> int:
+        '''
+        Функция записи отложенных изменений одной фиксацией: метаданные,
+        удаление файлов удаленных таблиц и каждая измененная таблица
+        одной записью. Все файлы подготавливаются заранее и применяются
+        через журнал с одним fsync, поэтому после сбоя на диске будут либо
+        все изменения, либо ни одного. Если идет фоновая запись
+        (flush_behind), сначала дожидается ее.
+        Возвращает количество записанных таблиц.
+        '''
+        with self.lock:
+            while self._writing:
+                self._written.wait()
+            batch = self._take_pending(copy_tables=False)
+            written = self._write_batch(batch)
+            for table_name in sorted(set(written) | self._stale_indexes):
+                self.save_indexes(table_name)
+            self._stale_indexes.clear()
+            return len(written)
+
+    def flush_behind(self) -> int:
+        '''
+        Функция фоновой записи отложенных изменений (write-behind).
+        Измененные таблицы копируются под блокировкой lock, файлы
+        подготавливаются без нее, поэтому команды в это время выполняются,
+        а фиксация (переименование файлов) снова идет под блокировкой.
+        Индексы записываются при следующем flush: устаревший файл индекса
+        не используется. Во время транзакции ничего не записывается.
+        Возвращает количество записанных таблиц.
+        '''
+        with self.lock:
+            if self._writing or self.in_transaction or not (
+                self._pending or self._dropped or self._dropped_indexes
+                or self._meta_dirty
+            ):
+                return 0
+            batch = self._take_pending(copy_tables=True)
+            self._writing = True
+        try:
+            steps = self._prepare_batch(batch)
+        except Exception:
+            with self.lock:
+                self._restore_batch(batch)
+                self._writing = False
+                self._written.notify_all()
+            raise
+        with self.lock:
+            try:
+                written = self._commit_batch(batch, steps)
+                self._stale_indexes.update(written)
+                return len(written)
+            finally:
+                self._writing = False
+                self._written.notify_all()
+
+    def _take_pending(self, copy_tables: bool) -> Dict[str, Any]:
+        '''
+        Функция для получения отложенных изменений для записи.
+        Отложенные изменения очищаются (при ошибке записи их возвращает
+        _restore_batch).
+
+        Переменная copy_tables: Записывать копии таблиц (фоновая запись:
+        команды продолжают изменять таблицы)
+        '''
+        metadata = self.metadata()
+        batch: Dict[str, Any] = {
+            'metadata': None, 'dropped': dict(self._dropped),
+            'dropped_indexes': list(self._dropped_indexes), 'tables': []
+        }
+        if self._meta_dirty:
+            batch['metadata'] = copy.deepcopy(metadata) if copy_tables else metadata
+        for table_name, changes in self._pending.items():
+            if table_name not in metadata or table_name not in self._tables:
+                continue
+            data = self._tables[table_name][1]
+            if copy_tables:
+                data = data.slice(0, len(data), data.names)
+            batch['tables'].append((
+                table_name, data, self.storage(table_name),
+                None if changes is None else list(changes)
+            ))
+        self._meta_dirty = False
+        self._pending.clear()
+        self._dropped.clear()
+        self._dropped_indexes.clear()
+        return batch
+
+    def _prepare_batch(self, batch: Dict[str, Any]) -> List[Any]:
+        '''
+        Функция подготовки файлов для фиксации (см. journal.py)
+
+        Переменная batch: Изменения из _take_pending
+        '''
+        steps = []
+        if batch['metadata'] is not None:
+            steps.append(utils.prepare_metadata(self.meta_path, batch['metadata']))
+        for paths in list(batch['dropped'].values()) + [batch['dropped_indexes']]:
+            steps += [{'op': 'remove', 'path': path} for path in paths]
+        for table_name, data, storage, changes in batch['tables']:
+            steps += utils.prepare_table_data(table_name, data, storage, changes)
+        return steps
+
+    def _commit_batch(self, batch: Dict[str, Any], steps: List[Any]) -> List[str]:
+        '''
+        Функция фиксации подготовленных файлов и обновления отпечатков
+        файлов в кэше сессии. Возвращает названия записанных таблиц.
+
+        Переменная batch: Изменения из _take_pending
+        Переменная steps: Шаги фиксации из _prepare_batch
+        '''
+        try:
+            journal.commit(steps)
+        except Exception:
+            self._restore_batch(batch)
+            raise
+        if batch['metadata'] is not None:
+            self._meta_stamp = file_stamp(self.meta_path)
+        written = []
+        for table_name, _, _, _ in batch['tables']:
+            cached = self._tables.get(table_name)
+            if cached is not None:
+                self._tables[table_name] = (self._stamp(table_name), cached[1])
+            written.append(table_name)
+        return written
+
+    def _write_batch(self, batch: Dict[str, Any]) -> List[str]:
+        '''
+        Функция подготовки и фиксации изменений в одном потоке
+
+        Переменная batch: Изменения из _take_pending
+        '''
+        try:
+            steps = self._prepare_batch(batch)
+        except Exception:
+            self._restore_batch(batch)
+            raise
+        return self._commit_batch(batch, steps)
+
+    def _restore_batch(self, batch: Dict[str, Any]) -> None:
+        '''
+        Функция возврата незаписанных изменений в отложенные после ошибки
+        записи. Таблицы будут переписаны целиком.
+
+        Переменная batch: Изменения из _take_pending
+        '''
+        if batch['metadata'] is not None:
+            self._meta_dirty = True
+        for table_name, paths in batch['dropped'].items():
+            self._dropped[table_name] = paths + self._dropped.get(table_name, [])
+        self._dropped_indexes[:0] = batch['dropped_indexes']
+        for table_name, _, _, _ in batch['tables']:
+            self._pending[table_name] = None
+
+    def pending_rows(self) -> int:
+        '''
+        Функция подсчета незаписанных изменений записей (таблица, которую
+        нужно переписать целиком, считается одним изменением)
+        '''
+        with self.lock:
+            return sum(
+                1 if changes is None else sum(
+                    len(change[2]) if change[0] == 'insert_many' else 1
+                    for change in changes
+                )
+                for changes in self._pending.values()
+            )
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._outer_deferred is not None
+
+    def begin(self) -> None:
+        '''
+        Функция начала транзакции. Накопленные ранее изменения
+        записываются, чтобы откат затронул только изменения транзакции.
+        '''
+        if self.in_transaction:
+            raise ValueError("Транзакция уже начата")
+        self.flush()
+        self._outer_deferred = self.deferred
+        self.deferred = True
+
+    def commit(self) -> int:
+        '''
+        Функция фиксации транзакции.
+        Возвращает количество записанных таблиц.
+        '''
+        if not self.in_transaction:
+            raise ValueError("Транзакция не начата")
+        written = self.flush()
+        self.deferred, self._outer_deferred = self._outer_deferred, None
+        return written
+
+    def rollback(self) -> List[str]:
+        '''
+        Функция отката транзакции: изменения транзакции отбрасываются,
+        а измененные таблицы и метаданные будут заново прочитаны с диска.
+        Возвращает названия затронутых таблиц.
+        '''
+        if not self.in_transaction:
+            raise ValueError("Транзакция не начата")
+        # Новые индексы транзакции еще не записаны (begin записывает прежние)
+        touched = sorted(
+            set(self._pending) | set(self._dropped) | self._stale_indexes
+        )
+        for table_name in touched:
+            self.forget(table_name)
+        self._dropped.clear()
+        self._dropped_indexes.clear()
+        self._stale_indexes.clear()
+        if self._meta_dirty:
+            self._metadata = None
+            self._meta_dirty = False
+        self.deferred, self._outer_deferred = self._outer_deferred, None
+        if self.on_reload is not None:
+            for table_name in touched:
+                self.on_reload(table_name)
+        return touched
+
+    def pending(self) -> int:
+        '''
+        Функция для получения количества таблиц с незаписанными изменениями
+        '''
+        return len(self._pending)
+
+    def save_indexes(self, table_name: str) -> None:
+        '''
+        Функция для сохранения индексов таблицы из кэша сессии
+
+        Переменная table_name: Название таблицы
+        '''
+        if self.deferred and table_name in self._pending:
+            # Индексы будут записаны вместе с таблицей в flush
+            return
+        index.save_indexes(
+            table_name, self._indexes.get(table_name), self.storage(table_name)
+        )
+
+    def save_index(self, table_name: str, column: str, kind: str) -> None:
+        '''
+        Функция построения нового индекса (его столбец уже добавлен
+        в метаданные через save_metadata) и записи его файла. В отложенном
+        режиме и в транзакции файл записывается при flush после таблицы,
+        а откат его не оставляет.
+
+        Переменная table_name: Название таблицы
+        Переменная column: Название столбца
+        Переменная kind: Вид индекса
+        '''
+        entries = index.build(self.table(table_name), column, kind)
+        cached = self._indexes.get(table_name)
+        if cached is not None:
+            # Остальные индексы в кэше учитывают незаписанные изменения,
+            # поэтому не перечитываются из файлов
+            cached[column] = entries
+        if self.deferred:
+            self._stale_indexes.add(table_name)
+            return
+        index.save_indexes(table_name, {column: entries}, self.storage(table_name))
+
+    def drop_index(self, table_name: str, column: str) -> None:
+        '''
+        Функция удаления файлов индекса столбца. В отложенном режиме
+        и в транзакции файлы удаляются при фиксации вместе с метаданными.
+
+        Переменная table_name: Название таблицы
+        Переменная column: Название столбца
+        '''
+        paths = [
+            index.index_path(table_name, column, kind) for kind in index.INDEX_KINDS
+        ]
+        cached = self._indexes.get(table_name)
+        if cached is not None:
+            cached.pop(column, None)
+        if self.deferred:
+            self._dropped_indexes += paths
+            return
+        for kind in index.INDEX_KINDS:
+            index.drop_index_file(table_name, column, kind)
+
+    def compact_table(self, table_name: str) -> bool:
+        '''
+        Функция для сжатия хранилища таблицы
+
+        Переменная table_name: Название таблицы
+        '''
+        if self.in_transaction:
+            raise ValueError("Сжатие недоступно внутри транзакции")
+        # Сжатие пишет файл сразу, поэтому отложенные изменения записываются раньше
+        self.flush()
+        storage = self.storage(table_name)
+        data = self.table(table_name)
+        compacted = utils.compact_table_data(table_name, data, storage)
+        if compacted:
+            index.save_indexes(table_name, self._indexes.get(table_name), storage)
+            self._tables[table_name] = (self._stamp(table_name), data)
+        return compacted
+
+    def vacuum_table(self, table_name: str) -> int:
+        '''
+        Функция очистки таблицы от удаленных записей: они убираются
+        из столбцов в памяти, а хранилище таблицы сжимается. В отложенном
+        режиме (и в транзакции) таблица помечается для записи целиком,
+        поэтому хранилище сжимается при flush (или commit).
+        Возвращает количество убранных записей.
+
+        Переменная table_name: Название таблицы
+        '''
+        data = self.table(table_name)
+        removed = data.vacuum()
+        if self.deferred:
+            self.save_table(table_name, data)
+        else:
+            self.compact_table(table_name)
+        return removed
+
+    def reclaimable(self, table_name: str) -> Optional[Tuple[int, int]]:
+        '''
+        Функция оценки места в файлах таблицы, которое освободит сжатие
+        (см. JsonStorage.reclaimable). None - хранилищу нечего освобождать.
+
+        Переменная table_name: Название таблицы
+        '''
+        backend = get_backend(self.storage(table_name))
+        return backend.reclaimable(table_name, self.table(table_name))
+
+    def convert_table(self, table_name: str, storage: str) -> bool:
+        '''
+        Функция перевода таблицы в другой формат хранения: таблица
+        записывается в новом формате, метаданные переключаются на него,
+        и только после этого удаляются файлы старого формата.
+        Возвращает False, если таблица уже хранится в этом формате.
+
+        Переменная table_name: Название таблицы
+        Переменная storage: Новый формат хранения
+        '''
+        if self.in_transaction:
+            raise ValueError("Смена формата недоступна внутри транзакции")
+        backend = get_backend(storage)
+        old = self.storage(table_name)
+        if old == storage:
+            return False
+        # Файлы пишутся сразу, поэтому отложенные изменения записываются раньше
+        self.flush()
+        data = self.table(table_name)
+        backend.save(table_name, data)
+        metadata = self.metadata()
+        metadata[table_name]['storage'] = storage
+        self.save_metadata(metadata)
+        self.flush()
+        utils.drop_table_data(table_name, old)
+        self._tables[table_name] = (self._stamp(table_name), data)
+        index.save_indexes(table_name, self.indexes(table_name), storage)
+        return True
+
+    def drop_table(
+        self, table_name: str, storage: str, indexed: List[str]
+    ) -> None:
+        '''
+        Функция для удаления файлов таблицы и ее индексов
+
+        Переменная table_name: Название таблицы
+        Переменная storage: Формат хранения таблицы
+        Переменная indexed: Проиндексированные столбцы
+        '''
+        if self.deferred:
+            paths = get_backend(storage).files(table_name) + [
+                index.index_path(table_name, column, kind)
+                for column in indexed for kind in index.INDEX_KINDS
+            ]
+            self._dropped[table_name] = self._dropped.get(table_name, []) + paths
+            self.forget(table_name)
+            return
+
+        utils.drop_table_data(table_name, storage)
+        for column in indexed:
+            for kind in index.INDEX_KINDS:
+                index.drop_index_file(table_name, column, kind)
+        self.forget(table_name)
+
+    def forget(self, table_name: str) -> None:
+        '''
+        Функция для удаления таблицы из кэша сессии
+
+        Переменная table_name: Название таблицы
+        '''
+        self._tables.pop(table_name, None)
+        self._indexes.pop(table_name, None)
+        self._pending.pop(table_name, None)
@@ -0,0 +1,93 @@
+# src/primitive_db/client.py
+
+import socket
+import sys
+from typing import Iterable, Optional
+
+import prompt
+
+
+class Client:
+    '''
+    Клиент сервера базы данных (database serve): отправляет команду
+    строкой и читает ответ - строку с длиной вывода и сам вывод.
+    '''
+
+    def __init__(
+        self, host: str, port: int, socket_path: Optional[str] = None
+    ):
+        '''
+        Переменная host: Адрес TCP
+        Переменная port: Порт TCP
+        Переменная socket_path: Путь до Unix-сокета (вместо TCP)
+        '''
+        if socket_path:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.connect(socket_path)
+        else:
+            self._sock = socket.create_connection((host, port))
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile('rwb')
+
+    def execute(self, raw_input: str) -> Optional[str]:
+        '''
+        Функция выполнения команды на сервере.
+        Возвращает вывод команды или None, если сервер закрыл соединение.
+
+        Переменная raw_input: Текст команды
+        '''
+        self._file.write(raw_input.replace('\n', ' ').encode('utf-8') + b'\n')
+        self._file.flush()
+        header = self._file.readline()
+        if not header:
+            return None
+        return self._file.read(int(header)).decode('utf-8')
+
+    def close(self) -> None:
+        self._file.close()
+        self._sock.close()
+
+
+def run_client(
+    host: str,
+    port: int,
+    socket_path: Optional[str] = None,
+    lines: Optional[Iterable[str]] = None
+) -> None:
+    '''
+    Функция клиента (database client): команды вводятся как в обычном
+    режиме или читаются из lines, вывод печатается после ответа сервера
+
+    Переменная host: Адрес TCP
+    Переменная port: Порт TCP
+    Переменная socket_path: Путь до Unix-сокета (вместо TCP)
+    Переменная lines: Строки команд (None - ввод с клавиатуры)
+    '''
+    try:
+        client = Client(host, port, socket_path)
+    except OSError as e:
+        print(f"Ошибка: Не удалось подключиться к серверу: {e}")
+        return
+
+    if lines is None:
+        def commands():
+            while True:
+                yield prompt.string('>>>Введите команду: ')
+        lines = commands()
+
+    try:
+        for raw_input in lines:
+            raw_input = raw_input.strip()
+            if not raw_input:
+                continue
+            text = client.execute(raw_input)
+            if text is None:
+                break
+            sys.stdout.write(text)
+            if raw_input.lower() == 'exit':
+                break
+            print()
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        client.close()
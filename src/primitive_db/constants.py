@@ -5,14 +5,72 @@ import os
 # абсолютный путь
 BASE_DIR = os.path.dirname(os.path.abspath(__file__)) 
 
+# каталог базы (метаданные и data/): по умолчанию рядом с пакетом,
+# переменная окружения PRIMITIVE_DB_HOME задает другой (например, для бенчмарков)
+DB_HOME = os.environ.get('PRIMITIVE_DB_HOME') or BASE_DIR
+
 # путь до /data
-DATA_DIR = os.path.join(BASE_DIR, 'data') 
+DATA_DIR = os.path.join(DB_HOME, 'data') 
 
 # путь до файла с метаданными
 DB_FILE_NAME = 'db_meta.json' 
 
 # Полный путь к файлу метаданных 
-DB_META_PATH = os.path.join(BASE_DIR, DB_FILE_NAME) 
+DB_META_PATH = os.path.join(DB_HOME, DB_FILE_NAME) 
 
 # Допустимые типы данных для колонок
 ALLOWED_TYPES = {'int', 'str', 'bool'}
+
+# Формат хранения новых таблиц по умолчанию ('json', 'log', 'segments'
+# или 'binary'). Остальные форматы выбираются опцией storage= в create_table
+DEFAULT_STORAGE = 'json'
+
+# Хранение сегментами: столько записей в одном файле-сегменте
+SEGMENT_ROWS = 10000
+
+# Журнал сжимается автоматически, когда в нем не меньше указанного числа записей
+LOG_COMPACT_MIN_RECORDS = 1000
+
+# и доля устаревших записей (обновленных или удаленных) не меньше порога
+LOG_COMPACT_RATIO = 0.5
+
+# Сколько байт с конца журнала читается за раз при поиске недописанной строки
+LOG_TAIL_CHUNK = 4096
+
+# Ограничения кэша результатов select: число результатов и их примерный объем
+CACHE_MAX_ENTRIES = 256
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Результат select длиннее этого числа записей не сохраняется в кэш
+CACHE_MAX_RESULT_ROWS = 10000
+
+# Кэш разбора команд: сколько разобранных команд хранится
+STATEMENT_CACHE_SIZE = 512
+
+# Вывод select: записи печатаются таблицами по столько строк
+RENDER_CHUNK_ROWS = 500
+
+# Импорт из файла: столько записей приводится к типам и сохраняется за раз
+IMPORT_BATCH_ROWS = 50000
+
+# Сервер (database serve): адрес по умолчанию и число потоков для команд
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 5455
+SERVER_WORKERS = 8
+
+# Параллельный перебор: процессы пула (1 - без пула) и размер таблицы,
+# начиная с которого условие проверяется частями в нескольких процессах
+PARALLEL_WORKERS = os.cpu_count() or 1
+PARALLEL_MIN_ROWS = 500000
+
+# Метрики: процентили задержек считаются по стольким последним замерам операции
+METRICS_WINDOW = 10000
+
+# Фоновая запись (--write-behind): изменения записываются раз в столько секунд
+# или раньше, когда незаписанных изменений записей не меньше WRITE_BEHIND_ROWS
+WRITE_BEHIND_INTERVAL = 1.0
+WRITE_BEHIND_ROWS = 10000
+
+# Удаление только отмечает записи; когда доля удаленных записей таблицы
+# достигает этого порога, они убираются из памяти автоматически (как vacuum)
+VACUUM_DEAD_FRACTION = 0.25
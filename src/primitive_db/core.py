@@ -1,31 +1,35 @@
-from typing import Any, Dict, List, Optional, Tuple
+import functools
+import heapq
+import itertools
+import operator
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
-from src.primitive_db.constants import ALLOWED_TYPES
+from src.primitive_db import index, parallel, planner
+from src.primitive_db.cache import QueryCache
+from src.primitive_db.constants import (
+    ALLOWED_TYPES,
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRIES,
+    CACHE_MAX_RESULT_ROWS,
+    DEFAULT_STORAGE,
+)
 from src.primitive_db.decorators import confirm_action, handle_db_errors, log_time
+from src.primitive_db.metrics import registry
+from src.primitive_db.storage import BACKENDS
+from src.primitive_db.table import INT_MAX, INT_MIN, Table
 
-
-def create_cacher():
-    '''
-    Функция для создания кэшера
-    '''
-    cache = {}
-
-    def cache_result(key: str = None, value_func=None, clear: bool = False):
-        if clear:
-            cache.clear()
-            return None
-        if key in cache:
-            return cache[key]
-        if value_func:
-            result = value_func()
-            cache[key] = result
-            return result
-        return None
-
-    return cache_result
-
-
-select_cacher = create_cacher()
+select_cache = QueryCache(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+registry.register('select_cache', select_cache.stats, select_cache.reset_counters)
 
 
 def cast_value(value: str, target_type: str) -> Any:
@@ -37,9 +41,12 @@ def cast_value(value: str, target_type: str) -> Any:
     '''
     if target_type == 'int':
         try:
-            return int(value)
+            number = int(value)
         except ValueError:
             raise ValueError(f"Невозможно преобразовать '{value}' в int")
+        if not INT_MIN <= number <= INT_MAX:
+            raise ValueError(f"Значение {number} вне диапазона int")
+        return number
     if target_type == 'bool':
         lower_val = value.lower()
         if lower_val in ('true', '1', 'yes'):
@@ -59,11 +66,22 @@ def create_table(
     
     Переменная metadata: Переданные данные
     Переменная table_name: Название таблицы
-    Переменная columns: Название столбца
+    Переменная columns: Название столбца (или опция storage=<формат>)
     '''
     if table_name in metadata:
         raise ValueError(f'Таблица "{table_name}" уже существует.')
 
+    storage = DEFAULT_STORAGE
+    options = [col for col in columns if col.lower().startswith('storage=')]
+    for option in options:
+        storage = option.split('=', 1)[1].lower()
+        if storage not in BACKENDS:
+            raise ValueError(
+                f"Неизвестный формат хранения '{storage}'. "
+                f"Доступны: {set(BACKENDS)}"
+            )
+    columns = [col for col in columns if col not in options]
+
     user_col_names = [col.split(':')[0].lower() for col in columns if ':' in col]
     table_schema = []
 
@@ -88,12 +106,14 @@ def create_table(
         final_name = 'ID' if col_name.lower() == 'id' else col_name
         table_schema.append({'name': final_name, 'type': col_type})
 
-    metadata[table_name] = table_schema
+    metadata[table_name] = {
+        'columns': table_schema, 'storage': storage, 'sequence': 0
+    }
 
     col_str_list = [f"{col['name']}:{col['type']}" for col in table_schema]
     print(
         f'Таблица "{table_name}" успешно создана '
-        f'со столбцами: {", ".join(col_str_list)}'
+        f'со столбцами: {", ".join(col_str_list)} (хранение: {storage})'
     )
     return metadata
 
@@ -111,7 +131,7 @@ def drop_table(metadata: Dict[str, Any], table_name: str) -> Dict[str, Any]:
         raise KeyError(f'Таблица "{table_name}" не существует.')
 
     del metadata[table_name]
-    select_cacher(clear=True)
+    select_cache.invalidate(table_name)
     print(f'Таблица "{table_name}" успешно удалена.')
     return metadata
 
@@ -126,131 +146,1327 @@ def list_tables(metadata: Dict[str, Any]) -> None:
         print(f"- {name}")
 
 
+def next_ids(
+    metadata: Dict[str, Any],
+    table_name: str,
+    count: int = 1,
+    table_data: Optional[Table] = None
+) -> range:
+    '''
+    Функция резервирования блока ID из последовательности таблицы.
+    Последовательность хранится в метаданных и никогда не уменьшается.
+    
+    Переменная metadata: Метаданные
+    Переменная table_name: Название таблицы
+    Переменная count: Количество ID
+    Переменная table_data: Таблица (для таблиц без последовательности)
+    '''
+    table_meta = metadata[table_name]
+    if 'sequence' not in table_meta:
+        # Таблица создана до появления последовательностей
+        ids = table_data.ids if table_data is not None else []
+        table_meta['sequence'] = max(ids, default=0)
+
+    first_id = table_meta['sequence'] + 1
+    table_meta['sequence'] += count
+    return range(first_id, first_id + count)
+
+
 @handle_db_errors
 @log_time
 def insert(
-    metadata: Dict[str, Any], table_name: str, values: List[str]
-) -> Tuple[Dict[str, Any], int]:
+    metadata: Dict[str, Any],
+    table_name: str,
+    values: List[List[str]],
+    table_data: Optional[Table] = None
+) -> Tuple[List[Dict[str, Any]], range]:
     '''
     Функция реализации insert
     
     Переменная metadata: Вводимые данные
     Переменная table_name: Название таблицы
-    Переменная values: Значение
+    Переменная values: Значения (по списку на каждую запись)
+    Переменная table_data: Таблица (для таблиц без последовательности)
     '''
     if table_name not in metadata:
         raise KeyError(f'Таблица "{table_name}" не найдена в метаданных.')
 
-    schema = metadata[table_name]
+    schema = metadata[table_name]['columns']
 
-    if len(values) != len(schema) - 1:
-        raise ValueError(
-            f"Ожидалось {len(schema)-1} значений, получено {len(values)}"
+    if not values:
+        raise ValueError("Не указаны значения для вставки")
+    for row_values in values:
+        if len(row_values) != len(schema) - 1:
+            raise ValueError(
+                f"Ожидалось {len(schema)-1} значений, получено {len(row_values)}"
+            )
+
+    new_rows = []
+    for row_values in values:
+        new_row = {}
+        for i, col_info in enumerate(schema[1:]):
+            val = cast_value(row_values[i], col_info['type'])
+            new_row[col_info['name']] = val
+        new_rows.append(new_row)
+
+    select_cache.invalidate(table_name)
+
+    ids = next_ids(metadata, table_name, len(new_rows), table_data)
+    for new_row, new_id in zip(new_rows, ids):
+        new_row['ID'] = new_id
+
+    return new_rows, ids
+
+
+# Операторы сравнения условия where
+OPERATORS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+def _column_types(schema: List[Dict[str, str]]) -> Dict[str, str]:
+    '''
+    Функция для получения типов столбцов по их названиям
+    
+    Переменная schema: Столбцы таблицы
+    '''
+    return {col['name']: col['type'] for col in schema}
+
+
+def _cast_literal(types: Dict[str, str], column: str, raw: str) -> Any:
+    '''
+    Функция приведения значения из условия к типу столбца
+    
+    Переменная types: Типы столбцов
+    Переменная column: Название столбца
+    Переменная raw: Значение из условия
+    '''
+    if column not in types:
+        raise KeyError(f'Столбец "{column}" не найден.')
+    return cast_value(raw, types[column])
+
+
+# Проверка одного значения столбца для каждого оператора сравнения.
+# Используются методы значения из условия, поэтому при переборе столбца
+# сравнение выполняется без вызова функций Python: x < value <=> value > x
+_VALUE_TESTS = {
+    '=': '__eq__',
+    '!=': '__ne__',
+    '<': '__gt__',
+    '<=': '__ge__',
+    '>': '__lt__',
+    '>=': '__le__',
+}
+
+
+def _leaf(expr: tuple, types: Dict[str, str]) -> Tuple[str, Callable[[Any], bool]]:
+    '''
+    Функция для получения столбца и проверки значения для сравнения или IN.
+    Значения в столбцах всегда имеют тип столбца, а значение из условия
+    приводится к нему заранее.
+    
+    Переменная expr: Сравнение или IN из дерева условия
+    Переменная types: Типы столбцов
+    '''
+    if expr[0] == 'in':
+        _, column, raws = expr
+        values = frozenset(_cast_literal(types, column, raw) for raw in raws)
+        return column, values.__contains__
+
+    _, column, op, raw = expr
+    value = _cast_literal(types, column, raw)
+    return column, getattr(value, _VALUE_TESTS[op])
+
+
+def compile_where(where_clause: tuple, table: Table) -> Callable[[int], bool]:
+    '''
+    Функция компиляции условия where в одну функцию проверки записи
+    по ее позиции. Значения из условия приводятся к типам столбцов один раз,
+    а проверка читает значение прямо из массива столбца.
+    
+    Переменная where_clause: Дерево условия из parser.parse_where
+    Переменная table: Таблица
+    '''
+    return _compile(where_clause, table)
+
+
+def _compile(expr: tuple, table: Table) -> Callable[[int], bool]:
+    kind = expr[0]
+    if kind in ('cmp', 'in'):
+        column, test = _leaf(expr, table.types)
+        values = table.columns[column]
+        return lambda pos: test(values[pos])
+
+    parts = [_compile(item, table) for item in expr[1]]
+    return functools.reduce(_both if kind == 'and' else _either, parts)
+
+
+def _both(left, right):
+    return lambda pos: left(pos) and right(pos)
+
+
+def _either(left, right):
+    return lambda pos: left(pos) or right(pos)
+
+
+def where_mask(where_clause: tuple, table: Table) -> bytes:
+    '''
+    Функция проверки условия сразу для всех записей таблицы.
+    Возвращает отметки подходящих записей (1 - подходит) по позициям.
+    Каждое сравнение проверяется одним проходом по массиву столбца,
+    а отметки частей AND/OR объединяются как двоичные числа.
+    Большая таблица делится на части, которые проверяются в пуле процессов
+    (parallel.py), и отметки частей склеиваются по порядку.
+    Удаленные записи не подходят.
+    
+    Переменная where_clause: Дерево условия
+    Переменная table: Таблица
+    '''
+    if not parallel.should_split(len(table)):
+        mask = _mask(where_clause, table)
+    else:
+        names = sorted(_where_columns(where_clause))
+        for name in names:
+            if name not in table.types:
+                raise KeyError(f'Столбец "{name}" не найден.')
+        bounds = parallel.partitions(len(table))
+        parts = [table.slice(start, stop, names) for start, stop in bounds]
+        mask = b''.join(
+            parallel.map_partitions(_mask, [where_clause] * len(parts), parts)
+        )
+
+    live = table.live_mask()
+    if live is None:
+        return mask
+    return (
+        int.from_bytes(mask, 'little') & int.from_bytes(live, 'little')
+    ).to_bytes(len(table), 'little')
+
+
+def _where_columns(expr: tuple) -> set:
+    '''
+    Функция для получения столбцов, которые проверяет условие
+    
+    Переменная expr: Дерево условия
+    '''
+    if expr[0] in ('cmp', 'in'):
+        return {expr[1]}
+    return set().union(*(_where_columns(item) for item in expr[1]))
+
+
+def select_columns(
+    columns: Optional[List[str]],
+    where_clause: Optional[tuple],
+    options: Optional[Dict[str, Any]] = None
+) -> Optional[List[str]]:
+    '''
+    Функция для получения столбцов, которые читает select: выбранные,
+    столбцы условия и сортировки. Для select * возвращает None (все).
+    
+    Переменная columns: Выбранные столбцы
+    Переменная where_clause: Дерево условия
+    Переменная options: order_by, desc, limit и offset
+    '''
+    if not columns:
+        return None
+    names = set(columns)
+    if where_clause:
+        names |= _where_columns(where_clause)
+    if options and options.get('order_by'):
+        names.add(options['order_by'])
+    return sorted(names)
+
+
+def _mask(expr: tuple, table: Table) -> bytes:
+    kind = expr[0]
+    if kind in ('cmp', 'in'):
+        column, test = _leaf(expr, table.types)
+        values = table.columns[column]
+        if table.types[column] == 'bool':
+            # В bytearray только 0 и 1: результат проверки для каждого байта
+            # подставляется через таблицу перекодировки
+            return values.translate(bytes(bool(test(b)) for b in range(256)))
+        return bytes(map(test, values))
+
+    combine = operator.and_ if kind == 'and' else operator.or_
+    masks = (int.from_bytes(_mask(item, table), 'little') for item in expr[1])
+    return functools.reduce(combine, masks).to_bytes(len(table), 'little')
+
+
+def normalize_where(where_clause: Optional[tuple], schema: List[Dict[str, str]]):
+    '''
+    Функция приведения условия к каноническому виду для ключа кэша:
+    значения приводятся к типам столбцов, части AND/OR упорядочиваются
+    
+    Переменная where_clause: Дерево условия
+    Переменная schema: Столбцы таблицы
+    '''
+    if not where_clause:
+        return None
+    return _normalize(where_clause, _column_types(schema))
+
+
+def _normalize(expr: tuple, types: Dict[str, str]) -> tuple:
+    kind = expr[0]
+    if kind == 'cmp':
+        _, column, op, raw = expr
+        return (kind, column, op, repr(_cast_literal(types, column, raw)))
+    if kind == 'in':
+        _, column, raws = expr
+        values = {repr(_cast_literal(types, column, raw)) for raw in raws}
+        return (kind, column, tuple(sorted(values)))
+    return (kind, tuple(sorted(_normalize(item, types) for item in expr[1])))
+
+
+def where_equalities(
+    where_clause: Optional[tuple], schema: List[Dict[str, str]]
+) -> Dict[str, List[Any]]:
+    '''
+    Функция для получения условий равенства (= и IN), объединенных через AND.
+    По ним записи можно выбрать через индекс.
+    
+    Переменная where_clause: Дерево условия
+    Переменная schema: Столбцы таблицы
+    '''
+    if not where_clause:
+        return {}
+
+    types = _column_types(schema)
+    terms = where_clause[1] if where_clause[0] == 'and' else [where_clause]
+    equalities: Dict[str, List[Any]] = {}
+    for term in terms:
+        if term[0] == 'cmp' and term[2] == '=':
+            values = [_cast_literal(types, term[1], term[3])]
+        elif term[0] == 'in':
+            values = [_cast_literal(types, term[1], raw) for raw in term[2]]
+        else:
+            continue
+        equalities.setdefault(term[1], values)
+    return equalities
+
+
+def where_ranges(
+    where_clause: Optional[tuple], schema: List[Dict[str, str]]
+) -> Dict[str, list]:
+    '''
+    Функция для получения границ значений столбцов из сравнений,
+    объединенных через AND: {столбец: [нижняя, включительно, верхняя, включительно]}
+    
+    Переменная where_clause: Дерево условия
+    Переменная schema: Столбцы таблицы
+    '''
+    if not where_clause:
+        return {}
+
+    types = _column_types(schema)
+    terms = where_clause[1] if where_clause[0] == 'and' else [where_clause]
+    ranges: Dict[str, list] = {}
+    for term in terms:
+        if term[0] != 'cmp' or term[2] == '!=':
+            continue
+        _, column, op, raw = term
+        value = _cast_literal(types, column, raw)
+        bounds = ranges.setdefault(column, [None, True, None, True])
+        if op in ('>', '>=', '='):
+            inclusive = op != '>'
+            if bounds[0] is None or value > bounds[0] or (
+                value == bounds[0] and not inclusive
+            ):
+                bounds[0], bounds[1] = value, inclusive
+        if op in ('<', '<=', '='):
+            inclusive = op != '<'
+            if bounds[2] is None or value < bounds[2] or (
+                value == bounds[2] and not inclusive
+            ):
+                bounds[2], bounds[3] = value, inclusive
+    return ranges
+
+
+def id_bounds(
+    where_clause: Optional[tuple], schema: List[Dict[str, str]]
+) -> Optional[Tuple[Any, Any]]:
+    '''
+    Функция для получения наименьшего и наибольшего ID из условия
+    (None - без границы). Возвращает None, если условие не ограничивает ID.
+    
+    Переменная where_clause: Дерево условия
+    Переменная schema: Столбцы таблицы
+    '''
+    try:
+        bounds = where_ranges(where_clause, schema).get('ID')
+    except ValueError:
+        # Ошибку в значении выведет сам запрос
+        return None
+    if bounds is None or (bounds[0] is None and bounds[2] is None):
+        return None
+    return bounds[0], bounds[2]
+
+
+def _other_terms(where_clause: Optional[tuple]) -> int:
+    '''
+    Функция подсчета условий, объединенных через AND, которые не учтены
+    в where_equalities и where_ranges (or, not, !=)
+    
+    Переменная where_clause: Дерево условия
+    '''
+    if not where_clause:
+        return 0
+    terms = where_clause[1] if where_clause[0] == 'and' else [where_clause]
+    return sum(
+        1 for term in terms
+        if not (term[0] == 'in' or (term[0] == 'cmp' and term[2] != '!='))
+    )
+
+
+def _plan(
+    table: Table,
+    where_clause: Optional[tuple],
+    indexes: Optional[Dict[str, Any]] = None,
+    order_by: Optional[str] = None,
+    desc: bool = False,
+    limit: Optional[int] = None
+) -> planner.Plan:
+    '''
+    Функция выбора способа доступа к записям (см. planner.choose)
+    
+    Переменная table: Таблица
+    Переменная where_clause: Условие where
+    Переменная indexes: Индексы таблицы
+    Переменная order_by: Столбец сортировки
+    Переменная desc: Сортировка по убыванию
+    Переменная limit: Сколько записей нужно (offset + limit)
+    '''
+    return planner.choose(
+        table,
+        indexes or {},
+        where_equalities(where_clause, table.schema),
+        where_ranges(where_clause, table.schema),
+        _other_terms(where_clause),
+        order_by, desc, limit
+    )
+
+
+def _scan(
+    table: Table,
+    where_clause: Optional[tuple],
+    indexes: Optional[Dict[str, Any]] = None,
+    order_by: Optional[str] = None,
+    desc: bool = False,
+    limit: Optional[int] = None
+) -> Tuple[Optional[Iterable[int]], Tuple[str, bool]]:
+    '''
+    Функция доступа к записям по самому дешевому плану: поиск по индексу,
+    перебор диапазона (ID или упорядоченного индекса) или полный перебор.
+    Возвращает позиции записей-кандидатов (условие еще нужно проверить)
+    и порядок, в котором они идут: (столбец, по убыванию).
+    Для полного перебора вместо позиций возвращается None.
+    
+    Переменная table: Таблица
+    Переменная where_clause: Условие where
+    Переменная indexes: Индексы таблицы
+    Переменная order_by: Столбец сортировки
+    Переменная desc: Сортировка по убыванию
+    Переменная limit: Сколько записей нужно (offset + limit)
+    '''
+    indexes = indexes or {}
+    plan = _plan(table, where_clause, indexes, order_by, desc, limit)
+    if plan.path == 'index':
+        positions = index.lookup(table, {plan.column: plan.values}, indexes)
+        return positions, plan.order
+    if plan.path in ('range', 'ordered'):
+        positions = index.scan_positions(
+            table, planner.sorted_index(indexes, plan.column), plan.bounds,
+            plan.order[1]
         )
+        return positions, plan.order
+    return None, plan.order
+
 
-    select_cacher(clear=True)
+def _matching(
+    table: Table,
+    where_clause: Optional[tuple],
+    positions: Optional[Iterable[int]],
+    match: Optional[Callable[[int], bool]] = None
+) -> Iterable[int]:
+    '''
+    Функция отбора позиций записей по условию.
+    При полном переборе условие проверяется сразу по столбцам (where_mask),
+    иначе - по каждой записи-кандидату. Проверенные записи учитываются
+    в счетчике rows_scanned.
+    
+    Переменная table: Таблица
+    Переменная where_clause: Условие where
+    Переменная positions: Позиции кандидатов (None - вся таблица)
+    Переменная match: Скомпилированное условие
+    '''
+    if positions is None:
+        registry.add('rows_scanned', len(table))
+        if not where_clause:
+            return table.live_positions()
+        return itertools.compress(range(len(table)), where_mask(where_clause, table))
+    positions = registry.counted('rows_scanned', positions)
+    if not where_clause:
+        return positions
+    match = match or compile_where(where_clause, table)
+    return filter(match, positions)
 
-    new_row = {}
-    for i, col_info in enumerate(schema[1:]):
-        val = cast_value(values[i], col_info['type'])
-        new_row[col_info['name']] = val
 
-    return new_row, 0
+def _filter(
+    table: Table,
+    where_clause: tuple,
+    indexes: Optional[Dict[str, Any]] = None
+) -> List[int]:
+    '''
+    Функция отбора позиций записей по условию where
+    
+    Переменная table: Таблица
+    Переменная where_clause: Условие where
+    Переменная indexes: Индексы таблицы
+    '''
+    positions, _ = _scan(table, where_clause, indexes)
+    return list(_matching(table, where_clause, positions))
+
+
+def _ordered(
+    table: Table,
+    positions: Iterable[int],
+    order: Tuple[str, bool],
+    wanted: Tuple[str, bool],
+    limit: Optional[int] = None
+) -> Iterable[int]:
+    '''
+    Функция сортировки позиций записей, если они идут не в нужном порядке.
+    При равных значениях записи упорядочиваются по ID.
+    
+    Переменная table: Таблица
+    Переменная positions: Позиции записей
+    Переменная order: Порядок, в котором идут записи
+    Переменная wanted: Нужный порядок (столбец, по убыванию)
+    Переменная limit: Сколько записей нужно
+    '''
+    if order == wanted:
+        return positions
+
+    column, desc = wanted
+    values, ids = table.columns[column], table.ids
+    def key(pos):
+        return (values[pos], ids[pos])
+
+    if limit is not None:
+        pick = heapq.nlargest if desc else heapq.nsmallest
+        return pick(limit, positions, key=key)
+    return sorted(positions, key=key, reverse=desc)
+
+
+def _select_rows(
+    table: Table,
+    where_clause: Optional[tuple],
+    match: Optional[Callable[[int], bool]],
+    indexes: Optional[Dict[str, Any]],
+    columns: Optional[List[str]],
+    options: Dict[str, Any]
+) -> Iterator[Dict[str, Any]]:
+    '''
+    Генератор записей select: доступ к записям, проверка условия, сортировка,
+    offset и limit. Записи вычисляются по мере чтения, перебор таблицы
+    начинается только при запросе первой записи, а словари создаются только
+    для выводимых записей.
+    
+    Переменная table: Таблица
+    Переменная where_clause: Условие where
+    Переменная match: Скомпилированное условие
+    Переменная indexes: Индексы таблицы
+    Переменная columns: Выбранные столбцы (None - все)
+    Переменная options: order_by, desc, limit и offset
+    '''
+    order_by, desc = options['order_by'], options['desc']
+    offset, limit = options['offset'], options['limit']
+    stop = None if limit is None else offset + limit
+    wanted = (order_by or 'ID', desc)
+
+    positions, order = _scan(table, where_clause, indexes, order_by, desc, stop)
+    if positions is None and match is not None and stop is not None and (
+        order == wanted
+    ):
+        # Перебор остановится на limit, не проходя всю таблицу
+        positions = filter(
+            match, registry.counted('rows_scanned', table.live_positions())
+        )
+    else:
+        positions = _matching(table, where_clause, positions, match)
+    positions = _ordered(table, positions, order, wanted, stop)
+    yield from table.rows(itertools.islice(positions, offset, stop), columns)
+
+
+def _caching(
+    rows: Iterator[Dict[str, Any]], key: Tuple[Any, ...]
+) -> Iterator[Dict[str, Any]]:
+    '''
+    Генератор, который передает записи дальше и сохраняет результат в кэш,
+    если он прочитан целиком и не длиннее CACHE_MAX_RESULT_ROWS записей
+    
+    Переменная rows: Записи результата
+    Переменная key: Ключ кэша
+    '''
+    buffer: Optional[List[Dict[str, Any]]] = []
+    for row in rows:
+        if buffer is not None:
+            buffer.append(row)
+            if len(buffer) > CACHE_MAX_RESULT_ROWS:
+                buffer = None
+        yield row
+    if buffer is not None:
+        select_cache.put(key, buffer)
+
+
+def _select_query(
+    table_data: Table,
+    where_clause: Optional[tuple],
+    table_name: Optional[str],
+    columns: Optional[List[str]],
+    options: Optional[Dict[str, Any]]
+) -> Tuple[Dict[str, Any], Tuple[Any, ...]]:
+    '''
+    Функция проверки параметров select.
+    Возвращает параметры с значениями по умолчанию и ключ кэша.
+    
+    Переменная table_data: Таблица
+    Переменная where_clause: условие для where
+    Переменная table_name: Название таблицы (ключ кэша)
+    Переменная columns: Выбранные столбцы (None - все)
+    Переменная options: order_by, desc, limit и offset
+    '''
+    options = {
+        'order_by': None, 'desc': False, 'limit': None, 'offset': 0,
+        **(options or {})
+    }
+    options['desc'] = bool(options['desc']) and options['order_by'] is not None
+
+    for name in (columns or []) + [options['order_by'] or 'ID']:
+        if name not in table_data.types:
+            raise KeyError(f'Столбец "{name}" не найден.')
+
+    predicate = (
+        normalize_where(where_clause, table_data.schema),
+        options['order_by'], options['desc'], options['limit'], options['offset']
+    )
+    key = select_cache.make_key(
+        table_name, predicate, tuple(columns) if columns else '*'
+    )
+    return options, key
 
 
 @handle_db_errors
-@log_time
 def select(
-    table_data: List[Dict[str, Any]],
-    where_clause: Optional[Dict[str, Any]] = None
-) -> List[Dict[str, Any]]:
+    table_data: Table,
+    where_clause: Optional[tuple] = None,
+    indexes: Optional[Dict[str, Any]] = None,
+    table_name: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    options: Optional[Dict[str, Any]] = None
+) -> Tuple[List[str], Iterator[Dict[str, Any]]]:
     '''
-    Функция реализации select
+    Функция реализации select.
+    Возвращает названия столбцов результата и итератор по записям.
+    Время select записывается в метрики, когда итератор прочитан
+    (без времени вывода записей).
     
-    Переменная table_data: Название таблицы
+    Переменная table_data: Таблица
     Переменная where_clause: условие для where
+    Переменная indexes: Индексы таблицы
+    Переменная table_name: Название таблицы (ключ кэша)
+    Переменная columns: Выбранные столбцы (None - все)
+    Переменная options: order_by, desc, limit и offset из
+    parser.parse_select_options
     '''
-    cache_key = str(where_clause) if where_clause else "ALL"
+    start = time.perf_counter()
+    options, key = _select_query(
+        table_data, where_clause, table_name, columns, options
+    )
+    # Условие компилируется сразу, чтобы ошибки в нем появились до вывода
+    match = compile_where(where_clause, table_data) if where_clause else None
+    field_names = columns or list(table_data.types)
 
-    def perform_select():
-        if not where_clause:
-            return table_data
+    cached = select_cache.get(key)
+    if cached is not None:
+        rows = iter(cached)
+    else:
+        rows = _caching(
+            _select_rows(table_data, where_clause, match, indexes, columns, options),
+            key
+        )
+    return field_names, registry.timed(
+        'select', rows, time.perf_counter() - start
+    )
+
+
+@handle_db_errors
+def plan_select(
+    table_data: Table,
+    where_clause: Optional[tuple] = None,
+    indexes: Optional[Dict[str, Any]] = None,
+    table_name: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    options: Optional[Dict[str, Any]] = None,
+    aggregate: bool = False,
+    group_by: Optional[str] = None
+) -> planner.Plan:
+    '''
+    Функция для получения плана select без выполнения (для explain):
+    тот же выбор, что делает select, включая готовый результат в кэше.
+    Оценка записей в плане - оценка числа записей результата.
+    Для агрегатов передается aggregate=True: оценка - число групп.
+    
+    Переменная table_data: Таблица
+    Переменная where_clause: условие для where
+    Переменная indexes: Индексы таблицы
+    Переменная table_name: Название таблицы (ключ кэша)
+    Переменная columns: Выбранные столбцы (None - все)
+    Переменная options: order_by, desc, limit и offset
+    Переменная aggregate: Запрос с агрегатами (не кэшируется)
+    Переменная group_by: Столбец группировки агрегатов
+    '''
+    options, key = _select_query(
+        table_data, where_clause, table_name, columns, options
+    )
+    if where_clause:
+        compile_where(where_clause, table_data)
+    plan = _plan(
+        table_data, where_clause, indexes, options['order_by'], options['desc'],
+        None if options['limit'] is None else options['offset'] + options['limit']
+    )
+    if aggregate:
+        plan.estimate = planner.estimate_groups(table_data, group_by, plan.estimate)
+        return plan
+    if options['limit'] is not None:
+        plan.estimate = min(
+            max(plan.estimate - options['offset'], 0), options['limit']
+        )
+    if key in select_cache:
+        cached = planner.Plan('cache', candidates=0, order=plan.order)
+        cached.estimate = plan.estimate
+        cached.alternatives = [plan]
+        return cached
+    return plan
+
+
+def _qualify(column: str, tables: Dict[str, Table]) -> str:
+    '''
+    Функция приведения названия столбца соединения к виду <таблица>.<столбец>.
+    Название без таблицы допускается, если столбец есть только в одной из них.
+    
+    Переменная column: Название столбца
+    Переменная tables: Таблицы соединения по названиям
+    '''
+    if '.' in column:
+        table_name, name = column.split('.', 1)
+        if table_name not in tables or name not in tables[table_name].types:
+            raise KeyError(f'Столбец "{column}" не найден.')
+        return column
+    owners = [name for name, table in tables.items() if column in table.types]
+    if not owners:
+        raise KeyError(f'Столбец "{column}" не найден.')
+    if len(owners) > 1:
+        raise ValueError(
+            f'Столбец "{column}" есть в обеих таблицах, '
+            f'укажите <таблица>.{column}'
+        )
+    return f"{owners[0]}.{column}"
 
-        result = []
-        for row in table_data:
-            match = True
-            for key, val in where_clause.items():
-                if str(row.get(key)) != str(val):
-                    match = False
-                    break
-            if match:
-                result.append(row)
-        return result
 
-    return select_cacher(key=cache_key, value_func=perform_select)
+def _rename_where(expr: tuple, rename: Callable[[str], str]) -> tuple:
+    '''
+    Функция замены названий столбцов в дереве условия
+    
+    Переменная expr: Дерево условия
+    Переменная rename: Новое название по старому
+    '''
+    kind = expr[0]
+    if kind == 'cmp':
+        return (kind, rename(expr[1]), expr[2], expr[3])
+    if kind == 'in':
+        return (kind, rename(expr[1]), expr[2])
+    return (kind, [_rename_where(item, rename) for item in expr[1]])
+
+
+def _split_join_where(
+    where_clause: Optional[tuple], names: List[str]
+) -> Tuple[List[Optional[tuple]], Optional[tuple]]:
+    '''
+    Функция разделения условия соединения (столбцы <таблица>.<столбец>):
+    части AND, которые проверяют столбцы одной таблицы, проверяются
+    до соединения при переборе этой таблицы (столбцы без названия таблицы),
+    остальные - у соединенных записей.
+    Возвращает условия сторон и условие соединенных записей.
+    
+    Переменная where_clause: Дерево условия
+    Переменная names: Названия левой и правой таблицы
+    '''
+    if not where_clause:
+        return [None, None], None
+    terms = where_clause[1] if where_clause[0] == 'and' else [where_clause]
+    pushed: List[List[tuple]] = [[], []]
+    rest = []
+    for term in terms:
+        owners = {column.split('.', 1)[0] for column in _where_columns(term)}
+        if len(owners) == 1:
+            side = names.index(owners.pop())
+            pushed[side].append(
+                _rename_where(term, lambda column: column.split('.', 1)[1])
+            )
+        else:
+            rest.append(term)
+
+    def combined(items):
+        if not items:
+            return None
+        return items[0] if len(items) == 1 else ('and', items)
+    return [combined(items) for items in pushed], combined(rest)
+
+
+def _compile_row(expr: tuple, types: Dict[str, str]) -> Callable[[dict], bool]:
+    '''
+    Функция компиляции условия в проверку записи-словаря
+    (для условий, которые проверяют столбцы обеих таблиц соединения)
+    
+    Переменная expr: Дерево условия
+    Переменная types: Типы столбцов
+    '''
+    kind = expr[0]
+    if kind in ('cmp', 'in'):
+        column, test = _leaf(expr, types)
+        return lambda row: test(row[column])
+
+    parts = [_compile_row(item, types) for item in expr[1]]
+    return functools.reduce(_both if kind == 'and' else _either, parts)
+
+
+def _side_positions(
+    table: Table, where_clause: Optional[tuple], indexes: Optional[Dict[str, Any]]
+) -> Iterable[int]:
+    '''
+    Функция перебора позиций записей стороны соединения, подходящих
+    под ее часть условия
+    
+    Переменная table: Таблица
+    Переменная where_clause: Условие стороны
+    Переменная indexes: Индексы таблицы
+    '''
+    positions, _ = _scan(table, where_clause, indexes)
+    return _matching(table, where_clause, positions)
+
+
+def _join_pairs(
+    sides: List[Tuple[str, Table, Dict[str, Any]]],
+    keys: List[str],
+    pushed: List[Optional[tuple]],
+    method: str,
+    side: int
+) -> Iterator[Tuple[int, int]]:
+    '''
+    Генератор пар позиций (левая, правая) соединенных записей.
+    hash - записи стороны side раскладываются в словарь по значению столбца
+    соединения, index - записи стороны side ищутся по индексу; другая
+    сторона перебирается один раз, и пары идут в ее порядке.
+    
+    Переменная sides: (название, таблица, индексы) левой и правой таблицы
+    Переменная keys: Столбцы соединения левой и правой таблицы
+    Переменная pushed: Условия сторон
+    Переменная method: Способ соединения из planner.choose_join
+    Переменная side: Сторона хеш-таблицы или индекса
+    '''
+    other = 1 - side
+    _, table, indexes = sides[side]
+    column = keys[side]
+    if method == 'hash':
+        values = table.columns[column]
+        buckets: Dict[Any, List[int]] = {}
+        for pos in _side_positions(table, pushed[side], indexes):
+            buckets.setdefault(values[pos], []).append(pos)
+        probe = buckets.get
+    else:
+        check = compile_where(pushed[side], table) if pushed[side] else None
+        is_bool = table.types[column] == 'bool'
+
+        def probe(value):
+            value = bool(value) if is_bool else value
+            positions = index.lookup(table, {column: [value]}, indexes)
+            return list(filter(check, positions)) if check else positions
+
+    _, streamed, streamed_indexes = sides[other]
+    values = streamed.columns[keys[other]]
+    for pos in _side_positions(streamed, pushed[other], streamed_indexes):
+        for matched in probe(values[pos]) or ():
+            yield (pos, matched) if other == 0 else (matched, pos)
+
+
+def _join_rows(
+    sides: List[Tuple[str, Table, Dict[str, Any]]],
+    pairs: Iterable[Tuple[int, int]]
+) -> Iterator[Dict[str, Any]]:
+    '''
+    Генератор соединенных записей со столбцами <таблица>.<столбец>
+    
+    Переменная sides: (название, таблица, индексы) левой и правой таблицы
+    Переменная pairs: Пары позиций (левая, правая)
+    '''
+    getters = [
+        [
+            (f"{name}.{col}", table.columns[col], table.types[col] == 'bool')
+            for col in table.names
+        ]
+        for name, table, _ in sides
+    ]
+    left, right = getters
+    for lpos, rpos in pairs:
+        row = {
+            name: bool(column[lpos]) if flag else column[lpos]
+            for name, column, flag in left
+        }
+        for name, column, flag in right:
+            row[name] = bool(column[rpos]) if flag else column[rpos]
+        yield row
+
 
 @handle_db_errors
+def join(
+    sides: List[Tuple[str, Table, Dict[str, Any]]],
+    on: Tuple[str, str],
+    where_clause: Optional[tuple] = None,
+    columns: Optional[List[str]] = None,
+    options: Optional[Dict[str, Any]] = None
+) -> Tuple[List[str], Iterator[Dict[str, Any]]]:
+    '''
+    Функция реализации select с соединением двух таблиц по равенству
+    столбцов (select from <t1> join <t2> on <t1>.<a> = <t2>.<b>).
+    Столбцы результата называются <таблица>.<столбец>. Части условия,
+    которые проверяют одну таблицу, проверяются до соединения, а способ
+    соединения (хеш-таблица на меньшей стороне или поиск по индексу
+    столбца соединения) выбирает planner.choose_join.
+    Возвращает названия столбцов результата и итератор по записям.
+    
+    Переменная sides: (название, таблица, индексы) таблиц после from и join
+    Переменная on: Столбцы условия соединения
+    Переменная where_clause: условие для where
+    Переменная columns: Выбранные столбцы (None - все)
+    Переменная options: order_by, desc, limit и offset
+    '''
+    start = time.perf_counter()
+    names = [name for name, _, _ in sides]
+    if names[0] == names[1]:
+        raise ValueError("Соединение таблицы с самой собой не поддерживается")
+    tables = {name: table for name, table, _ in sides}
+    types = {
+        f"{name}.{col}": col_type
+        for name, table, _ in sides for col, col_type in table.types.items()
+    }
+
+    qualified = sorted(
+        (_qualify(column, tables) for column in on),
+        key=lambda column: names.index(column.split('.', 1)[0])
+    )
+    if qualified[0].split('.', 1)[0] == qualified[1].split('.', 1)[0]:
+        raise ValueError("Условие on должно сравнивать столбцы двух таблиц")
+    if types[qualified[0]] != types[qualified[1]]:
+        raise ValueError(
+            f"Столбцы {qualified[0]} и {qualified[1]} разных типов: "
+            f"{types[qualified[0]]} и {types[qualified[1]]}"
+        )
+    keys = [column.split('.', 1)[1] for column in qualified]
+
+    options = {
+        'order_by': None, 'desc': False, 'limit': None, 'offset': 0,
+        **(options or {})
+    }
+    order_by = options['order_by'] and _qualify(options['order_by'], tables)
+    columns = [_qualify(column, tables) for column in columns or []]
+    if where_clause:
+        where_clause = _rename_where(
+            where_clause, lambda column: _qualify(column, tables)
+        )
+    pushed, rest = _split_join_where(where_clause, names)
+    # Условия компилируются сразу, чтобы ошибки в них появились до вывода
+    for (_, table, _), condition in zip(sides, pushed):
+        if condition:
+            compile_where(condition, table)
+    match = _compile_row(rest, types) if rest else None
+
+    access = [
+        _plan(table, condition, indexes)
+        for (_, table, indexes), condition in zip(sides, pushed)
+    ]
+    indexed = [
+        key == 'ID' or key in (indexes or {})
+        for key, (_, _, indexes) in zip(keys, sides)
+    ]
+    method, side = planner.choose_join(access, indexed)
+
+    rows = _join_rows(sides, _join_pairs(sides, keys, pushed, method, side))
+    if match is not None:
+        rows = filter(match, rows)
+    offset, limit = options['offset'], options['limit']
+    stop = None if limit is None else offset + limit
+    if order_by is not None:
+        def key(row):
+            return row[order_by]
+        if stop is not None:
+            pick = heapq.nlargest if options['desc'] else heapq.nsmallest
+            rows = iter(pick(stop, rows, key=key))
+        else:
+            rows = iter(sorted(rows, key=key, reverse=bool(options['desc'])))
+    rows = itertools.islice(rows, offset, stop)
+    if columns:
+        rows = ({column: row[column] for column in columns} for row in rows)
+    return columns or list(types), registry.timed(
+        'join', rows, time.perf_counter() - start
+    )
+
+
+# Типы столбцов, к которым применима агрегатная функция
+AGGREGATE_TYPES = {
+    'count': ALLOWED_TYPES,
+    'min': ALLOWED_TYPES,
+    'max': ALLOWED_TYPES,
+    'sum': {'int'},
+    'avg': {'int'},
+}
+
+
+def _selection(
+    table: Table,
+    where_clause: Optional[tuple],
+    indexes: Optional[Dict[str, Any]] = None
+) -> Tuple[int, Callable[[str], Iterable[Any]]]:
+    '''
+    Функция отбора записей для агрегатов без построения записей.
+    Возвращает количество подходящих записей и функцию, которая перебирает
+    значения столбца только у подходящих записей: при полном переборе -
+    по отметкам where_mask, при поиске по индексу - по позициям.
+    
+    Переменная table: Таблица
+    Переменная where_clause: Условие where
+    Переменная indexes: Индексы таблицы
+    '''
+    if not where_clause:
+        return table.live, table.live_values
+
+    positions, _ = _scan(table, where_clause, indexes)
+    if positions is None:
+        registry.add('rows_scanned', len(table))
+        mask = where_mask(where_clause, table)
+        return mask.count(1), lambda name: itertools.compress(
+            table.columns[name], mask
+        )
+
+    positions = list(_matching(table, where_clause, positions))
+    return len(positions), lambda name: map(
+        table.columns[name].__getitem__, positions
+    )
+
+
+def _fold(func: str, values: Iterable[Any], count: int) -> Any:
+    '''
+    Функция вычисления sum, min, max или avg по значениям столбца.
+    Для пустого набора возвращается None (как NULL в SQL).
+    
+    Переменная func: Агрегатная функция
+    Переменная values: Значения столбца подходящих записей
+    Переменная count: Количество подходящих записей
+    '''
+    if not count:
+        return None
+    if func == 'sum':
+        return sum(values)
+    if func == 'avg':
+        return sum(values) / count
+    return min(values) if func == 'min' else max(values)
+
+
+def _group(
+    keys: Iterable[Any],
+    items: List[Tuple[str, str]],
+    selected: Callable[[str], Iterable[Any]]
+) -> Dict[Any, List[Any]]:
+    '''
+    Функция вычисления агрегатов по группам за один проход по столбцам.
+    Возвращает для каждого значения группы количество записей
+    и состояние каждого агрегата (сумма, минимум или максимум).
+    
+    Переменная keys: Значения столбца группировки подходящих записей
+    Переменная items: Агрегаты sum, avg, min, max (функция, столбец)
+    Переменная selected: Перебор значений столбца подходящих записей
+    '''
+    folds = [
+        operator.add if func in ('sum', 'avg') else (min if func == 'min' else max)
+        for func, _ in items
+    ]
+    groups: Dict[Any, List[Any]] = {}
+    for key, *values in zip(keys, *(selected(column) for _, column in items)):
+        state = groups.get(key)
+        if state is None:
+            groups[key] = [1, *values]
+            continue
+        state[0] += 1
+        for i, fold in enumerate(folds, 1):
+            state[i] = fold(state[i], values[i - 1])
+    return groups
+
+
+@handle_db_errors
+@log_time
+def aggregate(
+    table_data: Table,
+    items: List[Tuple[str, str]],
+    where_clause: Optional[tuple] = None,
+    indexes: Optional[Dict[str, Any]] = None,
+    group_by: Optional[str] = None,
+    options: Optional[Dict[str, Any]] = None
+) -> Tuple[List[str], Iterator[Dict[str, Any]]]:
+    '''
+    Функция реализации select с агрегатами count, sum, min, max, avg
+    и group by. Значения читаются прямо из столбцов подходящих записей
+    за один проход, словари записей не создаются. Без where count(*)
+    берется из длины таблицы, а min/max столбца int - из диапазона,
+    который таблица поддерживает при вставке и удалении.
+    Возвращает названия столбцов результата и итератор по строкам
+    (по одной на группу, упорядоченным по значению группы).
+    
+    Переменная table_data: Таблица
+    Переменная items: Список выбора из parser.parse_select_items
+    Переменная where_clause: Условие where
+    Переменная indexes: Индексы таблицы
+    Переменная group_by: Столбец группировки
+    Переменная options: order_by, desc, limit и offset (order by - только
+    по столбцу группировки)
+    '''
+    types = table_data.types
+    options = {
+        'order_by': None, 'desc': False, 'limit': None, 'offset': 0,
+        **(options or {})
+    }
+    for func, column in items:
+        if column == '*':
+            continue
+        if column not in types:
+            raise KeyError(f'Столбец "{column}" не найден.')
+        if func == 'column':
+            if column != group_by:
+                raise ValueError(
+                    f'Столбец "{column}" должен быть в group by '
+                    f'или внутри агрегатной функции'
+                )
+        elif types[column] not in AGGREGATE_TYPES[func]:
+            raise ValueError(
+                f'{func} не применима к столбцу {column} ({types[column]})'
+            )
+    if group_by is not None and group_by not in types:
+        raise KeyError(f'Столбец "{group_by}" не найден.')
+    if options['order_by'] not in (None, group_by):
+        raise ValueError("Сортировка результата агрегатов - только по group by")
+
+    field_names = [
+        column if func == 'column' else f'{func}({column})' for func, column in items
+    ]
+    count, selected = _selection(table_data, where_clause, indexes)
+
+    def output(name: str, value: Any) -> Any:
+        return bool(value) if types.get(name) == 'bool' and value is not None else value
+
+    if group_by is None:
+        row = {}
+        for (func, column), field in zip(items, field_names):
+            if func == 'count':
+                value = count
+            elif func in ('min', 'max') and not where_clause and (
+                types[column] == 'int'
+            ):
+                bounds = table_data.column_range(column)
+                value = bounds and bounds[func == 'max']
+            else:
+                value = _fold(func, selected(column), count)
+            row[field] = output(column, value)
+        registry.add('rows_returned', 1)
+        return field_names, iter([row])
+
+    folded = [
+        (func, column) for func, column in items if func not in ('column', 'count')
+    ]
+    groups = _group(selected(group_by), folded, selected)
+
+    def rows() -> Iterator[Dict[str, Any]]:
+        keys = sorted(groups, reverse=options['desc'])
+        offset, limit = options['offset'], options['limit']
+        stop = None if limit is None else offset + limit
+        for key in itertools.islice(keys, offset, stop):
+            state = groups[key]
+            values = dict(zip(folded, state[1:]))
+            row = {}
+            for (func, column), field in zip(items, field_names):
+                if func == 'column':
+                    value = key
+                elif func == 'count':
+                    value = state[0]
+                elif func == 'avg':
+                    value = values[(func, column)] / state[0]
+                else:
+                    value = values[(func, column)]
+                row[field] = output(column, value)
+            registry.add('rows_returned', 1)
+            yield row
+
+    return field_names, rows()
+
+
+@handle_db_errors
+@log_time
 def update(
-    table_data: List[Dict[str, Any]],
+    table_data: Table,
     set_clause: Dict[str, Any],
-    where_clause: Dict[str, Any]
-) -> Tuple[List[Dict[str, Any]], List[int]]:
+    where_clause: tuple,
+    indexes: Optional[Dict[str, Any]] = None,
+    table_name: Optional[str] = None
+) -> Tuple[Table, List[int]]:
     '''
     Функция для реализации update
     
-    Переменная table_data: Данные таблицы
+    Переменная table_data: Таблица
     Переменная set_clause: Новое значение
     Переменная where_clause: Значение условия
+    Переменная indexes: Индексы таблицы
+    Переменная table_name: Название таблицы (для сброса кэша)
     '''
     if not where_clause:
         raise ValueError("Для обновления необходимо условие where")
+    if 'ID' in set_clause:
+        raise ValueError("Столбец ID нельзя изменить")
+    for column in set_clause:
+        if column not in table_data.types:
+            raise KeyError(f'Столбец "{column}" не найден.')
 
-    # Очищаем кэш при обновлении
-    select_cacher(clear=True)
+    positions = _filter(table_data, where_clause, indexes)
+
+    # Сбрасываем кэш таблицы при обновлении
+    select_cache.invalidate(table_name)
 
     updated_ids = []
-    
-    for row in table_data:
-        match = True
-        for key, val in where_clause.items():
-            if str(row.get(key)) != str(val):
-                match = False
-                break
-        if match:
-            row.update(set_clause)
-            updated_ids.append(row['ID'])
+    for pos in positions:
+        if indexes:
+            index.update_row(indexes, table_data.row(pos), set_clause)
+        table_data.update(pos, set_clause)
+        updated_ids.append(table_data.ids[pos])
     
     return table_data, updated_ids
 
 @handle_db_errors
 @confirm_action("удаление записи")
+@log_time
 def delete(
-    table_data: List[Dict[str, Any]],
-    where_clause: Dict[str, Any]
-) -> Tuple[List[Dict[str, Any]], List[int]]:
+    table_data: Table,
+    where_clause: tuple,
+    indexes: Optional[Dict[str, Any]] = None,
+    table_name: Optional[str] = None
+) -> Tuple[Table, List[int]]:
     '''
-    Функция для реализации delete
+    Функция для реализации delete. Записи только отмечаются удаленными
+    (Table.delete), поэтому время зависит от числа удаляемых записей.
     
-    Переменная table_data: значение в таблице
+    Переменная table_data: Таблица
     Переменная where_clause: значение условия
+    Переменная indexes: Индексы таблицы
+    Переменная table_name: Название таблицы (для сброса кэша)
     '''
     if not where_clause:
         raise ValueError("Для удаления необходимо условие where")
 
-    select_cacher(clear=True)
+    positions = _filter(table_data, where_clause, indexes)
+
+    select_cache.invalidate(table_name)
 
-    new_data = []
     deleted_ids = []
+    for pos in positions:
+        if indexes:
+            index.remove_row(indexes, table_data.row(pos))
+        deleted_ids.append(table_data.ids[pos])
 
-    for row in table_data:
-        match = True
-        for key, val in where_clause.items():
-            if str(row.get(key)) != str(val):
-                match = False
-                break
-        if match:
-            deleted_ids.append(row['ID'])
-        else:
-            new_data.append(row)
+    if deleted_ids:
+        table_data.delete(positions)
+    return table_data, deleted_ids
+
+
+@handle_db_errors
+def create_index(
+    metadata: Dict[str, Any], table_name: str, column: str, kind: str = 'hash'
+) -> Dict[str, Any]:
+    '''
+    Функция для создания индекса по столбцу
+    
+    Переменная metadata: Метаданные
+    Переменная table_name: Название таблицы
+    Переменная column: Название столбца
+    Переменная kind: Вид индекса: hash (поиск по равенству) или sorted
+    (диапазоны и order by)
+
+    Возвращает новые метаданные, переданные не изменяются: при ошибке
+    handle_db_errors возвращает их же, и по этому видно, что сохранять нечего
+    '''
+    if table_name not in metadata:
+        raise KeyError(f'Таблица "{table_name}" не существует.')
+    if kind not in index.INDEX_KINDS:
+        raise ValueError(
+            f"Неизвестный вид индекса '{kind}'. Доступны: {set(index.INDEX_KINDS)}"
+        )
+
+    table_meta = dict(metadata[table_name])
+    types = _column_types(table_meta['columns'])
+    if column not in types:
+        raise KeyError(f'Столбец "{column}" не найден в таблице "{table_name}".')
+    if column == 'ID':
+        raise ValueError("Поиск и сортировка по ID выполняются без отдельного индекса")
+    if kind == 'sorted' and types[column] not in ('int', 'str'):
+        raise ValueError("Упорядоченный индекс строится только по столбцам int и str")
+
+    hash_indexes = table_meta.get('indexes', [])
+    sorted_indexes = table_meta.get('sorted_indexes', [])
+    if column in hash_indexes or column in sorted_indexes:
+        raise ValueError(f'Индекс по столбцу "{column}" уже существует.')
+
+    key = 'sorted_indexes' if kind == 'sorted' else 'indexes'
+    table_meta['indexes'] = list(hash_indexes)
+    table_meta['sorted_indexes'] = list(sorted_indexes)
+    table_meta[key].append(column)
+    print(
+        f'Индекс ({kind}) по столбцу "{column}" таблицы "{table_name}" '
+        f'успешно создан.'
+    )
+    return {**metadata, table_name: table_meta}
+
+
+@handle_db_errors
+def drop_index(
+    metadata: Dict[str, Any], table_name: str, column: str
+) -> Dict[str, Any]:
+    '''
+    Функция для удаления индекса по столбцу
+    
+    Переменная metadata: Метаданные
+    Переменная table_name: Название таблицы
+    Переменная column: Название столбца
+    '''
+    if table_name not in metadata:
+        raise KeyError(f'Таблица "{table_name}" не существует.')
+
+    table_meta = dict(metadata[table_name])
+    for key in ('indexes', 'sorted_indexes'):
+        if column in table_meta.get(key, []):
+            table_meta[key] = [name for name in table_meta[key] if name != column]
+            break
+    else:
+        raise KeyError(f'Индекс по столбцу "{column}" не найден.')
 
-    return new_data, deleted_ids
\ No newline at end of file
+    print(f'Индекс по столбцу "{column}" таблицы "{table_name}" удален.')
+    return {**metadata, table_name: table_meta}
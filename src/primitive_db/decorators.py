@@ -3,14 +3,25 @@
 import functools
 import time
 
-import prompt
+from src.primitive_db.metrics import registry
 
+# Запрашивать подтверждение опасных операций (в пакетном режиме отключено)
+_confirmations = True
+
+def set_confirmations(enabled: bool) -> None:
+    '''
+    Функция включения и отключения запроса подтверждения
+    
+    Переменная enabled: Запрашивать подтверждение
+    '''
+    global _confirmations
+    _confirmations = enabled
 
 def handle_db_errors(func):
     '''
     Декоратор для перехвата ошибок БД (KeyError, ValueError, FileNotFoundError).
-    В случае ошибки выводит сообщение и возвращает первый аргумент
-    (обычно metadata или data).
+    В случае ошибки выводит сообщение, увеличивает счетчик errors
+    и возвращает первый аргумент (обычно metadata или data).
     '''
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
@@ -18,16 +29,14 @@ def handle_db_errors(func):
             return func(*args, **kwargs)
         except FileNotFoundError:
             print("Ошибка: Файл данных не найден. Возможно, таблица еще не создана.")
-            return args[0] if args else None
         except KeyError as e:
             print(f"Ошибка: Некорректный ключ или таблица не найдена: {e}")
-            return args[0] if args else None
         except ValueError as e:
             print(f"Ошибка валидации: {e}")
-            return args[0] if args else None
         except Exception as e:
             print(f"Произошла непредвиденная ошибка: {e}")
-            return args[0] if args else None
+        registry.add('errors')
+        return args[0] if args else None
     return wrapper
 
 def confirm_action(action_name: str):
@@ -37,11 +46,14 @@ def confirm_action(action_name: str):
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            if not _confirmations:
+                return func(*args, **kwargs)
             # Разбиваем длинную f-строку на две части
             msg = (
                 f'Вы уверены, что хотите выполнить "{action_name}"? '
                 f'[y/n]: '
             )
+            import prompt
             answer = prompt.string(msg)
             
             if answer.lower() == 'y':
@@ -54,14 +66,15 @@ def confirm_action(action_name: str):
 
 def log_time(func):
     '''
-    Декоратор для замера времени выполнения функции
+    Декоратор для замера времени выполнения функции.
+    Время записывается в реестр метрик (команда stats) и выводится,
+    только если включен вывод времени (stats timing on).
     '''
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.monotonic()
-        result = func(*args, **kwargs)
-        end_time = time.monotonic()
-        duration = end_time - start_time
-        print(f"Функция {func.__name__} выполнилась за {duration:.4f} секунд.")
-        return result
-    return wrapper
\ No newline at end of file
+        start_time = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            registry.observe(func.__name__, time.perf_counter() - start_time)
+    return wrapper
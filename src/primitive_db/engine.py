@@ -1,12 +1,40 @@
 # src/primitive_db/engine.py
 
-import shlex
+import contextlib
+import json
+import signal
+import sys
+import time
+from typing import Any, Callable, Iterable, List, Optional, Tuple, Union
 
-import prompt
-from prettytable import PrettyTable
-
-from src.primitive_db import core, parser, utils
-from src.primitive_db.constants import DB_META_PATH
+from src.primitive_db import (
+    core,
+    index,
+    journal,
+    output,
+    parallel,
+    parser,
+    planner,
+    transfer,
+)
+from src.primitive_db.catalog import Catalog
+from src.primitive_db.constants import (
+    PARALLEL_MIN_ROWS,
+    VACUUM_DEAD_FRACTION,
+    WRITE_BEHIND_INTERVAL,
+    WRITE_BEHIND_ROWS,
+)
+from src.primitive_db.decorators import set_confirmations
+from src.primitive_db.locks import lock_data_dir
+from src.primitive_db.metrics import registry
+from src.primitive_db.statements import (
+    Prepared,
+    Statement,
+    parse_execute,
+    parse_prepare,
+    statement_cache,
+)
+from src.primitive_db.table import Table
 
 
 def print_help():
@@ -17,220 +45,1060 @@ def print_help():
     print("Функции:")
     print(
         "<command> create_table <имя_таблицы> <столбец1:тип> .. "
-        "- создать таблицу"
+        "[storage=json|log|segments|binary] - создать таблицу"
     )
     print("<command> list_tables - показать список всех таблиц")
     print("<command> drop_table <имя_таблицы> - удалить таблицу")
 
     print("\n***Операции с данными***")
     print(
-        "<command> insert into <имя_таблицы> values (<значение1>, ..) "
-        "- создать запись"
+        "<command> insert into <имя_таблицы> values (<значение1>, ..) [, (..)] "
+        "- создать записи"
+    )
+    print(
+        "<command> select [<col1>, ..] from <имя_таблицы> [where <условие>] "
+        "[order by <col> [asc|desc]] [limit <n>] [offset <n>] - читать записи"
     )
     print(
-        "<command> select from <имя_таблицы> [where <col> = <val>] "
-        "- читать записи"
+        "<command> select count(*)|sum|min|max|avg(<col>), .. from <имя_таблицы> "
+        "[where <условие>] [group by <col>] - агрегаты"
+    )
+    print(
+        "<command> select [<t>.<col>, ..] from <t1> join <t2> "
+        "on <t1>.<col> = <t2>.<col> [where ..] [order by ..] [limit <n>] "
+        "- соединение таблиц"
     )
     print(
         "<command> update <имя_таблицы> set <col> = <val> "
-        "where <col> = <val> - обновить"
+        "where <условие> - обновить"
     )
     print(
-        "<command> delete from <имя_таблицы> where <col> = <val> "
-        "- удалить запись"
+        "<command> delete from <имя_таблицы> where <условие> "
+        "- удалить записи"
     )
+    print(
+        "  <условие>: <col> =|!=|<|<=|>|>= <val>, <col> in (<val>, ..), "
+        "and, or, скобки"
+    )
+    print(
+        "<command> import <имя_таблицы> from <файл.csv|.ndjson> "
+        "- загрузить записи из файла"
+    )
+    print("<command> export <имя_таблицы> to <файл.csv|.ndjson> - выгрузить записи")
     print("<command> info <имя_таблицы> - информация о таблице")
+    print("<command> compact <имя_таблицы> - сжать журнал таблицы")
+    print(
+        "<command> vacuum <имя_таблицы> - убрать удаленные записи "
+        "и сжать хранилище"
+    )
+    print(
+        "<command> convert <имя_таблицы> to <json|log|segments|binary> "
+        "- сменить формат хранения"
+    )
+    print(
+        "<command> analyze <имя_таблицы> - собрать статистику столбцов "
+        "для выбора плана"
+    )
+    print("<command> explain select ... - план запроса и время этапов")
+    print(
+        "<command> prepare <имя> as <select|insert|update|delete с ?> "
+        "- подготовить команду"
+    )
+    print(
+        "<command> execute <имя> (<значение1>, ..) - выполнить подготовленную "
+        "команду; deallocate <имя> - удалить"
+    )
+    print(
+        "<command> create_index <имя_таблицы> <столбец> [hash|sorted] "
+        "- создать индекс по столбцу"
+    )
+    print("<command> drop_index <имя_таблицы> <столбец> - удалить индекс")
+    print("<command> cache [clear] - статистика кэша select (или его очистка)")
+    print("<command> pager <n>|off - выводить select страницами по n записей")
+    print(
+        "<command> parallel <n>|off - проверять условие на больших таблицах "
+        "в n процессах"
+    )
+    print(
+        "<command> stats [reset|json [<файл>]|timing on|off] "
+        "- метрики операций (сброс, выгрузка в json, вывод времени)"
+    )
+    print(
+        "<command> checkpoint|flush - записать отложенные изменения "
+        "(пакетный режим, --write-behind)"
+    )
+    print("<command> begin - начать транзакцию")
+    print("<command> commit - зафиксировать транзакцию")
+    print("<command> rollback - отменить транзакцию")
 
     print("\nОбщие команды:")
     print("<command> exit - выход из программы")
     print("<command> help - справочная информация\n")
 
-def run():
+def report_error(message: str) -> None:
     '''
-    Главная функция
+    Функция вывода сообщения об ошибке команды с увеличением счетчика errors
+    (по нему однократный режим определяет код выхода)
+    
+    Переменная message: Сообщение
+    '''
+    registry.add('errors')
+    print(message)
+
+def ask_next_page(page: int) -> bool:
+    '''
+    Функция запроса следующей страницы вывода
+    
+    Переменная page: Номер выведенной страницы
+    '''
+    import prompt
+    answer = prompt.string('--Enter - следующая страница, q - выход--', empty=True)
+    return not (answer and answer.strip().lower() == 'q')
+
+def read_table(
+    catalog: Catalog,
+    table_name: str,
+    where_clause,
+    columns: Optional[List[str]] = None
+) -> Tuple[Table, dict]:
+    '''
+    Функция для получения таблицы и ее индексов для select.
+    Если таблица еще не загружена, а хранилище может пропустить часть
+    файла (сегменты вне диапазона ID, записи и поля двоичного формата),
+    читается только нужная часть (без индексов).
+    
+    Переменная catalog: Кэш сессии
+    Переменная table_name: Название таблицы
+    Переменная where_clause: Дерево условия
+    Переменная columns: Столбцы, которые читает запрос (None - все)
+    '''
+    schema = catalog.metadata()[table_name]['columns']
+    part = catalog.table_part(
+        table_name, core.id_bounds(where_clause, schema), columns
+    )
+    if part is not None:
+        return part, {}
+    return catalog.table(table_name), catalog.indexes(table_name)
+
+def explain_query(
+    plan, run: Callable[[], Any], indexes: dict, loaded: float, stats
+) -> None:
+    '''
+    Функция explain: запрос выполняется, результат форматируется, но
+    не выводится, а вместо него выводятся план и время этапов
+    (load - чтение таблицы, filter - отбор записей, render - форматирование)
+    
+    Переменная plan: План запроса (core.plan_select)
+    Переменная run: Функция выполнения запроса
+    Переменная indexes: Индексы таблицы
+    Переменная loaded: Время чтения таблицы в секундах
+    Переменная stats: Статистика analyze из метаданных
+    '''
+    if not isinstance(plan, planner.Plan):
+        return
+    scanned = registry.counters.get('rows_scanned', 0)
+    start = time.perf_counter()
+    result = run()
+    if not isinstance(result, tuple):
+        return
+    field_names, rows = result
+    rows = list(rows)
+    filtered = time.perf_counter() - start
+    scanned = registry.counters.get('rows_scanned', 0) - scanned
+
+    start = time.perf_counter()
+    output.render_rows(field_names, rows)
+    timings = {
+        'load': loaded, 'filter': filtered, 'render': time.perf_counter() - start
+    }
+    output.print_explain(plan, indexes, len(rows), scanned, timings, stats)
+
+class Session:
+    '''
+    Состояние сеанса работы с базой: кэш сессии и настройки вывода
     '''
-    print_help()
 
-    while True:
-        metadata = utils.load_metadata(DB_META_PATH)
+    def __init__(self, catalog: Catalog, interactive: bool = True):
+        '''
+        Переменная catalog: Кэш сессии
+        Переменная interactive: Команды вводит пользователь (в пакетном режиме
+        вывод не останавливается между страницами)
+        '''
+        self.catalog = catalog
+        self.interactive = interactive
+        self.page_size = None
+        # Формат вывода записей select для других программ (jsonl, tsv, table)
+        # и поток для него; None - вывод страницами, как в интерактивном режиме
+        self.output_format = None
+        self.output_stream = sys.stdout
+        # Подготовленные команды (prepare) по имени
+        self.prepared = {}
+
+def print_result(
+    session: Session, field_names: List[str], rows, ask_next=None
+) -> None:
+    '''
+    Функция вывода результата select в формате сеанса
+    
+    Переменная session: Сеанс
+    Переменная field_names: Названия столбцов
+    Переменная rows: Записи (итератор)
+    Переменная ask_next: Запрос следующей страницы
+    '''
+    if session.output_format is None:
+        output.print_rows(field_names, rows, session.page_size, ask_next)
+    else:
+        output.print_records(
+            field_names, rows, session.output_format, session.output_stream
+        )
+
+def run_join(session: Session, statement: Statement) -> None:
+    '''
+    Функция select с join: обе таблицы читаются из кэша сессии вместе
+    с индексами, записи соединяются в core.join и выводятся в формате
+    сеанса со столбцами <таблица>.<столбец>
+
+    Переменная session: Сеанс работы
+    Переменная statement: Разобранная команда select
+    '''
+    catalog = session.catalog
+    metadata = catalog.metadata()
+    right_name, left_col, right_col = statement.join
+    if right_name not in metadata:
+        report_error(f"Ошибка: Метаданные для таблицы {right_name} не найдены.")
+        return
+    if statement.explain or statement.aggregate:
+        report_error("Ошибка: explain и агрегаты с join не поддерживаются.")
+        return
+
+    sides = [
+        (name, catalog.table(name), catalog.indexes(name))
+        for name in (statement.table, right_name)
+    ]
+    result = core.join(
+        sides, (left_col, right_col), statement.where, statement.columns,
+        dict(statement.options)
+    )
+    if not isinstance(result, tuple):
+        return
+    ask_next = ask_next_page if session.interactive else None
+    print_result(session, *result, ask_next)
+
+def resolve(session: Session, raw_input: str) -> Optional[Statement]:
+    '''
+    Функция получения разобранной команды из кэша разбора.
+    Для execute <имя> (..) возвращает подготовленную команду
+    с подставленными значениями параметров (None - ошибка выведена).
+    
+    Переменная session: Сеанс работы
+    Переменная raw_input: Текст команды
+    '''
+    statement = statement_cache.parse(raw_input)
+    if statement.command != 'execute':
+        return statement
+
+    name, values = parse_execute(statement)
+    prepared = session.prepared.get(name)
+    if prepared is None:
+        report_error(f"Ошибка: Подготовленная команда {name} не найдена.")
+        return None
+    metadata = session.catalog.metadata()
+    table_name = prepared.statement.table
+    if table_name not in metadata:
+        report_error(f"Ошибка: Метаданные для таблицы {table_name} не найдены.")
+        return None
+    schema = metadata[table_name]['columns']
+    if schema != prepared.schema:
+        # Схема изменилась после prepare: типы параметров находятся заново
+        prepared = session.prepared[name] = Prepared(prepared.statement, schema)
+    try:
+        return prepared.bind(values)
+    except ValueError as e:
+        report_error(f"Ошибка: {e}")
+        return None
+
+def execute(session: Session, raw_input: Union[str, Statement]) -> bool:
+    '''
+    Функция выполнения одной команды.
+    Возвращает False, если введена команда exit.
+    
+    Переменная session: Сеанс работы
+    Переменная raw_input: Текст команды или разобранная команда (resolve)
+    '''
+    catalog = session.catalog
+    metadata = catalog.metadata()
+
+    statement = raw_input
+    if not isinstance(statement, Statement):
+        statement = resolve(session, raw_input)
+        if statement is None:
+            return True
+    args = statement.args
+    command = statement.command
+    explain = statement.explain
+
+    if command == 'explain':
+        report_error("Ошибка: explain поддерживает только select.")
+        return True
+
+    if command == 'exit':
+        return False
+    
+    elif command == 'help':
+        print_help()
+    
+    elif command == 'create_table':
+        if len(args) < 2:
+            report_error("Ошибка: Укажите имя таблицы.")
+        else:
+            table_name = args[1]
+            columns = args[2:]
+            new_metadata = core.create_table(metadata, table_name, columns)
+            if new_metadata is not None:
+                catalog.save_metadata(new_metadata)
+
+    elif command == 'drop_table':
+        if len(args) < 2:
+            report_error("Ошибка: Укажите имя таблицы.")
+        else:
+            table_name = args[1]
+            storage = catalog.storage(table_name)
+            existed = table_name in metadata
+            table_meta = metadata.get(table_name, {})
+            indexed = table_meta.get('indexes', []) + table_meta.get(
+                'sorted_indexes', []
+            )
+            new_metadata = core.drop_table(metadata, table_name)
+            if new_metadata is not None:
+                catalog.save_metadata(new_metadata)
+                if existed and table_name not in new_metadata:
+                    catalog.drop_table(table_name, storage, indexed)
+    
+    elif command == 'list_tables':
+        core.list_tables(metadata)
         
-        try:
-            raw_input = prompt.string('>>>Введите команду: ')
-            if not raw_input or not raw_input.strip():
-                continue
+    elif command == 'insert':
+        if len(args) < 3:
+            report_error("Ошибка: Неверный формат команды insert.")
+            return True
             
-            args = shlex.split(raw_input)
-            command = args[0].lower()
+        table_name = statement.table
+        rows = statement.rows
+        
+        table_data = catalog.table(table_name)
+        indexes = catalog.indexes(table_name)
+        
+        result = core.insert(metadata, table_name, rows, table_data)
+        
+        if not isinstance(result, tuple):
+            return True
+        
+        new_rows, ids = result
+        # Последовательность сохраняется до записи данных, чтобы
+        # после сбоя выданные ID не были выданы повторно
+        catalog.save_metadata(metadata)
+        
+        table_data.extend(new_rows)
+        index.add_rows(indexes, new_rows)
+        catalog.save_table(
+            table_name, table_data,
+            [('insert', new_row) for new_row in new_rows]
+        )
+        if len(ids) == 1:
+            print(
+                f'Запись с ID={ids[0]} успешно добавлена '
+                f'в таблицу "{table_name}".'
+            )
+        else:
+            print(
+                f'Записи с ID={ids[0]}..{ids[-1]} ({len(ids)} шт.) '
+                f'успешно добавлены в таблицу "{table_name}".'
+            )
 
-            if command == 'exit':
-                break
-            
-            elif command == 'help':
-                print_help()
+    elif command == 'select':
+        if statement.table is None:
+            report_error("Ошибка: Укажите таблицу (select from <table>).")
+            return True
+        
+        table_name = statement.table
+        if table_name not in metadata:
+            report_error(f"Ошибка: Метаданные для таблицы {table_name} не найдены.")
+            return True
+
+        if statement.join is not None:
+            run_join(session, statement)
+            return True
+
+        items = statement.items
+        group_by = statement.group_by
+        where_clause = statement.where
+        start = time.perf_counter()
+        if statement.aggregate:
+            table_data, indexes = read_table(catalog, table_name, where_clause)
+            def run_aggregate():
+                return core.aggregate(
+                    table_data, items, where_clause, indexes, group_by,
+                    dict(statement.options)
+                )
+            if explain:
+                explain_query(
+                    core.plan_select(
+                        table_data, where_clause, indexes, table_name,
+                        aggregate=True, group_by=group_by
+                    ),
+                    run_aggregate, indexes, time.perf_counter() - start,
+                    metadata[table_name].get('stats')
+                )
+                return True
+            result = run_aggregate()
+            if isinstance(result, tuple):
+                print_result(session, *result)
+            return True
+
+        field_names = [
+            col['name'] for col in metadata[table_name]['columns']
+        ]
+        columns = statement.columns
+        options = dict(statement.options)
+        unknown = [name for name in columns if name not in field_names]
+        if unknown:
+            report_error(f"Ошибка: Столбцы не найдены: {', '.join(unknown)}")
+            return True
+
+        table_data, indexes = read_table(
+            catalog, table_name, where_clause,
+            core.select_columns(columns, where_clause, options)
+        )
+        if explain:
+            explain_query(
+                core.plan_select(
+                    table_data, where_clause, indexes, table_name, columns, options
+                ),
+                lambda: core.select(
+                    table_data, where_clause, indexes, table_name, columns, options
+                ),
+                indexes, time.perf_counter() - start,
+                metadata[table_name].get('stats')
+            )
+            return True
+        
+        result = core.select(
+            table_data, where_clause, indexes, table_name, columns, options
+        )
+        
+        if not isinstance(result, tuple):
+            return True
+
+        field_names, rows = result
+        ask_next = ask_next_page if session.interactive else None
+        print_result(session, field_names, rows, ask_next)
+
+    elif command == 'update':
+        if len(args) < 6:
+            report_error("Ошибка: Неверный формат update.")
+            return True
+
+        table_name = statement.table
+        table_data = catalog.table(table_name)
+        
+        set_col, raw_val = statement.assignment
+        
+        target_type = 'str' 
+        if table_name in metadata:
+            for col in metadata[table_name]['columns']:
+                if col['name'] == set_col:
+                    target_type = col['type']
+                    break
+        
+        set_val = core.cast_value(raw_val, target_type)
+        where_clause = statement.where
+        indexes = catalog.indexes(table_name)
+        
+        result = core.update(
+            table_data, {set_col: set_val}, where_clause, indexes, table_name
+        )
+        
+        if not isinstance(result, tuple):
+            return True
+
+        new_data, updated_ids = result
+        changes = [
+            ('update', row_id, {set_col: set_val}) for row_id in updated_ids
+        ]
+        if changes:
+            catalog.save_table(table_name, new_data, changes)
+        
+        if len(updated_ids) == 1:
+            print(
+                f'Запись с ID={updated_ids[0]} в таблице '
+                f'"{table_name}" успешно обновлена.'
+            )
+        elif updated_ids:
+            print(
+                f'Записи с ID={", ".join(map(str, updated_ids))} '
+                f'в таблице "{table_name}" успешно обновлены.'
+            )
+        else:
+            print("Ни одной записи не было обновлено.")
+
+    elif command == 'delete':
+        if len(args) < 3:
+            report_error("Ошибка: Укажите таблицу.")
+            return True
+
+        table_name = statement.table
+        table_data = catalog.table(table_name)
+        where_clause = statement.where
+        indexes = catalog.indexes(table_name)
+        
+        result = core.delete(table_data, where_clause, indexes, table_name)
+
+        if not isinstance(result, tuple):
+            return True
+
+        new_data, deleted_ids = result
+        changes = [('delete', row_id) for row_id in deleted_ids]
+        if changes:
+            catalog.save_table(table_name, new_data, changes)
+            # Вместе со столбцами сжимается и хранилище (в транзакции -
+            # при commit, в отложенном режиме - при записи изменений)
+            if new_data.dead_fraction() >= VACUUM_DEAD_FRACTION:
+                catalog.vacuum_table(table_name)
+        
+        if len(deleted_ids) == 1:
+            print(
+                f'Запись с ID={deleted_ids[0]} успешно удалена '
+                f'из таблицы "{table_name}".'
+            )
+        elif deleted_ids:
+            print(
+                f'Записи с ID={", ".join(map(str, deleted_ids))} '
+                f'успешно удалены из таблицы "{table_name}".'
+            )
+        else:
+            print("Записи для удаления не найдены.")
+
+    elif command == 'prepare':
+        try:
+            name, prepared = parse_prepare(statement.text)
+            if prepared.table not in metadata:
+                raise KeyError(
+                    f"Метаданные для таблицы {prepared.table} не найдены."
+                )
+            prepared = Prepared(prepared, metadata[prepared.table]['columns'])
+        except (KeyError, ValueError) as e:
+            report_error(f"Ошибка: {e.args[0]}")
+            return True
+        session.prepared[name] = prepared
+        print(
+            f'Команда "{name}" подготовлена '
+            f'(параметров: {len(prepared.parameters)}).'
+        )
+
+    elif command == 'deallocate':
+        if len(args) < 2:
+            report_error("Ошибка: Укажите имя подготовленной команды.")
+        elif session.prepared.pop(args[1], None) is None:
+            report_error(f"Ошибка: Подготовленная команда {args[1]} не найдена.")
+        else:
+            print(f'Подготовленная команда "{args[1]}" удалена.')
+
+    elif command == 'import':
+        if len(args) != 4 or args[2].lower() != 'from':
+            report_error("Ошибка: Используйте import <таблица> from <файл>.")
+            return True
+
+        table_name, filepath = args[1], args[3]
+        result = transfer.import_file(catalog, metadata, table_name, filepath)
+        if not isinstance(result, tuple):
+            return True
+
+        count, duration = result
+        rate = count / duration if duration else count
+        print(
+            f'Загружено {count} записей в таблицу "{table_name}" '
+            f'за {duration:.2f} с ({rate:.0f} записей/с).'
+        )
+
+    elif command == 'export':
+        if len(args) != 4 or args[2].lower() != 'to':
+            report_error("Ошибка: Используйте export <таблица> to <файл>.")
+            return True
+
+        table_name, filepath = args[1], args[3]
+        if table_name not in metadata:
+            report_error(f"Ошибка: Метаданные для таблицы {table_name} не найдены.")
+            return True
+
+        result = transfer.export_file(catalog.table(table_name), filepath)
+        if not isinstance(result, tuple):
+            return True
+
+        count, duration = result
+        print(
+            f'Выгружено {count} записей таблицы "{table_name}" '
+            f'в {filepath} за {duration:.2f} с.'
+        )
+
+    elif command == 'info':
+        if len(args) < 2:
+            report_error("Ошибка: Укажите имя таблицы.")
+            return True
+        
+        table_name = args[1]
+        if table_name in metadata:
+            storage = catalog.storage(table_name)
+            table_data = catalog.table(table_name)
+            schema = metadata[table_name]['columns']
             
-            elif command == 'create_table':
-                if len(args) < 2:
-                    print("Ошибка: Укажите имя таблицы.")
-                else:
-                    table_name = args[1]
-                    columns = args[2:]
-                    new_metadata = core.create_table(metadata, table_name, columns)
-                    if new_metadata is not None:
-                        utils.save_metadata(DB_META_PATH, new_metadata)
-
-            elif command == 'drop_table':
-                if len(args) < 2:
-                    print("Ошибка: Укажите имя таблицы.")
-                else:
-                    table_name = args[1]
-                    new_metadata = core.drop_table(metadata, table_name)
-                    if new_metadata is not None:
-                        utils.save_metadata(DB_META_PATH, new_metadata)
+            col_str_list = [f"{col['name']}:{col['type']}" for col in schema]
+            col_output = ", ".join(col_str_list)
             
-            elif command == 'list_tables':
-                core.list_tables(metadata)
-                
-            elif command == 'insert':
-                if len(args) < 3:
-                    print("Ошибка: Неверный формат команды insert.")
-                    continue
-                    
-                table_name = args[2]
-                vals = parser.parse_insert_values(raw_input)
-                
-                table_data = utils.load_table_data(table_name)
-                
-                result = core.insert(metadata, table_name, vals)
-                
-                if not isinstance(result, tuple):
-                    continue
-                
-                new_row, _ = result
-                
-                if table_data:
-                    new_id = max(row['ID'] for row in table_data) + 1
-                else:
-                    new_id = 1
-                
-                new_row['ID'] = new_id
-                
-                table_data.append(new_row)
-                utils.save_table_data(table_name, table_data)
+            print(f"Таблица: {table_name}")
+            print(f"Столбцы: {col_output}")
+            print(f"Количество записей: {table_data.live}")
+            print(
+                f"Удаленных записей в памяти: {table_data.dead} "
+                f"(доля {table_data.dead_fraction():.1%})"
+            )
+            reclaimable = catalog.reclaimable(table_name)
+            print(
+                "Место для сжатия в файлах: "
+                f"{output.format_reclaimable(storage, reclaimable)}"
+            )
+            sequence = metadata[table_name].get('sequence')
+            if sequence is None:
+                sequence = max(table_data.ids, default=0)
+            print(f"Последний выданный ID: {sequence}")
+            print(f"Формат хранения: {storage}")
+            stats = metadata[table_name].get('stats')
+            print(
+                f"Статистика: собрана для {stats['rows']} записей" if stats
+                else "Статистика: не собрана (analyze)"
+            )
+            indexed = [
+                f"{column} (hash)"
+                for column in metadata[table_name].get('indexes', [])
+            ] + [
+                f"{column} (sorted)"
+                for column in metadata[table_name].get('sorted_indexes', [])
+            ]
+            print(f"Индексы: {', '.join(indexed) if indexed else 'нет'}")
+        else:
+            print(f"Таблица {table_name} не найдена.")
+
+    elif command == 'analyze':
+        if len(args) < 2:
+            report_error("Ошибка: Укажите имя таблицы.")
+            return True
+
+        table_name = args[1]
+        if table_name not in metadata:
+            print(f"Таблица {table_name} не найдена.")
+            return True
+
+        table_data = catalog.table(table_name)
+        stats = planner.analyze(table_data)
+        metadata[table_name]['stats'] = stats
+        catalog.save_metadata(metadata)
+        table_data.stats = stats
+        output.print_analyze(table_name, stats)
+
+    elif command == 'compact':
+        if len(args) < 2:
+            report_error("Ошибка: Укажите имя таблицы.")
+            return True
+
+        table_name = args[1]
+        if table_name not in metadata:
+            print(f"Таблица {table_name} не найдена.")
+            return True
+        if catalog.in_transaction:
+            report_error("Ошибка: Сжатие недоступно внутри транзакции.")
+            return True
+
+        if catalog.compact_table(table_name):
+            rows = catalog.table(table_name).live
+            if catalog.storage(table_name) == 'segments':
+                print(f'Сегменты таблицы "{table_name}" переписаны ({rows} записей).')
+            elif catalog.storage(table_name) == 'binary':
                 print(
-                    f'Запись с ID={new_id} успешно добавлена '
-                    f'в таблицу "{table_name}".'
+                    f'Файл и куча строк таблицы "{table_name}" переписаны '
+                    f'({rows} записей).'
                 )
+            else:
+                print(f'Журнал таблицы "{table_name}" сжат до {rows} записей.')
+        else:
+            print(
+                f'Таблица "{table_name}" не требует сжатия '
+                f'({catalog.storage(table_name)}).'
+            )
 
-            elif command == 'select':
-                if len(args) < 3:
-                    print("Ошибка: Укажите таблицу (select from <table>).")
-                    continue
-                
-                table_name = args[2]
-                table_data = utils.load_table_data(table_name)
-                where_clause = parser.parse_where(args)
-                
-                results = core.select(table_data, where_clause)
-                
-                if results is None:
-                    continue
+    elif command == 'vacuum':
+        if len(args) < 2:
+            report_error("Ошибка: Укажите имя таблицы.")
+            return True
 
-                if table_name in metadata:
-                    pt = PrettyTable()
-                    field_names = [col['name'] for col in metadata[table_name]]
-                    pt.field_names = field_names
-                    
-                    for row in results:
-                        pt.add_row([row.get(name) for name in field_names])
-                    print(pt)
-                else:
-                    print(f"Ошибка: Метаданные для таблицы {table_name} не найдены.")
-
-            elif command == 'update':
-                if len(args) < 6:
-                    print("Ошибка: Неверный формат update.")
-                    continue
+        table_name = args[1]
+        if table_name not in metadata:
+            print(f"Таблица {table_name} не найдена.")
+            return True
 
-                table_name = args[1]
-                table_data = utils.load_table_data(table_name)
-                
-                set_col = args[3]
-                raw_val = args[5]
-                
-                target_type = 'str' 
-                if table_name in metadata:
-                    for col in metadata[table_name]:
-                        if col['name'] == set_col:
-                            target_type = col['type']
-                            break
-                
-                set_val = core.cast_value(raw_val, target_type)
-                where_clause = parser.parse_where(args)
-                
-                result = core.update(table_data, {set_col: set_val}, where_clause)
-                
-                if not isinstance(result, tuple):
-                    continue
+        storage = catalog.storage(table_name)
+        reclaimable = catalog.reclaimable(table_name)
+        removed = catalog.vacuum_table(table_name)
+        rows = catalog.table(table_name).live
+        print(
+            f'Из таблицы "{table_name}" убрано удаленных записей: {removed} '
+            f'(осталось {rows}).'
+        )
+        if reclaimable is None:
+            print(
+                f'Файл {storage} не содержит удаленных записей: '
+                'освобождать на диске нечего.'
+            )
+        elif catalog.deferred:
+            print('Хранилище таблицы будет сжато при записи изменений.')
+        else:
+            print(
+                'Хранилище сжато, освобождено: '
+                f'{output.format_reclaimable(storage, reclaimable)}.'
+            )
 
-                new_data, updated_ids = result
-                utils.save_table_data(table_name, new_data)
-                
-                if updated_ids:
-                    print(
-                        f'Запись с ID={updated_ids[0]} в таблице '
-                        f'"{table_name}" успешно обновлена.'
-                    )
-                else:
-                    print("Ни одной записи не было обновлено.")
-
-            elif command == 'delete':
-                if len(args) < 3:
-                    print("Ошибка: Укажите таблицу.")
-                    continue
+    elif command == 'convert':
+        if len(args) < 4 or args[2].lower() != 'to':
+            report_error(
+                "Ошибка: Используйте convert <имя_таблицы> to <формат хранения>."
+            )
+            return True
 
-                table_name = args[2]
-                table_data = utils.load_table_data(table_name)
-                where_clause = parser.parse_where(args)
-                
-                result = core.delete(table_data, where_clause)
+        table_name, storage = args[1], args[3].lower()
+        if table_name not in metadata:
+            print(f"Таблица {table_name} не найдена.")
+            return True
+        if catalog.in_transaction:
+            report_error("Ошибка: Смена формата недоступна внутри транзакции.")
+            return True
 
-                if not isinstance(result, tuple):
-                    continue
+        try:
+            converted = catalog.convert_table(table_name, storage)
+        except ValueError as e:
+            report_error(f"Ошибка: {e}")
+            return True
+        if converted:
+            print(f'Таблица "{table_name}" переведена в формат {storage}.')
+        else:
+            print(f'Таблица "{table_name}" уже хранится в формате {storage}.')
 
-                new_data, deleted_ids = result
-                utils.save_table_data(table_name, new_data)
-                
-                if deleted_ids:
-                    print(
-                        f'Запись с ID={deleted_ids[0]} успешно удалена '
-                        f'из таблицы "{table_name}".'
-                    )
-                else:
-                    print("Записи для удаления не найдены.")
-
-            elif command == 'info':
-                if len(args) < 2:
-                    print("Ошибка: Укажите имя таблицы.")
-                    continue
-                
-                table_name = args[1]
-                if table_name in metadata:
-                    table_data = utils.load_table_data(table_name)
-                    schema = metadata[table_name]
-                    
-                    col_str_list = [f"{col['name']}:{col['type']}" for col in schema]
-                    col_output = ", ".join(col_str_list)
-                    
-                    print(f"Таблица: {table_name}")
-                    print(f"Столбцы: {col_output}")
-                    print(f"Количество записей: {len(table_data)}")
-                else:
-                    print(f"Таблица {table_name} не найдена.")
+    elif command in ('create_index', 'drop_index'):
+        if len(args) < 3:
+            report_error("Ошибка: Укажите имя таблицы и столбец.")
+            return True
+
+        table_name, column = args[1], args[2]
+        kind = args[3].lower() if len(args) > 3 else 'hash'
+        if command == 'create_index':
+            new_metadata = core.create_index(
+                metadata, table_name, column, kind
+            )
+        else:
+            new_metadata = core.drop_index(metadata, table_name, column)
+        # При ошибке возвращаются те же (неизмененные) метаданные
+        if new_metadata is metadata:
+            return True
+
+        catalog.save_metadata(new_metadata)
+        table_meta = new_metadata.get(table_name, {})
+        indexed = table_meta.get(
+            'sorted_indexes' if kind == 'sorted' else 'indexes', []
+        )
+        if command == 'drop_index':
+            catalog.drop_index(table_name, column)
+        elif column in indexed:
+            catalog.save_index(table_name, column, kind)
 
+    elif command == 'pager':
+        if len(args) < 2:
+            size = session.page_size
+            state = f"по {size} записей" if size else "выключен"
+            print(f"Постраничный вывод: {state}")
+        elif args[1].lower() == 'off':
+            session.page_size = None
+            print("Постраничный вывод выключен.")
+        else:
+            session.page_size = parser.parse_page_size(args[1])
+            print(f"Вывод select по {session.page_size} записей на страницу.")
+
+    elif command == 'parallel':
+        if len(args) < 2:
+            count = parallel.workers()
+            state = f"{count} процессов" if count > 1 else "выключен"
+            print(f"Параллельный перебор: {state}")
+            return True
+        count = 1 if args[1].lower() == 'off' else parser.parse_workers(args[1])
+        parallel.set_workers(count)
+        if count > 1:
+            print(
+                f"Таблицы от {PARALLEL_MIN_ROWS} записей перебираются "
+                f"в {count} процессах."
+            )
+        else:
+            print("Параллельный перебор выключен.")
+
+    elif command == 'cache':
+        if len(args) > 1 and args[1].lower() == 'clear':
+            core.select_cache.clear()
+            print("Кэш select очищен.")
+            return True
+
+        stats = core.select_cache.stats()
+        print(f"Результатов в кэше: {stats['entries']}")
+        print(f"Примерный объем: {stats['bytes']} байт")
+        print(
+            f"Попадания: {stats['hits']}, промахи: {stats['misses']}, "
+            f"вытеснения: {stats['evictions']} "
+            f"(доля попаданий {stats['hit_rate']:.1%})"
+        )
+
+    elif command == 'begin':
+        if catalog.in_transaction:
+            report_error("Ошибка: Транзакция уже начата.")
+            return True
+        catalog.begin()
+        print("Транзакция начата.")
+
+    elif command in ('commit', 'rollback'):
+        if not catalog.in_transaction:
+            report_error("Ошибка: Нет активной транзакции.")
+            return True
+        if command == 'rollback':
+            catalog.rollback()
+            print("Транзакция отменена.")
+            return True
+        start = time.monotonic()
+        written = catalog.commit()
+        print(
+            f"Транзакция зафиксирована: таблиц {written} "
+            f"за {time.monotonic() - start:.4f} секунд."
+        )
+
+    elif command == 'stats':
+        action = args[1].lower() if len(args) > 1 else None
+        if action is None:
+            output.print_stats(registry.snapshot())
+        elif action == 'reset':
+            registry.reset()
+            print("Метрики сброшены.")
+        elif action == 'json':
+            text = json.dumps(registry.snapshot(), ensure_ascii=False, indent=2)
+            if len(args) > 2:
+                with open(args[2], 'w', encoding='utf-8') as f:
+                    f.write(text)
+                print(f"Метрики записаны в {args[2]}.")
             else:
-                print(f"Неизвестная команда: {command}")
-            
-            print() 
+                print(text)
+        elif action == 'timing' and len(args) > 2 and args[2].lower() in (
+            'on', 'off'
+        ):
+            registry.echo = args[2].lower() == 'on'
+            state = "включен" if registry.echo else "выключен"
+            print(f"Вывод времени выполнения {state}.")
+        else:
+            report_error(
+                "Ошибка: Используйте stats [reset|json [<файл>]|timing on|off]."
+            )
+
+    elif command in ('checkpoint', 'flush'):
+        if catalog.in_transaction:
+            report_error("Ошибка: Внутри транзакции используйте commit.")
+            return True
+        start = time.monotonic()
+        written = catalog.flush()
+        print(
+            f"Записано таблиц: {written} за {time.monotonic() - start:.4f} секунд."
+        )
+
+    else:
+        report_error(f"Неизвестная команда: {command}")
+
+    return True
+
+def recover() -> None:
+    '''
+    Функция завершения фиксации, прерванной сбоем прошлого запуска
+    '''
+    if journal.recover():
+        print("Завершена прерванная фиксация изменений.")
+
+def close_transaction(catalog: Catalog) -> None:
+    '''
+    Функция отката транзакции, не зафиксированной до выхода
+    
+    Переменная catalog: Кэш сессии
+    '''
+    if catalog.in_transaction:
+        catalog.rollback()
+        print("Незафиксированная транзакция отменена.")
+
+def open_data_dir():
+    '''
+    Функция общей блокировки каталога данных. Пока работает сервер,
+    другой процесс не должен изменять его таблицы.
+    '''
+    lock = lock_data_dir(exclusive=False)
+    if lock is None:
+        print(
+            "Ошибка: База данных открыта сервером (database serve). "
+            "Используйте database client."
+        )
+    return lock
+
+def _exit_on_signal(signum, frame) -> None:
+    '''
+    Функция обработки SIGTERM и SIGHUP: завершает главный цикл как exit,
+    чтобы отложенные изменения были записаны
+    '''
+    raise SystemExit(128 + signum)
+
+def run(
+    write_behind: bool = False,
+    flush_interval: float = WRITE_BEHIND_INTERVAL,
+    flush_rows: int = WRITE_BEHIND_ROWS
+):
+    '''
+    Главная функция
+
+    Переменная write_behind: Записывать изменения в фоне (см. writebehind.py)
+    Переменная flush_interval: Интервал фоновой записи в секундах
+    Переменная flush_rows: Число изменений записей, после которого
+    фоновая запись начинается раньше интервала
+    '''
+    import prompt
+
+    lock = open_data_dir()
+    if lock is None:
+        return
+    print_help()
+    recover()
+    catalog = Catalog(on_reload=core.select_cache.invalidate, deferred=write_behind)
+    session = Session(catalog)
+    flusher = None
+    if write_behind:
+        from src.primitive_db.writebehind import WriteBehind
+        flusher = WriteBehind(catalog, flush_interval, flush_rows)
+        flusher.start()
+        for signum in (signal.SIGTERM, signal.SIGHUP):
+            signal.signal(signum, _exit_on_signal)
+
+    try:
+        while True:
+            try:
+                raw_input = prompt.string('>>>Введите команду: ')
+                if not raw_input or not raw_input.strip():
+                    continue
+                # Фоновая запись копирует и фиксирует таблицы между командами
+                with catalog.lock:
+                    proceed = execute(session, raw_input)
+                if flusher is not None:
+                    flusher.notify()
+                if not proceed:
+                    break
+                print()
+
+            except Exception as e:
+                print(f"Произошла ошибка: {e}")
+    finally:
+        close_transaction(catalog)
+        if flusher is not None:
+            start = time.monotonic()
+            written = flusher.stop()
+            print(
+                f"Записано таблиц: {written} "
+                f"за {time.monotonic() - start:.4f} секунд."
+            )
+        lock.close()
 
+def run_script(lines: Iterable[str]) -> None:
+    '''
+    Функция пакетного режима: выполняет команды по одной на строку без
+    запроса подтверждений. Таблицы изменяются в памяти и записываются
+    один раз в конце (или командой checkpoint), незафиксированная
+    транзакция отменяется. Для каждой команды
+    и для всего пакета выводится время выполнения.
+    Пустые строки и строки, начинающиеся с # или --, пропускаются,
+    ; в конце команды необязательна.
+    
+    Переменная lines: Строки скрипта
+    '''
+    lock = open_data_dir()
+    if lock is None:
+        return
+    set_confirmations(False)
+    recover()
+    catalog = Catalog(on_reload=core.select_cache.invalidate, deferred=True)
+    session = Session(catalog, interactive=False)
+    batch_start = time.monotonic()
+    executed = 0
+
+    try:
+        for number, line in enumerate(lines, 1):
+            raw_input = line.strip().rstrip(';').strip()
+            if not raw_input or raw_input.startswith(('#', '--')):
+                continue
+
+            print(f">>> {raw_input}")
+            start = time.monotonic()
+            try:
+                proceed = execute(session, raw_input)
+            except Exception as e:
+                print(f"Произошла ошибка (строка {number}): {e}")
+                proceed = True
+            executed += 1
+            print(f"[строка {number}: {time.monotonic() - start:.4f} секунд]\n")
+            if not proceed:
+                break
+    finally:
+        close_transaction(catalog)
+        start = time.monotonic()
+        written = catalog.flush()
+        flush_time = time.monotonic() - start
+        print(f"Записано таблиц: {written} за {flush_time:.4f} секунд.")
+        print(
+            f"Выполнено команд: {executed} "
+            f"за {time.monotonic() - batch_start:.4f} секунд."
+        )
+        lock.close()
+
+def run_command(raw_input: str, output_format: str = 'jsonl') -> int:
+    '''
+    Функция однократного режима: выполняет одну команду без справки
+    и подтверждений и завершается. Записи select выводятся в stdout
+    в формате output_format, а сообщения - в stderr, поэтому результат
+    можно передать другой программе. Возвращает код выхода
+    (1 - команда завершилась ошибкой).
+    
+    Переменная raw_input: Команда
+    Переменная output_format: Формат вывода записей (jsonl, tsv, table)
+    '''
+    stdout = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        lock = open_data_dir()
+        if lock is None:
+            return 1
+        set_confirmations(False)
+        errors = registry.counters.get('errors', 0)
+        try:
+            recover()
+            session = Session(
+                Catalog(on_reload=core.select_cache.invalidate), interactive=False
+            )
+            session.output_format = output_format
+            session.output_stream = stdout
+            execute(session, raw_input.strip().rstrip(';').strip())
+            close_transaction(session.catalog)
         except Exception as e:
-            print(f"Произошла ошибка: {e}")
\ No newline at end of file
+            print(f"Произошла ошибка: {e}")
+            return 1
+        finally:
+            lock.close()
+    return 1 if registry.counters.get('errors', 0) > errors else 0
@@ -0,0 +1,414 @@
+# src/primitive_db/index.py
+
+import bisect
+import json
+import os
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.primitive_db.constants import DATA_DIR
+from src.primitive_db.metrics import registry
+from src.primitive_db.storage import file_size, get_backend
+from src.primitive_db.table import Table
+
+# Хэш-индекс столбца: строковое значение -> список ID записей с этим значением
+Index = Dict[str, List[int]]
+
+# Виды индексов и расширения их файлов
+INDEX_KINDS = {'hash': 'idx', 'sorted': 'sidx'}
+
+# До стольких пар добавляются по одной, без пересортировки индекса
+SORTED_INSERT_MAX = 16
+
+_first = itemgetter(0)
+
+
+class SortedIndex:
+    '''
+    Упорядоченный индекс: отсортированный массив пар (значение, ID).
+    Поиск диапазона выполняется двоичным поиском за O(log n + k),
+    а записи можно перебирать в порядке значений столбца.
+    '''
+    kind = 'sorted'
+
+    def __init__(self, entries: Optional[List[tuple]] = None):
+        self.entries = entries or []
+
+    @classmethod
+    def build(cls, table: Table, column: str) -> 'SortedIndex':
+        '''
+        Функция построения индекса по записям таблицы
+
+        Переменная table: Таблица
+        Переменная column: Название столбца
+        '''
+        return cls(sorted(zip(table.values(column), table.values('ID'))))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, key: Any, row_id: int) -> None:
+        bisect.insort(self.entries, (key, row_id))
+
+    def add_many(self, pairs: List[tuple]) -> None:
+        '''
+        Функция добавления многих пар (значение, ID) за одну сортировку.
+        Сортировка слиянием находит уже упорядоченные участки, поэтому
+        добавление части к большому индексу занимает линейное время,
+        а не O(n) на каждую пару, как при add.
+
+        Переменная pairs: Пары (значение, ID)
+        '''
+        if len(pairs) <= SORTED_INSERT_MAX:
+            for key, row_id in pairs:
+                self.add(key, row_id)
+            return
+        self.entries.extend(pairs)
+        self.entries.sort()
+
+    def remove(self, key: Any, row_id: int) -> None:
+        pos = bisect.bisect_left(self.entries, (key, row_id))
+        if pos < len(self.entries) and self.entries[pos] == (key, row_id):
+            del self.entries[pos]
+
+    def scan(
+        self,
+        bounds: Optional[list] = None,
+        reverse: bool = False
+    ) -> Iterator[int]:
+        '''
+        Функция перебора ID записей в порядке значений столбца
+
+        Переменная bounds: Границы [нижняя, включительно, верхняя, включительно]
+        Переменная reverse: Перебор в обратном порядке
+        '''
+        start, stop = _positions(self.entries, bounds, _first)
+        positions = range(start, stop)
+        for pos in (reversed(positions) if reverse else positions):
+            yield self.entries[pos][1]
+
+
+def _positions(items: list, bounds: Optional[list], key) -> tuple:
+    '''
+    Функция для получения позиций начала и конца диапазона в отсортированном списке
+
+    Переменная items: Отсортированный список
+    Переменная bounds: Границы [нижняя, включительно, верхняя, включительно]
+    Переменная key: Функция получения значения из элемента
+    '''
+    lo, lo_inclusive, hi, hi_inclusive = bounds or (None, True, None, True)
+    start, stop = 0, len(items)
+    if lo is not None:
+        find = bisect.bisect_left if lo_inclusive else bisect.bisect_right
+        start = find(items, lo, key=key)
+    if hi is not None:
+        find = bisect.bisect_right if hi_inclusive else bisect.bisect_left
+        stop = find(items, hi, key=key)
+    return start, max(start, stop)
+
+
+def scan_positions(
+    table: Table,
+    sorted_index: Optional[SortedIndex] = None,
+    bounds: Optional[list] = None,
+    reverse: bool = False
+) -> Iterator[int]:
+    '''
+    Функция перебора позиций записей в порядке упорядоченного индекса.
+    Без индекса записи перебираются по ID: они и так хранятся по возрастанию ID.
+
+    Переменная table: Таблица
+    Переменная sorted_index: Упорядоченный индекс (None - порядок ID)
+    Переменная bounds: Границы значений
+    Переменная reverse: Перебор в обратном порядке
+    '''
+    if sorted_index is None:
+        start, stop = _positions(table.ids, bounds, None)
+        positions = range(start, stop)
+        yield from table.live_positions(
+            reversed(positions) if reverse else positions
+        )
+        return
+
+    for row_id in sorted_index.scan(bounds, reverse):
+        pos = table.find(row_id)
+        if pos is not None:
+            yield pos
+
+
+def range_count(
+    table: Table,
+    sorted_index: Optional[SortedIndex] = None,
+    bounds: Optional[list] = None
+) -> int:
+    '''
+    Функция подсчета записей в диапазоне двоичным поиском, без перебора
+    (удаленные записи диапазона ID вычитаются по отметкам)
+
+    Переменная table: Таблица
+    Переменная sorted_index: Упорядоченный индекс (None - диапазон ID)
+    Переменная bounds: Границы значений
+    '''
+    if sorted_index is None:
+        return table.live_count(*_positions(table.ids, bounds, None))
+    start, stop = _positions(sorted_index.entries, bounds, _first)
+    return stop - start
+
+
+def kind_of(entries: Any) -> str:
+    '''
+    Функция для получения вида индекса
+
+    Переменная entries: Индекс
+    '''
+    return SortedIndex.kind if isinstance(entries, SortedIndex) else 'hash'
+
+
+def index_path(table_name: str, column: str, kind: str = 'hash') -> str:
+    '''
+    Функция для получения пути до файла индекса
+
+    Переменная table_name: Название таблицы
+    Переменная column: Название столбца
+    Переменная kind: Вид индекса
+    '''
+    return os.path.join(
+        DATA_DIR, f"{table_name}.{column}.{INDEX_KINDS[kind]}.json"
+    )
+
+
+def build_index(table: Table, column: str) -> Index:
+    '''
+    Функция построения индекса по записям таблицы
+
+    Переменная table: Таблица
+    Переменная column: Название столбца
+    '''
+    entries: Index = {}
+    for value, row_id in zip(table.values(column), table.values('ID')):
+        entries.setdefault(str(value), []).append(row_id)
+    return entries
+
+
+def build(table: Table, column: str, kind: str = 'hash'):
+    '''
+    Функция построения индекса нужного вида
+
+    Переменная table: Таблица
+    Переменная column: Название столбца
+    Переменная kind: Вид индекса
+    '''
+    if kind == SortedIndex.kind:
+        return SortedIndex.build(table, column)
+    return build_index(table, column)
+
+
+def save_indexes(
+    table_name: str, indexes: Dict[str, Index], storage: str = 'json'
+) -> None:
+    '''
+    Функция сохранения индексов таблицы рядом с ее данными.
+    Вместе с индексом сохраняется отпечаток файла таблицы, чтобы при загрузке
+    отличить актуальный индекс от устаревшего.
+
+    Переменная table_name: Название таблицы
+    Переменная indexes: Индексы по названию столбца
+    Переменная storage: Формат хранения таблицы
+    '''
+    if not indexes:
+        return
+    os.makedirs(DATA_DIR, exist_ok=True)
+    stamp = get_backend(storage).stamp(table_name)
+    for column, entries in indexes.items():
+        kind = kind_of(entries)
+        if kind == SortedIndex.kind:
+            entries = entries.entries
+        path = index_path(table_name, column, kind)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'column': column, 'kind': kind, 'stamp': stamp, 'entries': entries},
+                f, ensure_ascii=False
+            )
+            f.flush()
+            registry.add('bytes_written', file_size(f))
+
+
+def load_indexes(
+    table_name: str,
+    columns: List[str],
+    table: Table,
+    storage: str = 'json',
+    sorted_columns: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    '''
+    Функция загрузки индексов таблицы.
+    Отсутствующий или устаревший индекс перестраивается по записям.
+
+    Переменная table_name: Название таблицы
+    Переменная columns: Столбцы с хэш-индексом
+    Переменная table: Таблица
+    Переменная storage: Формат хранения таблицы
+    Переменная sorted_columns: Столбцы с упорядоченным индексом
+    '''
+    stamp = get_backend(storage).stamp(table_name)
+    wanted = [(column, 'hash') for column in columns]
+    wanted += [(column, SortedIndex.kind) for column in sorted_columns or []]
+
+    indexes = {}
+    for column, kind in wanted:
+        path = index_path(table_name, column, kind)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                registry.add('bytes_read', file_size(f))
+                saved = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            saved = {}
+
+        if kind == SortedIndex.kind:
+            if saved.get('stamp') == stamp:
+                entries = [tuple(pair) for pair in saved['entries']]
+                indexes[column] = SortedIndex(entries)
+            else:
+                indexes[column] = SortedIndex.build(table, column)
+        elif saved.get('stamp') == stamp:
+            indexes[column] = saved['entries']
+        else:
+            indexes[column] = build_index(table, column)
+    return indexes
+
+
+def drop_index_file(table_name: str, column: str, kind: str = 'hash') -> None:
+    '''
+    Функция удаления файла индекса
+
+    Переменная table_name: Название таблицы
+    Переменная column: Название столбца
+    Переменная kind: Вид индекса
+    '''
+    try:
+        os.remove(index_path(table_name, column, kind))
+    except FileNotFoundError:
+        pass
+
+
+def add_row(indexes: Optional[Dict[str, Index]], row: Dict[str, Any]) -> None:
+    '''
+    Функция добавления записи в индексы
+
+    Переменная indexes: Индексы таблицы
+    Переменная row: Новая запись
+    '''
+    for column, entries in (indexes or {}).items():
+        if isinstance(entries, SortedIndex):
+            entries.add(row.get(column), row['ID'])
+        else:
+            entries.setdefault(str(row.get(column)), []).append(row['ID'])
+
+
+def add_rows(
+    indexes: Optional[Dict[str, Index]], rows: List[Dict[str, Any]]
+) -> None:
+    '''
+    Функция добавления многих записей в индексы
+
+    Переменная indexes: Индексы таблицы
+    Переменная rows: Новые записи
+    '''
+    for column, entries in (indexes or {}).items():
+        if isinstance(entries, SortedIndex):
+            entries.add_many([(row.get(column), row['ID']) for row in rows])
+            continue
+        for row in rows:
+            entries.setdefault(str(row.get(column)), []).append(row['ID'])
+
+
+def remove_row(indexes: Optional[Dict[str, Index]], row: Dict[str, Any]) -> None:
+    '''
+    Функция удаления записи из индексов
+
+    Переменная indexes: Индексы таблицы
+    Переменная row: Удаляемая запись
+    '''
+    for column, entries in (indexes or {}).items():
+        if isinstance(entries, SortedIndex):
+            entries.remove(row.get(column), row['ID'])
+        else:
+            _discard(entries, str(row.get(column)), row['ID'])
+
+
+def update_row(
+    indexes: Optional[Dict[str, Index]],
+    row: Dict[str, Any],
+    new_values: Dict[str, Any]
+) -> None:
+    '''
+    Функция обновления индексов перед изменением записи
+
+    Переменная indexes: Индексы таблицы
+    Переменная row: Запись до изменения
+    Переменная new_values: Новые значения столбцов
+    '''
+    for column, entries in (indexes or {}).items():
+        if column not in new_values:
+            continue
+        if isinstance(entries, SortedIndex):
+            if row.get(column) != new_values[column]:
+                entries.remove(row.get(column), row['ID'])
+                entries.add(new_values[column], row['ID'])
+            continue
+        old_key, new_key = str(row.get(column)), str(new_values[column])
+        if old_key != new_key:
+            _discard(entries, old_key, row['ID'])
+            entries.setdefault(new_key, []).append(row['ID'])
+
+
+def _discard(entries: Index, key: str, row_id: int) -> None:
+    '''
+    Функция удаления ID из списка по ключу индекса
+
+    Переменная entries: Индекс
+    Переменная key: Значение столбца
+    Переменная row_id: ID записи
+    '''
+    ids = entries.get(key)
+    if ids is None:
+        return
+    try:
+        ids.remove(row_id)
+    except ValueError:
+        return
+    if not ids:
+        del entries[key]
+
+
+def lookup(
+    table: Table,
+    equalities: Dict[str, List[Any]],
+    indexes: Optional[Dict[str, Index]] = None
+) -> Optional[List[int]]:
+    '''
+    Функция выбора позиций записей-кандидатов по индексу.
+    Возвращает None, если ни один столбец условия не проиндексирован.
+
+    Переменная table: Таблица
+    Переменная equalities: Допустимые значения столбцов (условия = и IN)
+    Переменная indexes: Индексы таблицы
+    '''
+    if 'ID' in equalities:
+        ids = set(equalities['ID'])
+    else:
+        for column, values in equalities.items():
+            if indexes and column in indexes:
+                entries = indexes[column]
+                ids = set()
+                for val in values:
+                    if isinstance(entries, SortedIndex):
+                        ids.update(entries.scan([val, True, val, True]))
+                    else:
+                        ids.update(entries.get(str(val), []))
+                break
+        else:
+            return None
+
+    positions = (table.find(row_id) for row_id in sorted(ids))
+    return [pos for pos in positions if pos is not None]
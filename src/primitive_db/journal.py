@@ -0,0 +1,92 @@
+# src/primitive_db/journal.py
+
+import json
+import os
+from typing import List
+
+from src.primitive_db.constants import DATA_DIR
+from src.primitive_db.metrics import registry
+from src.primitive_db.storage import Step, atomic_write, fsync_dir
+
+# Журнал фиксации: список шагов, которые нужно применить к файлам
+JOURNAL_PATH = os.path.join(DATA_DIR, 'commit.journal')
+
+
+def apply_step(step: Step) -> None:
+    '''
+    Функция применения одного шага фиксации. Шаги можно применять
+    повторно: после сбоя журнал проигрывается с начала.
+
+    Переменная step: Шаг фиксации
+    '''
+    op = step['op']
+    if op == 'replace':
+        if os.path.exists(step['src']):
+            os.replace(step['src'], step['dst'])
+            fsync_dir(os.path.dirname(step['dst']))
+    elif op == 'append':
+        with open(step['path'], 'ab') as f:
+            if f.tell() > step['size']:
+                # Строки уже дописывались до сбоя
+                f.truncate(step['size'])
+            text = step['text'].encode('utf-8')
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        registry.add('bytes_written', len(text))
+    elif op == 'remove':
+        try:
+            os.remove(step['path'])
+        except FileNotFoundError:
+            return
+        fsync_dir(os.path.dirname(step['path']))
+    else:
+        raise ValueError(f"Неизвестный шаг фиксации '{op}'")
+
+
+def commit(steps: List[Step], journal_path: str = JOURNAL_PATH) -> None:
+    '''
+    Функция атомарной фиксации изменений нескольких файлов.
+    Сначала все шаги записываются в журнал одним fsync - это момент
+    фиксации. Затем шаги применяются к файлам, и журнал удаляется.
+    Если процесс прервется после записи журнала, шаги будут применены
+    при следующем запуске (recover), а до записи - не применится ни один.
+
+    Переменная steps: Шаги фиксации
+    Переменная journal_path: Путь до журнала
+    '''
+    if not steps:
+        return
+    os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+    atomic_write(
+        journal_path, lambda f: json.dump({'steps': steps}, f, ensure_ascii=False)
+    )
+    for step in steps:
+        apply_step(step)
+    os.remove(journal_path)
+    fsync_dir(os.path.dirname(journal_path))
+
+
+def recover(journal_path: str = JOURNAL_PATH) -> bool:
+    '''
+    Функция завершения фиксации, прерванной сбоем.
+    Возвращает True, если журнал был применен.
+
+    Переменная journal_path: Путь до журнала
+    '''
+    try:
+        os.remove(journal_path + '.tmp')
+    except FileNotFoundError:
+        pass
+
+    try:
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            steps = json.load(f)['steps']
+    except FileNotFoundError:
+        return False
+
+    for step in steps:
+        apply_step(step)
+    os.remove(journal_path)
+    fsync_dir(os.path.dirname(journal_path))
+    return True
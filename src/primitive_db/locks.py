@@ -0,0 +1,143 @@
+# src/primitive_db/locks.py
+
+import contextlib
+import os
+import threading
+from typing import IO, Dict, Iterator, Optional
+
+from src.primitive_db.constants import DATA_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировка каталога не поддерживается
+    fcntl = None
+
+# Файл блокировки каталога данных
+LOCK_PATH = os.path.join(DATA_DIR, 'db.lock')
+
+
+class RWLock:
+    '''
+    Блокировка читатель/писатель: одновременно несколько читателей
+    или один писатель. Если писатель ждет, новые читатели тоже ждут,
+    поэтому поток select не может бесконечно откладывать запись.
+    '''
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self) -> None:
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self) -> None:
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self) -> None:
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def read(self) -> Iterator[None]:
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextlib.contextmanager
+    def write(self) -> Iterator[None]:
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class LockTable:
+    '''
+    Блокировки базы для сервера: блокировка схемы и по одной RWLock
+    на таблицу. Команда над таблицей берет схему на чтение и таблицу
+    на чтение (select) или запись (insert); изменение схемы (create_table,
+    drop_table, индексы) берет схему на запись и ждет все команды.
+    '''
+
+    def __init__(self):
+        self.schema = RWLock()
+        self._tables: Dict[str, RWLock] = {}
+        self._guard = threading.Lock()
+
+    def table(self, table_name: str) -> RWLock:
+        '''
+        Функция для получения блокировки таблицы
+
+        Переменная table_name: Название таблицы
+        '''
+        with self._guard:
+            lock = self._tables.get(table_name)
+            if lock is None:
+                lock = self._tables[table_name] = RWLock()
+            return lock
+
+    @contextlib.contextmanager
+    def hold(self, mode: str, *table_names: str) -> Iterator[None]:
+        '''
+        Контекст удержания блокировок команды. Блокировки нескольких таблиц
+        (select с join) берутся в порядке названий, чтобы команды
+        не ждали друг друга по кругу.
+
+        Переменная mode: 'read' или 'write' - доступ к таблицам,
+        'schema' - исключительный доступ ко всей базе
+        Переменная table_names: Названия таблиц (для read и write)
+        '''
+        if mode == 'schema':
+            with self.schema.write():
+                yield
+            return
+
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(self.schema.read())
+            for table_name in sorted(set(table_names)):
+                lock = self.table(table_name)
+                stack.enter_context(lock.read() if mode == 'read' else lock.write())
+            yield
+
+
+def lock_data_dir(exclusive: bool) -> Optional[IO]:
+    '''
+    Функция блокировки каталога данных между процессами.
+    Сервер держит исключительную блокировку, остальные процессы - общую,
+    поэтому пока работает сервер, таблицы не изменит другой процесс.
+    Возвращает открытый файл блокировки (держать до выхода) или None,
+    если каталог уже заблокирован.
+
+    Переменная exclusive: Исключительная блокировка
+    '''
+    os.makedirs(DATA_DIR, exist_ok=True)
+    f = open(LOCK_PATH, 'a+')
+    if fcntl is None:
+        return f
+    mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+    try:
+        fcntl.flock(f.fileno(), mode | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
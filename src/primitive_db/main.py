@@ -1,10 +1,106 @@
 #!/usr/bin/env python3
 
-from src.primitive_db.engine import run
+import argparse
+import sys
+
+from src.primitive_db.constants import (
+    SERVER_HOST,
+    SERVER_PORT,
+    WRITE_BEHIND_INTERVAL,
+    WRITE_BEHIND_ROWS,
+)
+from src.primitive_db.engine import run, run_command, run_script
+
+
+def add_address_arguments(parser: argparse.ArgumentParser) -> None:
+    '''
+    Функция добавления аргументов адреса сервера
+
+    Переменная parser: Разборщик аргументов команды
+    '''
+    parser.add_argument('--host', default=SERVER_HOST, help='адрес TCP')
+    parser.add_argument('--port', type=int, default=SERVER_PORT, help='порт TCP')
+    parser.add_argument(
+        '--socket', metavar='PATH', help='Unix-сокет вместо TCP'
+    )
 
 
 def main():
-    run()
+    parser = argparse.ArgumentParser(
+        prog='database', description='Примитивная база данных'
+    )
+    parser.add_argument(
+        '--script',
+        metavar='FILE',
+        help="выполнить команды из файла ('-' - из stdin) без подтверждений, "
+             "записав таблицы один раз в конце",
+    )
+    parser.add_argument(
+        '-c', '--command',
+        metavar='COMMAND',
+        help='выполнить одну команду и завершиться (записи select - в stdout, '
+             'сообщения - в stderr, код выхода 1 при ошибке)',
+    )
+    parser.add_argument(
+        '--format',
+        choices=('jsonl', 'tsv', 'table'),
+        default='jsonl',
+        help='формат вывода записей для --command (по умолчанию jsonl)',
+    )
+    parser.add_argument(
+        '--write-behind',
+        action='store_true',
+        help='записывать изменения в фоне: раз в --flush-interval секунд '
+             'или после --flush-rows изменений записей',
+    )
+    parser.add_argument(
+        '--flush-interval',
+        type=float,
+        default=WRITE_BEHIND_INTERVAL,
+        metavar='SEC',
+        help=f'интервал фоновой записи (по умолчанию {WRITE_BEHIND_INTERVAL})',
+    )
+    parser.add_argument(
+        '--flush-rows',
+        type=int,
+        default=WRITE_BEHIND_ROWS,
+        metavar='N',
+        help=f'порог фоновой записи (по умолчанию {WRITE_BEHIND_ROWS})',
+    )
+    modes = parser.add_subparsers(dest='mode')
+    add_address_arguments(
+        modes.add_parser('serve', help='запустить сервер для нескольких клиентов')
+    )
+    client_parser = modes.add_parser('client', help='подключиться к серверу')
+    add_address_arguments(client_parser)
+    client_parser.add_argument(
+        '--script',
+        metavar='FILE',
+        help="отправить команды из файла ('-' - из stdin)",
+    )
+    args = parser.parse_args()
+
+    if args.mode == 'serve':
+        from src.primitive_db.server import run_server
+        run_server(args.host, args.port, args.socket)
+    elif args.mode == 'client':
+        from src.primitive_db.client import run_client
+        if args.script is None:
+            run_client(args.host, args.port, args.socket)
+        elif args.script == '-':
+            run_client(args.host, args.port, args.socket, sys.stdin)
+        else:
+            with open(args.script, 'r', encoding='utf-8') as f:
+                run_client(args.host, args.port, args.socket, f)
+    elif args.command is not None:
+        sys.exit(run_command(args.command, args.format))
+    elif args.script is None:
+        run(args.write_behind, args.flush_interval, args.flush_rows)
+    elif args.script == '-':
+        run_script(sys.stdin)
+    else:
+        with open(args.script, 'r', encoding='utf-8') as f:
+            run_script(f)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,187 @@
+# src/primitive_db/metrics.py
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from src.primitive_db.constants import METRICS_WINDOW
+
+# Процентили задержек, которые выводятся командой stats
+PERCENTILES = (50, 95, 99)
+
+
+class Histogram:
+    '''
+    Задержки одной операции: количество, сумма и максимум по всем замерам
+    и последние METRICS_WINDOW замеров для процентилей. Память не растет
+    с числом операций.
+    '''
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: deque = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        '''
+        Функция добавления замера
+
+        Переменная seconds: Время выполнения в секундах
+        '''
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.samples.append(seconds)
+
+    def summary(self) -> Dict[str, float]:
+        '''
+        Функция для получения сводки: count, mean, p50, p95, p99, max (секунды).
+        Процентиль считается по рангу среди последних замеров.
+        '''
+        ordered = sorted(self.samples)
+        result = {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+        }
+        for p in PERCENTILES:
+            rank = max(math.ceil(p / 100 * len(ordered)) - 1, 0)
+            result[f'p{p}'] = ordered[rank] if ordered else 0.0
+        result['max'] = self.max
+        return result
+
+
+class Metrics:
+    '''
+    Реестр метрик сессии: гистограммы задержек операций и счетчики
+    (прочитанные и возвращенные записи, прочитанные и записанные байты).
+    Другие модули могут добавить свои счетчики через register - они
+    читаются при выводе статистики (например, кэш select).
+    Замеры ничего не выводят, пока не включен вывод времени (echo).
+    '''
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.window = window
+        self.echo = False
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self._sources: Dict[str, Tuple[Callable[[], Dict[str, Any]], Callable]] = {}
+        # Замеры приходят из нескольких потоков в режиме сервера
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float) -> None:
+        '''
+        Функция записи времени выполнения операции
+
+        Переменная name: Название операции
+        Переменная seconds: Время выполнения в секундах
+        '''
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.window)
+            histogram.observe(seconds)
+        if self.echo:
+            print(f"Функция {name} выполнилась за {seconds:.4f} секунд.")
+
+    def add(self, name: str, amount: int = 1) -> None:
+        '''
+        Функция увеличения счетчика
+
+        Переменная name: Название счетчика
+        Переменная amount: Величина
+        '''
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def counted(self, name: str, items: Iterable[Any]) -> Iterator[Any]:
+        '''
+        Генератор, который передает элементы дальше и прибавляет
+        их количество к счетчику, когда перебор закончен или прерван
+
+        Переменная name: Название счетчика
+        Переменная items: Элементы
+        '''
+        count = 0
+        try:
+            for count, item in enumerate(items, 1):
+                yield item
+        finally:
+            self.add(name, count)
+
+    def timed(
+        self, name: str, rows: Iterator[Any], elapsed: float = 0.0
+    ) -> Iterator[Any]:
+        '''
+        Генератор для ленивого результата (select): время получения записей
+        суммируется без времени их вывода и записывается одним замером, когда
+        перебор закончен или прерван. Количество записей прибавляется
+        к счетчику rows_returned.
+
+        Переменная name: Название операции
+        Переменная rows: Записи
+        Переменная elapsed: Время, уже затраченное до перебора
+        '''
+        returned = 0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    row = next(rows)
+                except StopIteration:
+                    break
+                finally:
+                    elapsed += time.perf_counter() - start
+                returned += 1
+                yield row
+        finally:
+            self.add('rows_returned', returned)
+            self.observe(name, elapsed)
+
+    def register(
+        self,
+        name: str,
+        stats: Callable[[], Dict[str, Any]],
+        reset: Optional[Callable[[], None]] = None
+    ) -> None:
+        '''
+        Функция подключения внешнего источника счетчиков
+
+        Переменная name: Название источника
+        Переменная stats: Функция, возвращающая счетчики
+        Переменная reset: Функция сброса счетчиков
+        '''
+        self._sources[name] = (stats, reset)
+
+    def reset(self) -> None:
+        '''
+        Функция сброса всех замеров и счетчиков
+        '''
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+        for _, reset in self._sources.values():
+            if reset is not None:
+                reset()
+
+    def snapshot(self) -> Dict[str, Any]:
+        '''
+        Функция для получения всех метрик в виде словаря (для вывода и json)
+        '''
+        with self._lock:
+            latency = {
+                name: histogram.summary()
+                for name, histogram in sorted(self.histograms.items())
+            }
+            counters = dict(sorted(self.counters.items()))
+        return {
+            'latency': latency,
+            'counters': counters,
+            **{name: stats() for name, (stats, _) in self._sources.items()},
+        }
+
+
+registry = Metrics()
@@ -0,0 +1,296 @@
+# src/primitive_db/output.py
+
+import itertools
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, TextIO, Tuple
+
+from src.primitive_db.constants import RENDER_CHUNK_ROWS
+
+# Единицы, в которых хранилища оценивают место для сжатия (reclaimable)
+_RECLAIMABLE_UNITS = {
+    'log': 'устаревших записей журнала',
+    'segments': 'незанятых мест в сегментах',
+    'binary': 'лишних байт в кучах строк',
+}
+
+
+def _new_table(field_names: List[str]):
+    '''
+    Функция создания пустой таблицы PrettyTable. Модуль prettytable
+    загружается при первом выводе таблицы, а не при запуске программы.
+
+    Переменная field_names: Названия столбцов
+    '''
+    from prettytable import PrettyTable
+
+    pt = PrettyTable()
+    pt.field_names = field_names
+    return pt
+
+
+def _table(field_names: List[str], rows: List[Dict[str, Any]]):
+    '''
+    Функция построения таблицы для вывода
+
+    Переменная field_names: Названия столбцов
+    Переменная rows: Записи
+    '''
+    pt = _new_table(field_names)
+    for row in rows:
+        pt.add_row([row.get(name) for name in field_names])
+    return pt
+
+
+def print_rows(
+    field_names: List[str],
+    rows: Iterable[Dict[str, Any]],
+    page_size: Optional[int] = None,
+    ask_next: Optional[Callable[[int], bool]] = None
+) -> int:
+    '''
+    Функция вывода записей частями: в памяти находится только одна часть,
+    поэтому первые записи появляются сразу, а объем памяти не зависит
+    от размера результата. Возвращает количество выведенных записей.
+
+    Переменная field_names: Названия столбцов
+    Переменная rows: Записи (итератор)
+    Переменная page_size: Размер страницы (None - вывод без остановок)
+    Переменная ask_next: Вызывается с номером страницы перед следующей;
+    если возвращает False, вывод прекращается
+    '''
+    rows = iter(rows)
+    chunk_size = page_size or RENDER_CHUNK_ROWS
+    total = 0
+    page = 1
+
+    chunk = list(itertools.islice(rows, chunk_size))
+    if not chunk:
+        print(_table(field_names, []))
+        return 0
+
+    while True:
+        if page_size:
+            print(f"Страница {page}: записи {total + 1}-{total + len(chunk)}")
+        print(_table(field_names, chunk))
+        total += len(chunk)
+
+        # Следующая часть читается только после вывода текущей
+        first = next(rows, None)
+        if first is None:
+            break
+        if page_size and ask_next is not None and not ask_next(page):
+            break
+        chunk = [first] + list(itertools.islice(rows, chunk_size - 1))
+        page += 1
+
+    if page > 1 or page_size:
+        print(f"Выведено записей: {total}")
+    return total
+
+
+def _tsv_value(value: Any) -> str:
+    '''
+    Функция записи значения в поле TSV: спецсимволы экранируются,
+    логические значения записываются как true/false
+
+    Переменная value: Значение
+    '''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if value is None:
+        return ''
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t')
+        .replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+def print_records(
+    field_names: List[str],
+    rows: Iterable[Dict[str, Any]],
+    output_format: str,
+    stream: TextIO
+) -> int:
+    '''
+    Функция вывода записей для обработки другими программами:
+    jsonl - объект JSON на строку, tsv - строка заголовка и строки значений
+    через табуляцию, table - таблица, как в интерактивном режиме.
+    Записи выводятся по одной, без накопления в памяти.
+    Возвращает количество выведенных записей.
+
+    Переменная field_names: Названия столбцов
+    Переменная rows: Записи (итератор)
+    Переменная output_format: Формат вывода
+    Переменная stream: Поток вывода
+    '''
+    rows = iter(rows)
+    total = 0
+    if output_format == 'table':
+        while True:
+            chunk = list(itertools.islice(rows, RENDER_CHUNK_ROWS))
+            if chunk or not total:
+                stream.write(f"{_table(field_names, chunk)}\n")
+            total += len(chunk)
+            if len(chunk) < RENDER_CHUNK_ROWS:
+                return total
+
+    if output_format == 'tsv':
+        stream.write('\t'.join(map(_tsv_value, field_names)) + '\n')
+        for row in rows:
+            stream.write(
+                '\t'.join(_tsv_value(row.get(name)) for name in field_names) + '\n'
+            )
+            total += 1
+        return total
+
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    for row in rows:
+        stream.write(encode({name: row.get(name) for name in field_names}) + '\n')
+        total += 1
+    return total
+
+
+def render_rows(field_names: List[str], rows: Iterable[Dict[str, Any]]) -> int:
+    '''
+    Функция форматирования записей теми же частями, что и print_rows,
+    но без вывода (explain замеряет время вывода).
+    Возвращает размер текста в символах.
+
+    Переменная field_names: Названия столбцов
+    Переменная rows: Записи
+    '''
+    rows = iter(rows)
+    size = 0
+    while True:
+        chunk = list(itertools.islice(rows, RENDER_CHUNK_ROWS))
+        if chunk or not size:
+            size += len(_table(field_names, chunk).get_string())
+        if len(chunk) < RENDER_CHUNK_ROWS:
+            return size
+
+
+def print_explain(
+    plan: Any,
+    indexes: Dict[str, Any],
+    actual: int,
+    scanned: int,
+    timings: Dict[str, float],
+    stats: Optional[Dict[str, Any]]
+) -> None:
+    '''
+    Функция вывода плана запроса: способ доступа, оценка и фактическое
+    число записей, отвергнутые варианты со стоимостью и время этапов
+
+    Переменная plan: План (planner.Plan)
+    Переменная indexes: Индексы таблицы
+    Переменная actual: Фактическое число записей результата
+    Переменная scanned: Сколько записей проверено условием
+    Переменная timings: Время этапов в секундах (load, filter, render)
+    Переменная stats: Статистика analyze из метаданных (None - не собрана)
+    '''
+    print(f"Доступ: {plan.describe(indexes)}")
+    print(f"Записей: оценка {round(plan.estimate)}, фактически {actual}")
+    if plan.path != 'cache':
+        print(
+            f"Проверено записей: оценка {round(plan.candidates)}, "
+            f"фактически {scanned}"
+        )
+        print(f"Стоимость: {plan.cost:.1f}")
+    if plan.alternatives:
+        others = ', '.join(
+            f"{other.describe(indexes)} - {other.cost:.1f}"
+            for other in plan.alternatives
+        )
+        print(f"Другие варианты: {others}")
+
+    pt = _new_table(['этап', 'мс'])
+    for stage, seconds in timings.items():
+        pt.add_row([stage, f"{seconds * 1000:.3f}"])
+    print(pt)
+    if stats is None:
+        print("Статистика не собрана (analyze <имя_таблицы>), оценки по умолчанию.")
+    else:
+        print(f"Статистика собрана для {stats['rows']} записей.")
+
+
+def print_analyze(table_name: str, stats: Dict[str, Any]) -> None:
+    '''
+    Функция вывода статистики столбцов, собранной analyze
+
+    Переменная table_name: Название таблицы
+    Переменная stats: Статистика (planner.analyze)
+    '''
+    pt = _new_table(['столбец', 'различных', 'min', 'max'])
+    for name, column in stats['columns'].items():
+        pt.add_row([name, column['distinct'], column['min'], column['max']])
+    print(f'Статистика таблицы "{table_name}" ({stats["rows"]} записей):')
+    print(pt)
+
+
+def format_reclaimable(storage: str, reclaimable: Optional[Tuple[int, int]]) -> str:
+    '''
+    Функция описания места в файлах таблицы, которое освободит сжатие
+
+    Переменная storage: Формат хранения таблицы
+    Переменная reclaimable: (лишнее, всего) или None - освобождать нечего
+    '''
+    if reclaimable is None:
+        return f"нет ({storage} переписывается целиком без удаленных записей)"
+    dead, total = reclaimable
+    share = dead / total if total else 0.0
+    return f"{dead} {_RECLAIMABLE_UNITS[storage]} из {total} (доля {share:.1%})"
+
+
+def print_stats(snapshot: Dict[str, Any]) -> None:
+    '''
+    Функция вывода метрик: задержки операций в миллисекундах,
+    счетчики, кэши и фоновая запись
+
+    Переменная snapshot: Метрики из metrics.Metrics.snapshot
+    '''
+    latency = snapshot['latency']
+    if latency:
+        pt = _new_table(['операция', 'count', 'mean', 'p50', 'p95', 'p99', 'max'])
+        for name, summary in latency.items():
+            pt.add_row([name, summary['count']] + [
+                f"{summary[key] * 1000:.3f}"
+                for key in ('mean', 'p50', 'p95', 'p99', 'max')
+            ])
+        print("Задержки операций, мс:")
+        print(pt)
+    else:
+        print("Задержки операций: замеров нет")
+
+    counters = snapshot['counters']
+    for name in (
+        'rows_scanned', 'rows_returned', 'bytes_read', 'bytes_written', 'errors'
+    ):
+        print(f"{name}: {counters.get(name, 0)}")
+    # Счетчики таблиц, хранящихся сегментами
+    for name in ('segments_read', 'segments_skipped', 'segments_written'):
+        if name in counters:
+            print(f"{name}: {counters[name]}")
+
+    cache = snapshot.get('select_cache')
+    if cache is not None:
+        print(
+            f"Кэш select: попадания {cache['hits']}, промахи {cache['misses']} "
+            f"(доля попаданий {cache['hit_rate']:.1%})"
+        )
+    statements = snapshot.get('statement_cache')
+    if statements is not None:
+        print(
+            f"Кэш разбора команд: попадания {statements['hits']}, "
+            f"промахи {statements['misses']}, команд {statements['entries']}"
+        )
+    write_behind = snapshot.get('write_behind')
+    if write_behind is not None:
+        print(
+            f"Фоновая запись: ожидают таблиц {write_behind['pending_tables']}, "
+            f"изменений записей {write_behind['pending_rows']}; "
+            f"записей {write_behind['flushes']} "
+            f"(таблиц {write_behind['tables_written']}), "
+            f"ошибок {write_behind['failures']}"
+        )
+        if write_behind['last_error']:
+            print(f"Последняя ошибка фоновой записи: {write_behind['last_error']}")
@@ -0,0 +1,99 @@
+# src/primitive_db/parallel.py
+
+import atexit
+import threading
+from typing import Any, Callable, List, Tuple
+
+from src.primitive_db.constants import PARALLEL_MIN_ROWS, PARALLEL_WORKERS
+
+# Количество процессов для перебора таблицы, включая текущий
+# (1 - перебор только в текущем процессе)
+_workers = PARALLEL_WORKERS
+# Пул процессов (concurrent.futures.ProcessPoolExecutor) создается при первом
+# переборе: модули multiprocessing загружаются только тогда
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def workers() -> int:
+    '''
+    Функция для получения количества процессов перебора
+    '''
+    return _workers
+
+
+def set_workers(count: int) -> None:
+    '''
+    Функция изменения количества процессов перебора.
+    Старый пул закрывается, новый создается при следующем переборе.
+
+    Переменная count: Количество процессов (1 - без пула)
+    '''
+    global _workers
+    if count < 1:
+        raise ValueError("Количество процессов должно быть положительным")
+    shutdown()
+    _workers = count
+
+
+def should_split(rows: int) -> bool:
+    '''
+    Функция проверки, стоит ли перебирать таблицу частями в пуле.
+    Для небольших таблиц передача данных в процессы дороже самого перебора.
+
+    Переменная rows: Количество записей
+    '''
+    return _workers > 1 and rows >= PARALLEL_MIN_ROWS
+
+
+def partitions(rows: int) -> List[Tuple[int, int]]:
+    '''
+    Функция деления записей на части по числу процессов: [(начало, конец)]
+
+    Переменная rows: Количество записей
+    '''
+    size = -(-rows // _workers)
+    return [(start, min(start + size, rows)) for start in range(0, rows, size)]
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # spawn: процессы не наследуют потоки и блокировки (режим сервера)
+            _pool = ProcessPoolExecutor(
+                max_workers=_workers - 1,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def map_partitions(func: Callable[..., Any], *iterables) -> List[Any]:
+    '''
+    Функция выполнения func для каждой части: все части, кроме последней,
+    выполняются в пуле, а последняя - в текущем процессе, пока он ждет.
+    Результаты возвращаются в порядке частей.
+
+    Переменная func: Функция уровня модуля (передается в процесс по имени)
+    Переменная iterables: Аргументы для каждой части
+    '''
+    calls = list(zip(*iterables))
+    pool = _get_pool()
+    futures = [pool.submit(func, *args) for args in calls[:-1]]
+    last = func(*calls[-1])
+    return [future.result() for future in futures] + [last]
+
+
+@atexit.register
+def shutdown() -> None:
+    '''
+    Функция остановки пула процессов
+    '''
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
@@ -1,24 +1,417 @@
+import re
 import shlex
 
+# Лексемы условия where: строка в кавычках, оператор сравнения, скобка или
+# запятая, слово (имя столбца, значение, ключевое слово)
+TOKEN_RE = re.compile(
+    r"""\s*(?:
+        (?P<string>"[^"]*"|'[^']*')
+        |(?P<op><=|>=|!=|<>|=|<|>)
+        |(?P<punct>[(),])
+        |(?P<word>[^\s()<>=!,'"]+)
+    )""",
+    re.VERBOSE,
+)
 
-def parse_where(args: list) -> dict:
+COMPARISON_OPS = {'=', '!=', '<>', '<', '<=', '>', '>='}
+
+# Ключевые слова, которыми заканчивается условие where
+CLAUSE_KEYWORDS = ('group', 'order', 'limit', 'offset')
+
+# Значение-параметр подготовленной команды (без кавычек)
+PLACEHOLDER = '?'
+
+
+class Parameter(str):
+    '''
+    Значение ? без кавычек - параметр подготовленной команды (prepare).
+    Это строка '?', поэтому без prepare значение не меняется, а строка
+    "?" в кавычках разбирается как обычная str и параметром не считается.
+    '''
+
+# Агрегатные функции select
+AGGREGATES = ('count', 'sum', 'min', 'max', 'avg')
+
+
+def tokenize(text: str) -> list:
+    '''
+    Функция для разбиения текста команды на лексемы (тип, текст)
+    
+    Переменная text: Текст команды
+    '''
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = TOKEN_RE.match(text, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f"Не удалось разобрать '{text[pos:].strip()}'")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'string':
+            value = value[1:-1]
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+class _WhereParser:
+    '''
+    Разбор условия where методом рекурсивного спуска:
+    выражение := и_выражение (OR и_выражение)*
+    и_выражение := условие (AND условие)*
+    условие := ( выражение ) | столбец оператор значение
+             | столбец IN ( значение, .. )
+    '''
+
+    def __init__(self, tokens: list):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return (None, None)
+
+    def take(self):
+        token = self.peek()
+        if token[0] is None:
+            raise ValueError("Условие where оборвано")
+        self.pos += 1
+        return token
+
+    def keyword(self, word: str) -> bool:
+        kind, value = self.peek()
+        if kind == 'word' and value.lower() == word:
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, kind: str, value: str) -> None:
+        token = self.take()
+        if token != (kind, value):
+            raise ValueError(f"Ожидалось '{value}', получено '{token[1]}'")
+
+    def expression(self) -> tuple:
+        items = [self.and_expression()]
+        while self.keyword('or'):
+            items.append(self.and_expression())
+        return items[0] if len(items) == 1 else ('or', items)
+
+    def and_expression(self) -> tuple:
+        items = [self.condition()]
+        while self.keyword('and'):
+            items.append(self.condition())
+        return items[0] if len(items) == 1 else ('and', items)
+
+    def condition(self) -> tuple:
+        if self.peek() == ('punct', '('):
+            self.take()
+            expr = self.expression()
+            self.expect('punct', ')')
+            return expr
+
+        kind, column = self.take()
+        if kind != 'word':
+            raise ValueError(f"Ожидалось имя столбца, получено '{column}'")
+
+        if self.keyword('in'):
+            self.expect('punct', '(')
+            values = [self.literal()]
+            while self.peek() == ('punct', ','):
+                self.take()
+                values.append(self.literal())
+            self.expect('punct', ')')
+            return ('in', column, values)
+
+        kind, op = self.take()
+        if kind != 'op':
+            raise ValueError(f"Ожидался оператор сравнения, получено '{op}'")
+        return ('cmp', column, '!=' if op == '<>' else op, self.literal())
+
+    def literal(self) -> str:
+        kind, value = self.take()
+        if kind not in ('word', 'string'):
+            raise ValueError(f"Ожидалось значение, получено '{value}'")
+        if kind == 'word' and value == PLACEHOLDER:
+            return Parameter(value)
+        return value
+
+
+def parse_where(user_input: str):
+    '''
+    Функция для разбора условия where в дерево выражения:
+    ('cmp', столбец, оператор, значение), ('in', столбец, [значения]),
+    ('and', [условия]), ('or', [условия]). Без where возвращает None.
+    
+    Переменная user_input: Ввод пользователя
+    '''
+    tokens = tokenize(user_input)
+    for pos, (kind, value) in enumerate(tokens):
+        if kind == 'word' and value.lower() == 'where':
+            break
+    else:
+        return None
+
+    tokens = tokens[pos + 1:]
+    for end, (kind, value) in enumerate(tokens):
+        if kind == 'word' and value.lower() in CLAUSE_KEYWORDS:
+            tokens = tokens[:end]
+            break
+
+    where_parser = _WhereParser(tokens)
+    expr = where_parser.expression()
+    if where_parser.pos != len(where_parser.tokens):
+        rest = where_parser.tokens[where_parser.pos][1]
+        raise ValueError(f"Лишний текст в условии where: '{rest}'")
+    return expr
+
+
+def parse_join(user_input: str):
+    '''
+    Функция для разбора соединения select from <t1> join <t2> on <a> = <b>
+    (условие можно взять в скобки). Столбец с названием таблицы
+    (<таблица>.<столбец>) должен относиться к одной из таблиц соединения,
+    а два таких столбца - к разным таблицам.
+    Возвращает (таблица, столбец, столбец) или None без join.
+
+    Переменная user_input: Ввод пользователя
+    '''
+    tokens = tokenize(user_input)
+    words = [
+        value.lower() if kind == 'word' else None for kind, value in tokens
+    ]
+    if 'join' not in words:
+        return None
+
+    pos = words.index('join')
+    usage = "Неверный формат join: join <таблица> on <столбец> = <столбец>"
+    if 'from' not in words[:pos] or words.index('from') + 1 >= pos:
+        raise ValueError("Укажите таблицы: select from <таблица> join <таблица>")
+    left = tokens[words.index('from') + 1][1]
+    if pos + 2 >= len(tokens) or tokens[pos + 1][0] != 'word' or (
+        words[pos + 2] != 'on'
+    ):
+        raise ValueError(usage)
+    right = tokens[pos + 1][1]
+    if right == left:
+        raise ValueError(f"Соединение таблицы {left} с самой собой не поддерживается")
+
+    condition = tokens[pos + 3:]
+    for end, word in enumerate(words[pos + 3:]):
+        if word in ('where',) + CLAUSE_KEYWORDS:
+            condition = condition[:end]
+            break
+    if len(condition) == 5 and condition[0] == ('punct', '(') and (
+        condition[-1] == ('punct', ')')
+    ):
+        condition = condition[1:-1]
+    if (
+        len(condition) != 3 or condition[0][0] != 'word'
+        or condition[1] != ('op', '=') or condition[2][0] != 'word'
+    ):
+        raise ValueError(usage)
+
+    first, second = condition[0][1], condition[2][1]
+    owners = [column.split('.', 1)[0] for column in (first, second) if '.' in column]
+    for owner in owners:
+        if owner not in (left, right):
+            raise ValueError(
+                f"Таблица {owner} из условия on не участвует в соединении "
+                f"({left}, {right})"
+            )
+    if len(owners) == 2 and owners[0] == owners[1]:
+        raise ValueError(
+            f"Условие on должно сравнивать столбцы двух таблиц: "
+            f"{left}.<столбец> = {right}.<столбец>"
+        )
+    return right, first, second
+
+
+def parse_select_options(user_input: str) -> dict:
+    '''
+    Функция для извлечения order by <столбец> [asc|desc], limit <n>
+    и offset <n> из select
+    
+    Переменная user_input: Ввод пользователя
+    '''
+    options = {'order_by': None, 'desc': False, 'limit': None, 'offset': 0}
+    tokens = tokenize(user_input)
+    words = [
+        (kind, value.lower() if kind == 'word' else value)
+        for kind, value in tokens
+    ]
+
+    for pos, (kind, value) in enumerate(words):
+        if kind != 'word':
+            continue
+        if value == 'order' and words[pos + 1:pos + 2] == [('word', 'by')]:
+            if pos + 2 >= len(tokens):
+                raise ValueError("Укажите столбец после order by")
+            options['order_by'] = tokens[pos + 2][1]
+            if words[pos + 3:pos + 4] in ([('word', 'desc')], [('word', 'asc')]):
+                options['desc'] = words[pos + 3][1] == 'desc'
+        elif value in ('limit', 'offset'):
+            if pos + 1 >= len(tokens):
+                raise ValueError(f"Укажите число после {value}")
+            options[value] = _non_negative(tokens[pos + 1][1], value)
+    return options
+
+
+def parse_select_items(user_input: str) -> list:
     '''
-    Функция для извлучения из where
+    Функция для разбора списка выбора select со столбцами и агрегатами:
+    ('column', столбец) или (функция, столбец), например ('count', '*').
+    Для select * возвращает пустой список.
     
-    Переменная args: значения из where
+    Переменная user_input: Ввод пользователя
+    '''
+    tokens = tokenize(user_input)
+    words = [
+        value.lower() if kind == 'word' else None for kind, value in tokens
+    ]
+    end = words.index('from') if 'from' in words else len(tokens)
+    tokens = tokens[1:end]
+
+    items = []
+    pos = 0
+    while pos < len(tokens):
+        kind, value = tokens[pos]
+        if (kind, value) == ('punct', ','):
+            pos += 1
+            continue
+        if kind != 'word':
+            raise ValueError(f"Ожидался столбец, получено '{value}'")
+        if tokens[pos + 1:pos + 2] != [('punct', '(')]:
+            items.append(('column', value))
+            pos += 1
+            continue
+
+        func = value.lower()
+        if func not in AGGREGATES:
+            raise ValueError(
+                f"Неизвестная функция '{value}'. Доступны: {', '.join(AGGREGATES)}"
+            )
+        if len(tokens) < pos + 4 or tokens[pos + 3] != ('punct', ')'):
+            raise ValueError(f"Ожидалось {func}(<столбец>)")
+        column = tokens[pos + 2][1]
+        if column == '*' and func != 'count':
+            raise ValueError(f"{func}(*) не поддерживается")
+        items.append((func, column))
+        pos += 4
+
+    return [] if items == [('column', '*')] else items
+
+
+def parse_group_by(user_input: str):
     '''
-    if 'where' not in args:
-        return {}
+    Функция для извлечения столбца group by <столбец> из select
+    (None - без группировки)
     
+    Переменная user_input: Ввод пользователя
+    '''
+    tokens = tokenize(user_input)
+    for pos, (kind, value) in enumerate(tokens[:-1]):
+        if kind == 'word' and value.lower() == 'group':
+            by_kind, by = tokens[pos + 1]
+            if by_kind == 'word' and by.lower() == 'by':
+                if pos + 2 >= len(tokens):
+                    raise ValueError("Укажите столбец после group by")
+                return tokens[pos + 2][1]
+    return None
+
+
+def _non_negative(value: str, name: str) -> int:
+    '''
+    Функция для разбора неотрицательного целого числа
+    
+    Переменная value: Текст числа
+    Переменная name: Название параметра для сообщения об ошибке
+    '''
     try:
-        idx = args.index('where')
-        col = args[idx + 1]
-        val = args[idx + 3]
-        
-        val = val.strip('"').strip("'")
-        return {col: val}
-    except IndexError:
-        return {}
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} должен быть целым числом, получено '{value}'")
+    if number < 0:
+        raise ValueError(f"{name} не может быть отрицательным")
+    return number
+
+
+def parse_page_size(value: str) -> int:
+    '''
+    Функция для разбора размера страницы вывода
+    
+    Переменная value: Текст числа
+    '''
+    size = _non_negative(value, 'Размер страницы')
+    if size == 0:
+        raise ValueError("Размер страницы должен быть больше нуля")
+    return size
+
+
+def parse_workers(value: str) -> int:
+    '''
+    Функция для разбора количества процессов перебора
+    
+    Переменная value: Текст числа
+    '''
+    count = _non_negative(value, 'Количество процессов')
+    if count == 0:
+        raise ValueError("Количество процессов должно быть больше нуля")
+    return count
+
+
+def parse_select_columns(args: list) -> list:
+    '''
+    Функция для извлечения списка столбцов из select
+    
+    Переменная args: значения команды select
+    '''
+    lowered = [arg.lower() for arg in args]
+    if 'from' not in lowered:
+        return []
+
+    idx = lowered.index('from')
+    columns = ' '.join(args[1:idx]).replace(',', ' ').split()
+    return [] if columns == ['*'] else columns
+
+
+def _split_values(content: str) -> list:
+    '''
+    Функция для разбора значений внутри скобок. Значение ? без кавычек
+    возвращается как Parameter: текст значения в команде берется по позиции
+    лексера до и после него.
+    
+    Переменная content: Текст между скобками
+    '''
+    lexer = shlex.shlex(content, posix=True)
+    lexer.whitespace += ',' 
+    lexer.wordchars += '.'
+    values = []
+    start = 0
+    for value in lexer:
+        end = lexer.instream.tell()
+        if content[start:end].strip(lexer.whitespace) == PLACEHOLDER:
+            value = Parameter(value)
+        values.append(value)
+        start = end
+    return values
+
+
+def parse_assignment(user_input: str, args: list) -> tuple:
+    '''
+    Функция разбора update <таблица> set <столбец> = <значение>.
+    Возвращает (столбец, значение), значение ? без кавычек - Parameter.
+
+    Переменная user_input: Ввод пользователя
+    Переменная args: Слова команды
+    '''
+    value = args[5]
+    tokens = tokenize(user_input)
+    if len(tokens) > 5 and tokens[5] == ('word', PLACEHOLDER):
+        value = Parameter(value)
+    return args[3], value
+
 
 def parse_insert_values(user_input: str) -> list:
     '''
@@ -33,8 +426,28 @@ def parse_insert_values(user_input: str) -> list:
         return []
     
     content = user_input[start+1:end]
+    return _split_values(content)
 
-    lexer = shlex.shlex(content, posix=True)
-    lexer.whitespace += ',' 
-    lexer.wordchars += '.'
-    return list(lexer)
\ No newline at end of file
+
+def parse_insert_rows(user_input: str) -> list:
+    '''
+    Функция для извлечения нескольких записей из
+    insert into <таблица> values (..), (..)
+    
+    Переменная user_input: Ввод пользователя
+    '''
+    rows = []
+    quote = None
+    start = None
+    for pos, char in enumerate(user_input):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ('"', "'"):
+            quote = char
+        elif char == '(' and start is None:
+            start = pos
+        elif char == ')' and start is not None:
+            rows.append(_split_values(user_input[start+1:pos]))
+            start = None
+    return rows
@@ -0,0 +1,329 @@
+# src/primitive_db/planner.py
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.primitive_db import index
+from src.primitive_db.table import Table
+
+# Стоимость доступа в условных единицах на запись:
+# проверка условия у записи-кандидата (скомпилированное условие)
+COST_ROW = 1.0
+# поиск позиции записи по ID из индекса (двоичный поиск)
+COST_FIND = 0.5
+# проверка записи при полном переборе по столбцам (where_mask)
+COST_MASK_ROW = 0.1
+# сравнение при сортировке (умножается на log2 числа записей)
+COST_SORT_ROW = 0.3
+# добавление записи в хеш-таблицу соединения (join)
+COST_BUILD_ROW = 1.0
+
+# Доля подходящих записей, если оценить ее по статистике нельзя:
+# для равенства, для диапазона и для прочих условий (or, !=)
+DEFAULT_EQ_SELECTIVITY = 0.01
+DEFAULT_RANGE_SELECTIVITY = 1 / 3
+DEFAULT_SELECTIVITY = 0.5
+
+# Названия способов доступа для explain
+PATH_NAMES = {
+    'cache': 'cached result',
+    'index': 'index lookup',
+    'range': 'range scan',
+    'ordered': 'ordered index scan',
+    'full': 'full scan',
+}
+
+
+class Plan:
+    '''
+    План доступа к записям: способ (path), столбец, оценки числа
+    записей-кандидатов и результата, стоимость и отвергнутые варианты.
+    Значения (values) или границы (bounds) нужны, чтобы выполнить план.
+    '''
+
+    def __init__(
+        self,
+        path: str,
+        column: Optional[str] = None,
+        candidates: float = 0,
+        cost: float = 0.0,
+        order: Tuple[str, bool] = ('ID', False),
+        values: Optional[List[Any]] = None,
+        bounds: Optional[list] = None
+    ):
+        self.path = path
+        self.column = column
+        self.candidates = candidates
+        self.cost = cost
+        self.order = order
+        self.values = values
+        self.bounds = bounds
+        self.estimate = 0.0
+        self.alternatives: List['Plan'] = []
+
+    def describe(self, indexes: Optional[Dict[str, Any]] = None) -> str:
+        '''
+        Функция описания способа доступа, например "index lookup (age, hash)"
+
+        Переменная indexes: Индексы таблицы (для вида индекса)
+        '''
+        name = PATH_NAMES[self.path]
+        if self.column is None:
+            return name
+        if self.column == 'ID':
+            return f"{name} (ID)"
+        return f"{name} ({self.column}, {index.kind_of((indexes or {})[self.column])})"
+
+
+def sorted_index(indexes: Dict[str, Any], column: str):
+    '''
+    Функция для получения упорядоченного индекса столбца.
+    Для ID возвращает None: записи и так упорядочены по ID.
+
+    Переменная indexes: Индексы таблицы
+    Переменная column: Название столбца
+    '''
+    entries = indexes.get(column)
+    return entries if isinstance(entries, index.SortedIndex) else None
+
+
+def orderable(indexes: Dict[str, Any], column: str) -> bool:
+    '''
+    Функция проверки, можно ли перебрать записи в порядке столбца без сортировки
+
+    Переменная indexes: Индексы таблицы
+    Переменная column: Название столбца
+    '''
+    return column == 'ID' or sorted_index(indexes, column) is not None
+
+
+def analyze(table: Table) -> Dict[str, Any]:
+    '''
+    Функция сбора статистики таблицы для планировщика: число записей
+    и по каждому столбцу число различных значений, минимум и максимум
+
+    Переменная table: Таблица
+    '''
+    columns = {}
+    for name in table.names:
+        values = table.live_values(name)
+        if table.types[name] == 'int' and len(values):
+            low, high = table.column_range(name)
+        elif len(values):
+            low, high = min(values), max(values)
+        else:
+            low = high = None
+        if table.types[name] == 'bool' and low is not None:
+            low, high = bool(low), bool(high)
+        columns[name] = {
+            'distinct': table.live if name == 'ID' else len(set(values)),
+            'min': low,
+            'max': high,
+        }
+    return {'rows': table.live, 'columns': columns}
+
+
+def _column_stats(table: Table, column: str) -> Dict[str, Any]:
+    return ((table.stats or {}).get('columns') or {}).get(column) or {}
+
+
+def _equal_count(
+    table: Table, indexes: Dict[str, Any], column: str, values: List[Any]
+) -> float:
+    '''
+    Функция оценки числа записей с одним из значений столбца:
+    точно по ID или индексу, иначе по числу различных значений
+
+    Переменная table: Таблица
+    Переменная indexes: Индексы таблицы
+    Переменная column: Название столбца
+    Переменная values: Значения
+    '''
+    rows = table.live
+    if column == 'ID':
+        return min(len(set(values)), rows)
+    entries = indexes.get(column)
+    if isinstance(entries, index.SortedIndex):
+        return sum(
+            index.range_count(table, entries, [val, True, val, True])
+            for val in set(values)
+        )
+    if entries is not None:
+        return sum(len(entries.get(str(val), [])) for val in set(values))
+
+    distinct = _column_stats(table, column).get('distinct')
+    if not distinct:
+        distinct = 2 if table.types[column] == 'bool' else (
+            1 / DEFAULT_EQ_SELECTIVITY
+        )
+    return min(rows * len(set(values)) / distinct, rows)
+
+
+def _range_count(
+    table: Table, indexes: Dict[str, Any], column: str, bounds: list
+) -> float:
+    '''
+    Функция оценки числа записей в диапазоне значений столбца:
+    точно по ID или упорядоченному индексу, иначе по минимуму
+    и максимуму из статистики (равномерное распределение)
+
+    Переменная table: Таблица
+    Переменная indexes: Индексы таблицы
+    Переменная column: Название столбца
+    Переменная bounds: Границы [нижняя, включительно, верхняя, включительно]
+    '''
+    rows = table.live
+    if orderable(indexes, column):
+        return index.range_count(table, sorted_index(indexes, column), bounds)
+
+    stats = _column_stats(table, column)
+    low, high = stats.get('min'), stats.get('max')
+    if table.types[column] != 'int' or low is None or high is None:
+        return rows * DEFAULT_RANGE_SELECTIVITY
+    lo = low if bounds[0] is None else max(bounds[0], low)
+    hi = high if bounds[2] is None else min(bounds[2], high)
+    if hi < lo:
+        return 0
+    return rows * (hi - lo + 1) / (high - low + 1)
+
+
+def estimate_groups(table: Table, column: Optional[str], rows: float) -> float:
+    '''
+    Функция оценки числа групп агрегата по числу различных значений столбца
+
+    Переменная table: Таблица
+    Переменная column: Столбец группировки (None - одна группа)
+    Переменная rows: Оценка числа подходящих записей
+    '''
+    if column is None:
+        return 1
+    distinct = _column_stats(table, column).get('distinct')
+    if not distinct:
+        distinct = 2 if table.types.get(column) == 'bool' else rows
+    return min(distinct, rows)
+
+
+def _sort_cost(rows: float, limit: Optional[int]) -> float:
+    '''
+    Функция оценки стоимости сортировки (для limit - выбор через кучу)
+
+    Переменная rows: Число сортируемых записей
+    Переменная limit: Сколько записей нужно
+    '''
+    depth = rows if limit is None else min(rows, limit)
+    return rows * math.log2(max(depth, 2)) * COST_SORT_ROW
+
+
+def choose(
+    table: Table,
+    indexes: Dict[str, Any],
+    equalities: Dict[str, List[Any]],
+    ranges: Dict[str, list],
+    other_terms: int = 0,
+    order_by: Optional[str] = None,
+    desc: bool = False,
+    limit: Optional[int] = None
+) -> Plan:
+    '''
+    Функция выбора самого дешевого способа доступа к записям.
+    Число кандидатов считается точно там, где это дешево (ID, индексы),
+    а доля подходящих записей по остальным столбцам оценивается
+    по статистике analyze (или по долям по умолчанию). Если нужен
+    порядок, отличный от порядка доступа, добавляется стоимость сортировки.
+
+    Переменная table: Таблица (статистика в table.stats)
+    Переменная indexes: Индексы таблицы
+    Переменная equalities: Условия = и IN, объединенные через AND
+    Переменная ranges: Границы сравнений, объединенных через AND
+    Переменная other_terms: Число прочих условий, объединенных через AND
+    Переменная order_by: Столбец сортировки
+    Переменная desc: Сортировка по убыванию
+    Переменная limit: Сколько записей нужно (offset + limit)
+    '''
+    rows = table.live
+    counts: Dict[str, float] = {}
+    for column, values in equalities.items():
+        counts[column] = _equal_count(table, indexes, column, values)
+    for column, bounds in ranges.items():
+        if column not in counts:
+            counts[column] = _range_count(table, indexes, column, bounds)
+
+    selectivity = DEFAULT_SELECTIVITY ** other_terms
+    for count in counts.values():
+        selectivity *= count / rows if rows else 0.0
+    estimate = rows * selectivity
+    wanted = (order_by or 'ID', desc)
+
+    plans = []
+    for column, values in equalities.items():
+        if column == 'ID' or column in indexes:
+            plans.append(Plan(
+                'index', column, counts[column],
+                counts[column] * (COST_FIND + COST_ROW), values=values
+            ))
+    for column, bounds in ranges.items():
+        if orderable(indexes, column) and column != order_by:
+            candidates = _range_count(table, indexes, column, bounds)
+            find = COST_FIND if column != 'ID' else 0.0
+            plans.append(Plan(
+                'range', column, candidates, candidates * (COST_ROW + find),
+                order=(column, False), bounds=bounds
+            ))
+    if order_by is not None and orderable(indexes, order_by):
+        bounds = ranges.get(order_by)
+        candidates = rows
+        if bounds is not None:
+            candidates = _range_count(table, indexes, order_by, bounds)
+        scanned = candidates
+        if limit is not None and candidates:
+            # Перебор в порядке индекса останавливается на limit
+            scanned = min(candidates, limit * candidates / max(estimate, 1))
+        find = COST_FIND if order_by != 'ID' else 0.0
+        plans.append(Plan(
+            'ordered', order_by, scanned, scanned * (COST_ROW + find),
+            order=(order_by, desc), bounds=bounds
+        ))
+
+    if limit is not None and wanted == ('ID', False):
+        # Перебор по порядку с проверкой каждой записи останавливается на limit
+        scanned = min(rows, limit * rows / max(estimate, 1))
+        plans.append(Plan('full', None, scanned, scanned * COST_ROW))
+    else:
+        plans.append(Plan('full', None, rows, rows * COST_MASK_ROW))
+
+    for plan in plans:
+        plan.estimate = min(estimate, plan.candidates) if (
+            plan.path != 'ordered'
+        ) else estimate
+        if plan.order != wanted:
+            plan.cost += _sort_cost(plan.estimate, limit)
+
+    best = min(plans, key=lambda plan: plan.cost)
+    best.alternatives = [plan for plan in plans if plan is not best]
+    return best
+
+
+def choose_join(access: List[Plan], indexed: List[bool]) -> Tuple[str, int]:
+    '''
+    Функция выбора способа соединения двух таблиц по равенству столбцов.
+    Возвращает ('hash', сторона) - хеш-таблица строится на стороне с меньшей
+    оценкой числа записей, а другая сторона перебирается через нее,
+    или ('index', сторона) - перебирается другая сторона, а записи этой
+    стороны ищутся по индексу столбца соединения (для ID - по самой таблице).
+
+    Переменная access: Планы доступа к записям левой и правой таблицы
+    Переменная indexed: Есть ли индекс на столбце соединения каждой стороны
+    '''
+    rows = [plan.estimate for plan in access]
+    build = 0 if rows[0] <= rows[1] else 1
+    best = ('hash', build)
+    best_cost = (
+        access[0].cost + access[1].cost
+        + rows[build] * COST_BUILD_ROW + rows[1 - build] * COST_ROW
+    )
+    for side in (0, 1):
+        other = 1 - side
+        cost = access[other].cost + rows[other] * (COST_FIND + COST_ROW)
+        if indexed[side] and cost < best_cost:
+            best, best_cost = ('index', side), cost
+    return best
@@ -0,0 +1,255 @@
+# src/primitive_db/server.py
+
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from src.primitive_db import core
+from src.primitive_db.catalog import Catalog
+from src.primitive_db.constants import SERVER_WORKERS
+from src.primitive_db.decorators import set_confirmations
+from src.primitive_db.engine import Session, execute, recover, resolve
+from src.primitive_db.locks import LockTable, lock_data_dir
+
+# Команды, которые только читают таблицу (выполняются одновременно)
+READ_COMMANDS = {'select', 'explain', 'info', 'export'}
+
+# Команды, которые изменяют одну таблицу
+WRITE_COMMANDS = {'insert', 'update', 'delete', 'import', 'compact', 'vacuum'}
+
+# Команды, которые не обращаются к таблицам
+SESSION_COMMANDS = {
+    'help', 'pager', 'cache', 'stats', 'list_tables', 'exit', 'prepare', 'deallocate'
+}
+
+# Транзакции изменяют общий кэш таблиц, поэтому на сервере недоступны
+TRANSACTION_COMMANDS = {'begin', 'commit', 'rollback'}
+
+
+def encode_response(text: str) -> bytes:
+    '''
+    Функция упаковки ответа: строка с длиной в байтах, затем текст
+
+    Переменная text: Вывод команды
+    '''
+    payload = text.encode('utf-8')
+    return f"{len(payload)}\n".encode('ascii') + payload
+
+
+def command_lock(args: List[str]) -> Tuple[str, List[str]]:
+    '''
+    Функция выбора блокировки для команды: ('read' | 'write', таблицы)
+    или ('schema', []) для команд, изменяющих схему базы.
+    select с join читает обе таблицы.
+
+    Переменная args: Слова команды
+    '''
+    command = args[0].lower()
+    if command in SESSION_COMMANDS:
+        return 'read', []
+
+    table_names = []
+    if command in ('select', 'explain'):
+        lowered = [arg.lower() for arg in args]
+        for keyword in ('from', 'join'):
+            if keyword in lowered[:-1]:
+                table_names.append(args[lowered.index(keyword) + 1])
+    elif command in ('insert', 'delete'):
+        table_names = args[2:3]
+    elif len(args) > 1:
+        table_names = args[1:2]
+
+    if command in READ_COMMANDS:
+        return 'read', table_names
+    if command in WRITE_COMMANDS:
+        return 'write', table_names
+    return 'schema', []
+
+
+class ThreadOutput(io.TextIOBase):
+    '''
+    Замена sys.stdout для сервера: команды печатают результат через print,
+    поэтому вывод каждого потока собирается в его собственный буфер.
+    Вне команды вывод идет в исходный поток.
+    '''
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._local = threading.local()
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer or self._fallback).write(text)
+
+    def flush(self) -> None:
+        if getattr(self._local, 'buffer', None) is None:
+            self._fallback.flush()
+
+    @contextlib.contextmanager
+    def capture(self) -> Iterator[io.StringIO]:
+        '''
+        Контекст сбора вывода текущего потока
+        '''
+        self._local.buffer = io.StringIO()
+        try:
+            yield self._local.buffer
+        finally:
+            self._local.buffer = None
+
+
+class Server:
+    '''
+    Сервер базы данных: владеет кэшем таблиц (Catalog) и выполняет команды
+    клиентов. Соединения обслуживает asyncio, а сами команды выполняются
+    в пуле потоков под блокировками LockTable: select разных клиентов идут
+    одновременно, изменения таблицы - по одному, а изменения схемы ждут
+    все остальные команды. Каждое соединение - отдельный сеанс (Session).
+
+    Протокол: клиент отправляет команду одной строкой, сервер отвечает
+    строкой с длиной вывода в байтах и самим выводом.
+    '''
+
+    def __init__(self, catalog: Catalog, workers: int = SERVER_WORKERS):
+        '''
+        Переменная catalog: Кэш таблиц
+        Переменная workers: Количество потоков для команд
+        '''
+        self.catalog = catalog
+        self.locks = LockTable()
+        self.output = ThreadOutput(sys.stdout)
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self.clients = 0
+        # Открытые соединения: закрываются при остановке сервера
+        self._writers = set()
+
+    def run_command(self, session: Session, raw_input: str) -> Tuple[str, bool]:
+        '''
+        Функция выполнения команды клиента в потоке пула.
+        Возвращает вывод команды и False, если клиент завершил сеанс.
+
+        Переменная session: Сеанс клиента
+        Переменная raw_input: Текст команды
+        '''
+        proceed = True
+        with self.output.capture() as buffer:
+            try:
+                # Разбор (из кэша) и подстановка параметров execute нужны
+                # до выполнения: по ним выбирается блокировка
+                statement = resolve(session, raw_input)
+                if statement is None:
+                    return buffer.getvalue(), proceed
+                if statement.command in TRANSACTION_COMMANDS:
+                    print("Ошибка: Транзакции недоступны в режиме сервера.")
+                else:
+                    mode, table_names = command_lock(statement.args)
+                    with self.locks.hold(mode, *table_names):
+                        proceed = execute(session, statement)
+            except Exception as e:
+                print(f"Произошла ошибка: {e}")
+        return buffer.getvalue(), proceed
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        '''
+        Функция обслуживания одного соединения
+
+        Переменная reader: Поток чтения
+        Переменная writer: Поток записи
+        '''
+        loop = asyncio.get_running_loop()
+        session = Session(self.catalog, interactive=False)
+        self.clients += 1
+        self._writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                raw_input = line.decode('utf-8').strip()
+                if not raw_input:
+                    writer.write(encode_response(''))
+                    await writer.drain()
+                    continue
+
+                text, proceed = await loop.run_in_executor(
+                    self._executor, self.run_command, session, raw_input
+                )
+                writer.write(encode_response(text))
+                await writer.drain()
+                if not proceed:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            self._writers.discard(writer)
+            writer.close()
+
+    async def serve(
+        self, host: str, port: int, socket_path: Optional[str] = None
+    ) -> None:
+        '''
+        Функция запуска сервера до остановки процесса
+
+        Переменная host: Адрес TCP
+        Переменная port: Порт TCP
+        Переменная socket_path: Путь до Unix-сокета (вместо TCP)
+        '''
+        if socket_path:
+            server = await asyncio.start_unix_server(self.handle, path=socket_path)
+            address = socket_path
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            address = ', '.join(
+                '%s:%s' % sock.getsockname()[:2] for sock in server.sockets
+            )
+        print(f"Сервер базы данных слушает {address}. Остановка - Ctrl+C.")
+        async with server:
+            try:
+                await server.serve_forever()
+            finally:
+                # С Python 3.12 закрытие сервера ждет все соединения,
+                # поэтому соединения клиентов закрываются сразу
+                for writer in list(self._writers):
+                    writer.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+def run_server(host: str, port: int, socket_path: Optional[str] = None) -> None:
+    '''
+    Функция режима сервера (database serve).
+    Каталог данных блокируется, чтобы другой процесс database не изменил
+    таблицы, пока сервер держит их в памяти.
+
+    Переменная host: Адрес TCP
+    Переменная port: Порт TCP
+    Переменная socket_path: Путь до Unix-сокета (вместо TCP)
+    '''
+    lock = lock_data_dir(exclusive=True)
+    if lock is None:
+        print("Ошибка: База данных уже используется другим процессом.")
+        return
+
+    set_confirmations(False)
+    recover()
+    server = Server(Catalog(on_reload=core.select_cache.invalidate))
+    stdout, sys.stdout = sys.stdout, server.output
+    try:
+        asyncio.run(server.serve(host, port, socket_path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sys.stdout = stdout
+        server.close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+        lock.close()
+        print("Сервер остановлен.")
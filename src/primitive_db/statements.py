@@ -0,0 +1,362 @@
+# src/primitive_db/statements.py
+
+import copy
+import re
+import shlex
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.primitive_db import parser
+from src.primitive_db.constants import STATEMENT_CACHE_SIZE
+from src.primitive_db.core import cast_value
+from src.primitive_db.metrics import registry
+
+# Команды, которые можно подготовить (prepare)
+PREPARABLE_COMMANDS = {'select', 'insert', 'update', 'delete'}
+
+# Строка в кавычках или пробелы между словами (для ключа кэша)
+_SPACES_RE = re.compile(r'''("[^"]*"|'[^']*')|\s+''')
+
+# prepare <имя> as <команда>
+_PREPARE_RE = re.compile(
+    r'^\s*prepare\s+(\S+)\s+as\s+(.+)$', re.IGNORECASE | re.DOTALL
+)
+
+
+class Statement:
+    '''
+    Разобранная команда: слова команды (как shlex.split) и название таблицы,
+    а для select, insert, update и delete - условие where, список выбора,
+    join, group by, order by/limit/offset, значения insert и присваивание update.
+    Один объект используют все сеансы (кэш разбора), поэтому после
+    разбора он не изменяется: подстановка параметров создает копию.
+    '''
+
+    def __init__(self, text: str, args: List[str]):
+        '''
+        Переменная text: Текст команды
+        Переменная args: Слова команды
+        '''
+        self.text = text
+        self.args = args
+        self.command = args[0].lower()
+        self.explain = False
+        self.table: Optional[str] = None
+        self.where: Optional[tuple] = None
+        self.items: List[Tuple[str, str]] = []
+        self.group_by: Optional[str] = None
+        # select ... join: (таблица, столбец, столбец) из условия on
+        self.join: Optional[Tuple[str, str, str]] = None
+        self.columns: List[str] = []
+        self.options: Dict[str, Any] = {}
+        self.rows: List[List[str]] = []
+        # update: (столбец, значение)
+        self.assignment: Optional[Tuple[str, str]] = None
+
+    @property
+    def aggregate(self) -> bool:
+        '''
+        select с агрегатами или group by
+        '''
+        return self.group_by is not None or any(
+            func != 'column' for func, _ in self.items
+        )
+
+
+def parse(text: str) -> Statement:
+    '''
+    Функция разбора команды. Текст делится на слова один раз, а части
+    select, insert, update и delete разбираются сразу, поэтому при выполнении
+    команды из кэша разбора текст больше не читается.
+    explain select ... разбирается как select с отметкой explain.
+
+    Переменная text: Текст команды
+    '''
+    args = shlex.split(text)
+    if not args:
+        raise ValueError("Пустая команда")
+    statement = Statement(text, args)
+    if (
+        statement.command == 'explain' and len(args) > 1
+        and args[1].lower() == 'select'
+    ):
+        statement = Statement(text.strip()[len('explain'):].strip(), args[1:])
+        statement.explain = True
+
+    command, args, text = statement.command, statement.args, statement.text
+    if command == 'select':
+        lowered = [arg.lower() for arg in args]
+        if 'from' in lowered and lowered.index('from') + 1 < len(args):
+            statement.table = args[lowered.index('from') + 1]
+            statement.items = parser.parse_select_items(text)
+            statement.join = parser.parse_join(text)
+            statement.group_by = parser.parse_group_by(text)
+            statement.where = parser.parse_where(text)
+            statement.columns = parser.parse_select_columns(args)
+            statement.options = parser.parse_select_options(text)
+    elif command == 'insert' and len(args) >= 3:
+        statement.table = args[2]
+        statement.rows = parser.parse_insert_rows(text)
+    elif command == 'update' and len(args) >= 6:
+        statement.table = args[1]
+        statement.assignment = parser.parse_assignment(text, args)
+        statement.where = parser.parse_where(text)
+    elif command == 'delete' and len(args) >= 3:
+        statement.table = args[2]
+        statement.where = parser.parse_where(text)
+    return statement
+
+
+def normalize(text: str) -> str:
+    '''
+    Функция приведения текста команды к ключу кэша разбора:
+    пробелы вне кавычек сводятся к одному, ; в конце отбрасывается.
+    Текст с обратной косой чертой не изменяется (кавычки внутри строк).
+
+    Переменная text: Текст команды
+    '''
+    text = text.strip().rstrip(';').strip()
+    if '\\' in text:
+        return text
+    return _SPACES_RE.sub(lambda match: match.group(1) or ' ', text)
+
+
+class StatementCache:
+    '''
+    Кэш разобранных команд с вытеснением давно не использованных (LRU).
+    Ключ - текст команды после normalize, поэтому команды, отличающиеся
+    только пробелами, разбираются один раз. Частые одинаковые команды
+    из скриптов и от клиентов сервера не разбираются повторно.
+    Методы можно вызывать из нескольких потоков (режим сервера).
+    '''
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def parse(self, text: str) -> Statement:
+        '''
+        Функция получения разобранной команды из кэша или ее разбора.
+        Команды с ошибкой разбора в кэш не попадают.
+
+        Переменная text: Текст команды
+        '''
+        key = normalize(text)
+        with self._lock:
+            statement = self._entries.get(key)
+            if statement is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return statement
+            self.misses += 1
+
+        statement = parse(key)
+        with self._lock:
+            self._entries[key] = statement
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return statement
+
+    def clear(self) -> None:
+        '''
+        Функция очистки кэша
+        '''
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        '''
+        Функция для получения статистики кэша
+        '''
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+    def reset_counters(self) -> None:
+        '''
+        Функция сброса счетчиков попаданий и промахов
+        '''
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+statement_cache = StatementCache(STATEMENT_CACHE_SIZE)
+registry.register(
+    'statement_cache', statement_cache.stats, statement_cache.reset_counters
+)
+
+
+def _where_parameters(expr: Optional[tuple], types: Dict[str, str]) -> List[str]:
+    '''
+    Функция для получения столбцов параметров условия в порядке текста
+
+    Переменная expr: Дерево условия
+    Переменная types: Типы столбцов
+    '''
+    if not expr:
+        return []
+    kind = expr[0]
+    if kind == 'cmp':
+        literals = [(expr[1], expr[3])]
+    elif kind == 'in':
+        literals = [(expr[1], raw) for raw in expr[2]]
+    else:
+        return [
+            column for item in expr[1] for column in _where_parameters(item, types)
+        ]
+    columns = [
+        column for column, raw in literals if isinstance(raw, parser.Parameter)
+    ]
+    for column in columns:
+        if column not in types:
+            raise KeyError(f'Столбец "{column}" не найден.')
+    return columns
+
+
+def _bind_where(expr: Optional[tuple], values: Iterator[str]) -> Optional[tuple]:
+    '''
+    Функция подстановки значений параметров в дерево условия
+
+    Переменная expr: Дерево условия
+    Переменная values: Значения параметров по порядку
+    '''
+    if not expr:
+        return expr
+    kind = expr[0]
+    if kind == 'cmp':
+        _, column, op, raw = expr
+        if isinstance(raw, parser.Parameter):
+            raw = next(values)
+        return (kind, column, op, raw)
+    if kind == 'in':
+        _, column, raws = expr
+        return (kind, column, [
+            next(values) if isinstance(raw, parser.Parameter) else raw for raw in raws
+        ])
+    return (kind, [_bind_where(item, values) for item in expr[1]])
+
+
+class Prepared:
+    '''
+    Подготовленная команда (prepare <имя> as <команда>): команда разобрана
+    один раз, а столбец и тип каждого параметра ? найдены по схеме таблицы.
+    execute <имя> (<значения>) проверяет значения по этим типам
+    и подставляет их в копию разобранной команды.
+    '''
+
+    def __init__(self, statement: Statement, schema: List[Dict[str, str]]):
+        '''
+        Переменная statement: Разобранная команда
+        Переменная schema: Столбцы таблицы
+        '''
+        self.statement = statement
+        self.schema = schema
+        self.parameters = self._parameters()
+
+    def _parameters(self) -> List[Tuple[str, str]]:
+        '''
+        Функция для получения столбцов и типов параметров в порядке текста:
+        значение update, значения insert, затем условие where
+        '''
+        statement = self.statement
+        types = {col['name']: col['type'] for col in self.schema}
+        columns = []
+        if statement.assignment is not None:
+            column, raw = statement.assignment
+            if column not in types:
+                raise KeyError(f'Столбец "{column}" не найден.')
+            if isinstance(raw, parser.Parameter):
+                columns.append(column)
+        value_columns = [col['name'] for col in self.schema[1:]]
+        for row in statement.rows:
+            if len(row) != len(value_columns):
+                raise ValueError(
+                    f"Ожидалось {len(value_columns)} значений, получено {len(row)}"
+                )
+            columns += [
+                name for name, raw in zip(value_columns, row)
+                if isinstance(raw, parser.Parameter)
+            ]
+        columns += _where_parameters(statement.where, types)
+        return [(column, types[column]) for column in columns]
+
+    def bind(self, values: List[str]) -> Statement:
+        '''
+        Функция подстановки значений параметров.
+        Возвращает копию команды со значениями вместо ?.
+
+        Переменная values: Значения параметров
+        '''
+        if len(values) != len(self.parameters):
+            raise ValueError(
+                f"Ожидалось параметров: {len(self.parameters)}, "
+                f"получено {len(values)}"
+            )
+        for number, (value, (column, col_type)) in enumerate(
+            zip(values, self.parameters), 1
+        ):
+            try:
+                cast_value(value, col_type)
+            except ValueError as e:
+                raise ValueError(f"Параметр {number} ({column}): {e}")
+
+        statement = copy.copy(self.statement)
+        remaining = iter(values)
+        if statement.assignment is not None:
+            column, raw = statement.assignment
+            if isinstance(raw, parser.Parameter):
+                statement.assignment = (column, next(remaining))
+        statement.rows = [
+            [
+                next(remaining) if isinstance(raw, parser.Parameter) else raw
+                for raw in row
+            ]
+            for row in statement.rows
+        ]
+        statement.where = _bind_where(statement.where, remaining)
+        return statement
+
+
+def parse_prepare(text: str) -> Tuple[str, Statement]:
+    '''
+    Функция разбора prepare <имя> as <команда>.
+    Возвращает имя и разобранную команду.
+
+    Переменная text: Текст команды prepare
+    '''
+    match = _PREPARE_RE.match(text)
+    if match is None:
+        raise ValueError("Используйте prepare <имя> as <команда>")
+    name, body = match.groups()
+    statement = statement_cache.parse(body)
+    if statement.command not in PREPARABLE_COMMANDS:
+        raise ValueError(
+            f"Подготовить можно только {', '.join(sorted(PREPARABLE_COMMANDS))}"
+        )
+    if statement.table is None:
+        raise ValueError(f"Не указана таблица в команде {statement.command}")
+    if statement.join is not None:
+        raise ValueError("select с join подготовить нельзя")
+    return name, statement
+
+
+def parse_execute(statement: Statement) -> Tuple[str, List[str]]:
+    '''
+    Функция разбора execute <имя> [(<значение1>, ..)].
+    Возвращает имя подготовленной команды и значения параметров.
+
+    Переменная statement: Разобранная команда execute
+    '''
+    if len(statement.args) < 2:
+        raise ValueError("Используйте execute <имя> (<значение1>, ..)")
+    return statement.args[1], parser.parse_insert_values(statement.text)
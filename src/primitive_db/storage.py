@@ -0,0 +1,1328 @@
+# src/primitive_db/storage.py
+
+import bisect
+import itertools
+import json
+import mmap
+import os
+import struct
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+)
+
+from src.primitive_db.constants import (
+    DATA_DIR,
+    LOG_COMPACT_MIN_RECORDS,
+    LOG_COMPACT_RATIO,
+    LOG_TAIL_CHUNK,
+    SEGMENT_ROWS,
+)
+from src.primitive_db.metrics import registry
+from src.primitive_db.table import Table
+
+# Кодировщик записей журнала (создается один раз, а не при каждом dumps)
+_encode_record = json.JSONEncoder(ensure_ascii=False).encode
+
+# Изменение таблицы:
+# ('insert', row) | ('update', row_id, values) | ('delete', row_id)
+# | ('insert_many', columns, rows) - много записей списками значений столбцов
+Change = Tuple[Any, ...]
+
+# Шаг фиксации изменений (см. journal.py):
+# {'op': 'replace', 'src': путь, 'dst': путь} - заменить файл подготовленным,
+# {'op': 'append', 'path': путь, 'size': размер, 'text': строки} - дописать
+# строки к файлу, обрезав его до прежнего размера,
+# {'op': 'remove', 'path': путь} - удалить файл
+Step = Dict[str, Any]
+
+
+def row_count(data: Iterable[Dict[str, Any]]) -> int:
+    '''
+    Функция подсчета записей, которые будут записаны (у таблицы -
+    только живые, удаленные записи не сохраняются)
+
+    Переменная data: Таблица или список записей
+    '''
+    return data.live if isinstance(data, Table) else len(data)
+
+
+def fsync_dir(dirpath: str) -> None:
+    '''
+    Функция сброса на диск записи каталога (после переименования
+    или удаления файла)
+
+    Переменная dirpath: Путь до каталога
+    '''
+    try:
+        fd = os.open(dirpath, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def file_size(f) -> int:
+    '''
+    Функция для получения размера открытого файла в байтах
+
+    Переменная f: Открытый файл
+    '''
+    return os.fstat(f.fileno()).st_size
+
+
+def write_file(
+    filepath: str, write: Callable[[IO], None], binary: bool = False
+) -> None:
+    '''
+    Функция записи файла со сбросом на диск (fsync)
+
+    Переменная filepath: Путь до файла
+    Переменная write: Функция, записывающая содержимое в открытый файл
+    Переменная binary: Файл открывается в двоичном режиме
+    '''
+    with (
+        open(filepath, 'wb') if binary else open(filepath, 'w', encoding='utf-8')
+    ) as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+        registry.add('bytes_written', file_size(f))
+
+
+def atomic_write(
+    filepath: str, write: Callable[[IO], None], binary: bool = False
+) -> None:
+    '''
+    Функция атомарной записи файла: содержимое пишется во временный файл,
+    сбрасывается на диск и переименовывается поверх старого. После сбоя
+    остается либо старый, либо новый файл, но не недописанный.
+
+    Переменная filepath: Путь до файла
+    Переменная write: Функция, записывающая содержимое в открытый файл
+    Переменная binary: Файл открывается в двоичном режиме
+    '''
+    tmp_path = filepath + '.tmp'
+    write_file(tmp_path, write, binary)
+    os.replace(tmp_path, filepath)
+    fsync_dir(os.path.dirname(filepath))
+
+
+def prepare_replace(
+    filepath: str, write: Callable[[IO], None], binary: bool = False
+) -> Step:
+    '''
+    Функция подготовки замены файла: новое содержимое записывается рядом
+    (<файл>.new), а сама замена выполняется при фиксации
+
+    Переменная filepath: Путь до файла
+    Переменная write: Функция, записывающая содержимое в открытый файл
+    Переменная binary: Файл открывается в двоичном режиме
+    '''
+    new_path = filepath + '.new'
+    write_file(new_path, write, binary)
+    return {'op': 'replace', 'src': new_path, 'dst': filepath}
+
+
+class JsonStorage:
+    '''
+    Хранилище в виде одного json файла data/<имя_таблицы>.json.
+    Любое изменение переписывает файл целиком.
+    '''
+    name = 'json'
+    extension = '.json'
+
+    def _write(self, f: TextIO, data: List[Dict[str, Any]]) -> None:
+        json.dump(list(data), f, indent=4, ensure_ascii=False)
+
+    def path(self, table_name: str) -> str:
+        '''
+        Функция для получения пути до файла таблицы
+
+        Переменная table_name: Название таблицы
+        '''
+        return os.path.join(DATA_DIR, f"{table_name}{self.extension}")
+
+    def stamp(self, table_name: str) -> List[int]:
+        '''
+        Функция для получения отпечатка файла таблицы (размер и время изменения)
+
+        Переменная table_name: Название таблицы
+        '''
+        try:
+            stat = os.stat(self.path(table_name))
+        except FileNotFoundError:
+            return [0, 0]
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def load(self, table_name: str) -> List[Dict[str, Any]]:
+        '''
+        Функция для загрузки записей таблицы
+
+        Переменная table_name: Название таблицы
+        '''
+        try:
+            with open(self.path(table_name), 'r', encoding='utf-8') as f:
+                registry.add('bytes_read', file_size(f))
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+
+    def load_table(self, table_name: str, schema: List[Dict[str, str]]) -> Table:
+        '''
+        Функция для загрузки таблицы по столбцам
+
+        Переменная table_name: Название таблицы
+        Переменная schema: Столбцы таблицы из метаданных
+        '''
+        return Table.from_rows(schema, self.load(table_name))
+
+    def load_part(
+        self,
+        table_name: str,
+        schema: List[Dict[str, str]],
+        low: Any,
+        high: Any,
+        columns: Optional[List[str]] = None
+    ) -> Optional[Table]:
+        '''
+        Функция для загрузки части таблицы: записи с ID от low до high
+        (None - без границы) и только нужные столбцы, если хранилище умеет
+        их пропускать. Возвращает None, если пропустить ничего нельзя.
+
+        Переменная table_name: Название таблицы
+        Переменная schema: Столбцы таблицы из метаданных
+        Переменная low: Наименьший ID
+        Переменная high: Наибольший ID
+        Переменная columns: Нужные столбцы (None - все)
+        '''
+        rows = self.load_range(table_name, low, high)
+        return None if rows is None else Table.from_rows(schema, rows)
+
+    def load_range(
+        self, table_name: str, low: Any, high: Any
+    ) -> Optional[List[Dict[str, Any]]]:
+        '''
+        Функция для загрузки только записей с ID от low до high
+        (None - без границы). Возвращает None, если хранилище читается
+        только целиком или диапазон не позволяет пропустить часть файлов.
+
+        Переменная table_name: Название таблицы
+        Переменная low: Наименьший ID
+        Переменная high: Наибольший ID
+        '''
+        return None
+
+    def files(self, table_name: str) -> List[str]:
+        '''
+        Функция для получения всех файлов таблицы (для удаления)
+
+        Переменная table_name: Название таблицы
+        '''
+        return [self.path(table_name)]
+
+    def save(
+        self,
+        table_name: str,
+        data: List[Dict[str, Any]],
+        changes: Optional[List[Change]] = None
+    ) -> None:
+        '''
+        Функция для сохранения записей таблицы
+
+        Переменная table_name: Название таблицы
+        Переменная data: Все записи таблицы
+        Переменная changes: Список изменений (для json не используется)
+        '''
+        os.makedirs(DATA_DIR, exist_ok=True)
+        atomic_write(self.path(table_name), lambda f: self._write(f, data))
+
+    def prepare(
+        self,
+        table_name: str,
+        data: List[Dict[str, Any]],
+        changes: Optional[List[Change]] = None
+    ) -> List[Step]:
+        '''
+        Функция подготовки сохранения для фиксации через журнал:
+        новый файл записывается рядом, а старый заменяется при фиксации
+
+        Переменная table_name: Название таблицы
+        Переменная data: Все записи таблицы
+        Переменная changes: Список изменений (для json не используется)
+        '''
+        os.makedirs(DATA_DIR, exist_ok=True)
+        return [
+            prepare_replace(self.path(table_name), lambda f: self._write(f, data))
+        ]
+
+    def compact(self, table_name: str, data: List[Dict[str, Any]]) -> bool:
+        '''
+        Функция сжатия хранилища. Файл json всегда компактен.
+
+        Переменная table_name: Название таблицы
+        Переменная data: Все записи таблицы
+        '''
+        return False
+
+    def reclaimable(
+        self, table_name: str, data: List[Dict[str, Any]]
+    ) -> Optional[Tuple[int, int]]:
+        '''
+        Функция оценки места в файлах таблицы, которое освободит сжатие:
+        (лишнее, всего) в единицах хранилища. Считается по файлам, поэтому
+        сохраняется после перезапуска, а отложенные изменения не учитываются.
+        None - освобождать нечего: файл json переписывается целиком
+        и удаленных записей не содержит.
+
+        Переменная table_name: Название таблицы
+        Переменная data: Все записи таблицы
+        '''
+        return None
+
+    def drop(self, table_name: str) -> None:
+        '''
+        Функция для удаления файла таблицы
+
+        Переменная table_name: Название таблицы
+        '''
+        try:
+            os.remove(self.path(table_name))
+        except FileNotFoundError:
+            pass
+
+    def reset(self) -> None:
+        '''
+        Функция сброса состояния хранилища в памяти: следующее обращение
+        к таблицам заново читает файлы (как после перезапуска процесса).
+        Хранилище json состояния между вызовами не держит.
+        '''
+
+
+class LogStorage(JsonStorage):
+    '''
+    Хранилище в виде журнала data/<имя_таблицы>.log.
+    Каждая строка - одна операция insert/update/delete в формате json
+    (или insert_many - часть записей, загруженная за раз),
+    при загрузке журнал проигрывается с начала. Изменения только дописываются
+    в конец файла, а устаревшие записи убираются сжатием.
+    '''
+    name = 'log'
+    extension = '.log'
+
+    def __init__(self):
+        # Количество операций с записями в журнале на момент последней
+        # загрузки/записи (insert_many считается по числу записей)
+        self._records: Dict[str, int] = {}
+
+    def load(self, table_name: str) -> List[Dict[str, Any]]:
+        rows: Dict[Any, Dict[str, Any]] = {}
+        records = 0
+        try:
+            with open(self.path(table_name), 'r', encoding='utf-8') as f:
+                registry.add('bytes_read', file_size(f))
+                for line in f:
+                    if not line.endswith('\n'):
+                        # Недописанная строка после сбоя (запись считается
+                        # сделанной вместе с переводом строки) - пропускаем
+                        break
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Поврежденная строка - пропускаем
+                        continue
+                    records += self._replay(rows, record)
+        except FileNotFoundError:
+            pass
+
+        self._records[table_name] = records
+        return list(rows.values())
+
+    @staticmethod
+    def _replay(rows: Dict[Any, Dict[str, Any]], record: Dict[str, Any]) -> int:
+        '''
+        Функция применения одной записи журнала.
+        Возвращает количество затронутых записей таблицы.
+
+        Переменная rows: Записи таблицы по ID
+        Переменная record: Запись журнала
+        '''
+        op = record.get('op')
+        if op == 'insert':
+            row = record['row']
+            rows[row['ID']] = row
+        elif op == 'update':
+            row = rows.get(record['id'])
+            if row is not None:
+                row.update(record['values'])
+        elif op == 'delete':
+            rows.pop(record['id'], None)
+        elif op == 'insert_many':
+            columns = record['columns']
+            for values in record['rows']:
+                row = dict(zip(columns, values))
+                rows[row['ID']] = row
+            return len(record['rows'])
+        return 1
+
+    @staticmethod
+    def _encode(change: Change) -> Dict[str, Any]:
+        '''
+        Функция преобразования изменения в запись журнала
+
+        Переменная change: Изменение таблицы
+        '''
+        op = change[0]
+        if op == 'insert':
+            return {'op': 'insert', 'row': change[1]}
+        if op == 'update':
+            return {'op': 'update', 'id': change[1], 'values': change[2]}
+        if op == 'delete':
+            return {'op': 'delete', 'id': change[1]}
+        if op == 'insert_many':
+            return {'op': 'insert_many', 'columns': change[1], 'rows': change[2]}
+        raise ValueError(f"Неизвестная операция журнала '{op}'")
+
+    def save(
+        self,
+        table_name: str,
+        data: List[Dict[str, Any]],
+        changes: Optional[List[Change]] = None
+    ) -> None:
+        if changes is None:
+            self.compact(table_name, data)
+            return
+
+        os.makedirs(DATA_DIR, exist_ok=True)
+        lines = [_encode_record(self._encode(change)) + '\n' for change in changes]
+        path = self.path(table_name)
+        complete = self._complete_size(path)
+        with open(path, 'a', encoding='utf-8') as f:
+            if file_size(f) > complete:
+                # Недописанная строка после сбоя: иначе новая строка
+                # продолжит ее, и обе будут пропущены при загрузке
+                f.truncate(complete)
+            size = file_size(f)
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+            registry.add('bytes_written', file_size(f) - size)
+
+        if self._count(table_name, changes) and self._needs_compaction(
+            table_name, row_count(data)
+        ):
+            self.compact(table_name, data)
+
+    def prepare(
+        self,
+        table_name: str,
+        data: List[Dict[str, Any]],
+        changes: Optional[List[Change]] = None
+    ) -> List[Step]:
+        '''
+        Функция подготовки сохранения для фиксации через журнал.
+        Новые строки журнала таблицы запоминаются вместе с его текущим
+        размером: при повторной фиксации после сбоя файл обрезается до этого
+        размера, поэтому строки не допишутся дважды. Недописанная последняя
+        строка в размер не входит и тоже обрезается.
+
+        Переменная table_name: Название таблицы
+        Переменная data: Все записи таблицы
+        Переменная changes: Список изменений (None - переписать журнал)
+        '''
+        os.makedirs(DATA_DIR, exist_ok=True)
+        path = self.path(table_name)
+        if changes is None:
+            self._records[table_name] = row_count(data)
+            return [prepare_replace(path, lambda f: self._write_rows(f, data))]
+
+        self._count(table_name, changes)
+        size = self._complete_size(path)
+        text = ''.join(
+            _encode_record(self._encode(change)) + '\n' for change in changes
+        )
+        return [{'op': 'append', 'path': path, 'size': size, 'text': text}]
+
+    @staticmethod
+    def _complete_size(path: str) -> int:
+        '''
+        Функция для получения размера журнала без недописанной последней
+        строки (после сбоя во время записи): до последнего перевода строки
+
+        Переменная path: Путь до журнала
+        '''
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return 0
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            while end > 0:
+                start = max(end - LOG_TAIL_CHUNK, 0)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b'\n')
+                if newline != -1:
+                    return start + newline + 1
+                end = start
+        return 0
+
+    def _count(self, table_name: str, changes: List[Change]) -> bool:
+        '''
+        Функция учета дописанных записей для порога сжатия.
+        Возвращает False, если журнал таблицы еще не загружался.
+
+        Переменная table_name: Название таблицы
+        Переменная changes: Дописанные изменения
+        '''
+        if table_name not in self._records:
+            return False
+        self._records[table_name] += sum(
+            len(change[2]) if change[0] == 'insert_many' else 1
+            for change in changes
+        )
+        return True
+
+    def _needs_compaction(self, table_name: str, live_rows: int) -> bool:
+        '''
+        Функция проверки порога автоматического сжатия
+
+        Переменная table_name: Название таблицы
+        Переменная live_rows: Количество живых записей
+        '''
+        records = self._records.get(table_name, 0)
+        if records < LOG_COMPACT_MIN_RECORDS:
+            return False
+        return (records - live_rows) / records >= LOG_COMPACT_RATIO
+
+    def compact(self, table_name: str, data: List[Dict[str, Any]]) -> bool:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        atomic_write(self.path(table_name), lambda f: self._write_rows(f, data))
+        self._records[table_name] = row_count(data)
+        return True
+
+    def reclaimable(
+        self, table_name: str, data: List[Dict[str, Any]]
+    ) -> Optional[Tuple[int, int]]:
+        '''
+        Функция оценки места, которое освободит сжатие: устаревшие записи
+        журнала (все операции, кроме вставок живых записей) из всех записей
+
+        Переменная table_name: Название таблицы
+        Переменная data: Все записи таблицы
+        '''
+        if table_name not in self._records:
+            self.load(table_name)
+        records = self._records[table_name]
+        return max(records - row_count(data), 0), records
+
+    def _write_rows(self, f: TextIO, data: List[Dict[str, Any]]) -> None:
+        for row in data:
+            f.write(_encode_record({'op': 'insert', 'row': row}) + '\n')
+
+    def drop(self, table_name: str) -> None:
+        super().drop(table_name)
+        self._records.pop(table_name, None)
+
+    def reset(self) -> None:
+        self._records.clear()
+
+
+class SegmentStorage(JsonStorage):
+    '''
+    Хранилище сегментами: записи лежат в файлах data/<имя_таблицы>.<n>.seg
+    по SEGMENT_ROWS записей в порядке ID (в формате json), а манифест
+    data/<имя_таблицы>.segments перечисляет сегменты с диапазоном ID
+    и числом записей. Изменение переписывает только сегменты с измененными
+    ID (вставка - последний сегмент) и манифест, а select с условием на ID
+    читает только сегменты из диапазона.
+
+    Сегмент всегда записывается в новый файл, а старый удаляется после
+    замены манифеста: манифест ссылается только на целые файлы, а после
+    сбоя могут остаться лишь ненужные сегменты (их удаляет compact).
+    '''
+    name = 'segments'
+    extension = '.segments'
+
+    def _write(self, f: TextIO, data: Iterable[Dict[str, Any]]) -> None:
+        json.dump(list(data), f, ensure_ascii=False)
+
+    def segment_path(self, table_name: str, number: int) -> str:
+        '''
+        Функция для получения пути до файла сегмента
+
+        Переменная table_name: Название таблицы
+        Переменная number: Номер файла сегмента
+        '''
+        return os.path.join(DATA_DIR, f"{table_name}.{number}.seg")
+
+    def manifest(self, table_name: str) -> Dict[str, Any]:
+        '''
+        Функция для загрузки манифеста: {'next': номер следующего файла,
+        'segments': [{'file', 'first', 'last', 'rows'}]}
+
+        Переменная table_name: Название таблицы
+        '''
+        try:
+            with open(self.path(table_name), 'r', encoding='utf-8') as f:
+                registry.add('bytes_read', file_size(f))
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'next': 1, 'segments': []}
+
+    def _read_segments(
+        self, table_name: str, segments: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        for segment in segments:
+            path = self.segment_path(table_name, segment['file'])
+            with open(path, 'r', encoding='utf-8') as f:
+                registry.add('bytes_read', file_size(f))
+                rows += json.load(f)
+        registry.add('segments_read', len(segments))
+        return rows
+
+    def load(self, table_name: str) -> List[Dict[str, Any]]:
+        return self._read_segments(
+            table_name, self.manifest(table_name)['segments']
+        )
+
+    def load_range(
+        self, table_name: str, low: Any, high: Any
+    ) -> Optional[List[Dict[str, Any]]]:
+        segments = self.manifest(table_name)['segments']
+        wanted = [
+            segment for segment in segments
+            if (low is None or segment['last'] >= low)
+            and (high is None or segment['first'] <= high)
+        ]
+        if len(wanted) == len(segments):
+            return None
+        registry.add('segments_skipped', len(segments) - len(wanted))
+        return self._read_segments(table_name, wanted)
+
+    def _touched(
+        self, segments: List[Dict[str, Any]], changes: List[Change]
+    ) -> Tuple[set, bool]:
+        '''
+        Функция поиска сегментов, которые затрагивают изменения.
+        Возвращает номера сегментов в манифесте и признак записей
+        после последнего сегмента.
+
+        Переменная segments: Сегменты из манифеста
+        Переменная changes: Изменения таблицы
+        '''
+        firsts = [segment['first'] for segment in segments]
+        last_id = segments[-1]['last'] if segments else None
+        touched = set()
+        tail = False
+        for change in changes:
+            op = change[0]
+            if op == 'insert':
+                ids = [change[1]['ID']]
+            elif op == 'insert_many':
+                id_pos = change[1].index('ID')
+                ids = [values[id_pos] for values in change[2]]
+            else:
+                ids = [change[1]]
+            for row_id in ids:
+                if last_id is None or row_id > last_id:
+                    tail = True
+                else:
+                    touched.add(max(bisect.bisect_right(firsts, row_id) - 1, 0))
+        if tail and segments and segments[-1]['rows'] < SEGMENT_ROWS:
+            touched.add(len(segments) - 1)
+        return touched, tail
+
+    def _write_segments(
+        self,
+        table_name: str,
+        data: Table,
+        changes: Optional[List[Change]]
+    ) -> Tuple[Dict[str, Any], List[str]]:
+        '''
+        Функция записи новых файлов для затронутых сегментов.
+        Записи сегментов берутся из таблицы в памяти по диапазону ID.
+        Возвращает новый манифест и файлы, которые нужно удалить
+        после его замены.
+
+        Переменная table_name: Название таблицы
+        Переменная data: Таблица
+        Переменная changes: Изменения (None - переписать все сегменты)
+        '''
+        os.makedirs(DATA_DIR, exist_ok=True)
+        manifest = self.manifest(table_name)
+        old = manifest['segments']
+        ids = data.ids
+        number = manifest['next']
+        segments = []
+        removed = []
+
+        def write(start: int, stop: int) -> None:
+            nonlocal number
+            for lo in range(start, stop, SEGMENT_ROWS):
+                hi = min(lo + SEGMENT_ROWS, stop)
+                path = self.segment_path(table_name, number)
+                write_file(path, lambda f: self._write(f, data.rows(range(lo, hi))))
+                segments.append(
+                    {'file': number, 'first': ids[lo], 'last': ids[hi - 1],
+                     'rows': data.live_count(lo, hi)}
+                )
+                number += 1
+                registry.add('segments_written')
+
+        if changes is None:
+            # Все сегменты пишутся заново подряд, поэтому неполные
+            # сегменты после удалений сливаются
+            write(0, len(ids))
+            removed = [self.segment_path(table_name, seg['file']) for seg in old]
+            return {'next': number, 'segments': segments}, removed
+
+        touched, tail = self._touched(old, changes)
+        for i, segment in enumerate(old):
+            if i not in touched:
+                segments.append(segment)
+                continue
+            removed.append(self.segment_path(table_name, segment['file']))
+            start = bisect.bisect_left(ids, segment['first'])
+            if tail and i == len(old) - 1:
+                write(start, len(ids))
+                tail = False
+            else:
+                write(start, bisect.bisect_right(ids, segment['last']))
+        if tail:
+            start = bisect.bisect_right(ids, old[-1]['last']) if old else 0
+            write(start, len(ids))
+
+        return {'next': number, 'segments': segments}, removed
+
+    def _write_manifest(self, f: TextIO, manifest: Dict[str, Any]) -> None:
+        json.dump(manifest, f, ensure_ascii=False)
+
+    def save(
+        self,
+        table_name: str,
+        data: Table,
+        changes: Optional[List[Change]] = None
+    ) -> None:
+        manifest, removed = self._write_segments(table_name, data, changes)
+        atomic_write(
+            self.path(table_name), lambda f: self._write_manifest(f, manifest)
+        )
+        for path in removed:
+            os.remove(path)
+
+    def prepare(
+        self,
+        table_name: str,
+        data: Table,
+        changes: Optional[List[Change]] = None
+    ) -> List[Step]:
+        '''
+        Функция подготовки сохранения для фиксации через журнал:
+        новые сегменты записываются сразу (на них еще не ссылается манифест),
+        а при фиксации заменяется манифест и удаляются старые сегменты
+
+        Переменная table_name: Название таблицы
+        Переменная data: Таблица
+        Переменная changes: Изменения (None - переписать все сегменты)
+        '''
+        manifest, removed = self._write_segments(table_name, data, changes)
+        step = prepare_replace(
+            self.path(table_name), lambda f: self._write_manifest(f, manifest)
+        )
+        return [step] + [{'op': 'remove', 'path': path} for path in removed]
+
+    def _segment_files(self, table_name: str) -> List[str]:
+        '''
+        Функция поиска всех файлов сегментов таблицы в каталоге данных,
+        включая оставшиеся после сбоя
+
+        Переменная table_name: Название таблицы
+        '''
+        prefix = f"{table_name}."
+        try:
+            names = os.listdir(DATA_DIR)
+        except FileNotFoundError:
+            return []
+        return [
+            os.path.join(DATA_DIR, name) for name in names
+            if name.startswith(prefix) and name.endswith('.seg')
+            and name[len(prefix):-len('.seg')].isdigit()
+        ]
+
+    def compact(self, table_name: str, data: Table) -> bool:
+        '''
+        Функция сжатия: все сегменты переписываются заново по SEGMENT_ROWS
+        записей (после удалений сегменты могут быть неполными),
+        а ненужные файлы сегментов удаляются.
+
+        Переменная table_name: Название таблицы
+        Переменная data: Таблица
+        '''
+        self.save(table_name, data)
+        live = {
+            self.segment_path(table_name, segment['file'])
+            for segment in self.manifest(table_name)['segments']
+        }
+        for path in self._segment_files(table_name):
+            if path not in live:
+                os.remove(path)
+        return True
+
+    def reclaimable(
+        self, table_name: str, data: Table
+    ) -> Optional[Tuple[int, int]]:
+        '''
+        Функция оценки места, которое освободит сжатие: незанятые места
+        в неполных сегментах (кроме последнего) из всех мест по манифесту
+
+        Переменная table_name: Название таблицы
+        Переменная data: Таблица
+        '''
+        segments = self.manifest(table_name)['segments']
+        wasted = sum(SEGMENT_ROWS - segment['rows'] for segment in segments[:-1])
+        return wasted, wasted + sum(segment['rows'] for segment in segments)
+
+    def files(self, table_name: str) -> List[str]:
+        return [self.path(table_name)] + self._segment_files(table_name)
+
+    def drop(self, table_name: str) -> None:
+        for path in self.files(table_name):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+# Начало файла двоичного формата: метка формата и длина заголовка (json)
+_BINARY_MAGIC = b'PDBBIN01'
+_BINARY_PREFIX = struct.Struct('<8sI')
+
+# Поле записи для каждого типа: int - 8 байт со знаком, bool - 1 байт,
+# str - смещение (8 байт) и длина (4 байта) строки в куче.
+# Для пропускаемых столбцов поле читается как пустые байты (x)
+_BINARY_FIELDS = {'int': 'q', 'bool': 'B', 'str': 'QI'}
+_BINARY_SKIP = {'int': '8x', 'bool': 'x', 'str': '12x'}
+
+# Пустое значение для столбца, которого нет в файле
+_BINARY_DEFAULTS = {'int': 0, 'bool': False, 'str': ''}
+
+# ID - первый столбец каждой записи
+_BINARY_ID = struct.Struct('<q')
+
+
+def _record_format(schema: List[Dict[str, str]], names: Iterable[str]) -> str:
+    '''
+    Функция для получения формата записи (struct), в котором читаются
+    только столбцы names, а остальные пропускаются
+
+    Переменная schema: Столбцы таблицы из заголовка файла
+    Переменная names: Читаемые столбцы
+    '''
+    names = set(names)
+    return '<' + ''.join(
+        _BINARY_FIELDS[col['type']] if col['name'] in names
+        else _BINARY_SKIP[col['type']]
+        for col in schema
+    )
+
+
+class BinaryFile:
+    '''
+    Файл двоичного формата, открытый через mmap: заголовок со схемой,
+    записи фиксированной длины в порядке ID и куча строк в отдельном
+    файле. Записи читаются прямо из отображения, поэтому читаются и
+    разбираются только нужные записи и столбцы.
+    '''
+
+    def __init__(self, path: str, heap_path: Callable[[int], str]):
+        '''
+        Переменная path: Путь до файла записей
+        Переменная heap_path: Путь до кучи строк по ее номеру
+        '''
+        self._files = []
+        self._maps = []
+        records = self._map(path)
+        magic, length = _BINARY_PREFIX.unpack_from(records, 0)
+        if magic != _BINARY_MAGIC:
+            self.close()
+            raise ValueError(f"Файл {path} не в двоичном формате таблицы")
+        start = _BINARY_PREFIX.size
+        self.header = json.loads(bytes(records[start:start + length]))
+        self.schema = self.header['columns']
+        self.offset = self.header['data']
+        self.record = struct.Struct(_record_format(self.schema, []))
+        self.count = (len(records) - self.offset) // self.record.size
+        self.records = records
+        try:
+            self.heap = self._map(heap_path(self.header['heap']))
+        except OSError:
+            self.close()
+            raise
+
+    def _map(self, path: str):
+        f = open(path, 'rb')
+        self._files.append(f)
+        if not file_size(f):
+            return b''
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return mapped
+
+    def close(self) -> None:
+        for mapped in self._maps:
+            mapped.close()
+        for f in self._files:
+            f.close()
+
+    def __enter__(self) -> 'BinaryFile':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, pos: int) -> int:
+        '''
+        ID записи по позиции (для двоичного поиска)
+        '''
+        return _BINARY_ID.unpack_from(
+            self.records, self.offset + pos * self.record.size
+        )[0]
+
+    def field_offsets(self) -> Dict[str, int]:
+        '''
+        Функция для получения смещения поля каждого столбца внутри записи
+        '''
+        offsets, pos = {}, 0
+        for col in self.schema:
+            offsets[col['name']] = pos
+            pos += struct.calcsize('<' + _BINARY_FIELDS[col['type']])
+        return offsets
+
+    def positions(self, low: Any, high: Any) -> Tuple[int, int]:
+        '''
+        Функция поиска позиций записей с ID от low до high
+        (None - без границы). Возвращает (начало, конец).
+
+        Переменная low: Наименьший ID
+        Переменная high: Наибольший ID
+        '''
+        start = 0 if low is None else bisect.bisect_left(self, low)
+        stop = self.count if high is None else bisect.bisect_right(self, high)
+        return start, max(start, stop)
+
+    def decode(self, names: List[str], start: int, stop: int) -> Dict[str, list]:
+        '''
+        Функция чтения значений столбцов names у записей с позициями
+        от start до stop. Поля остальных столбцов не разбираются.
+
+        Переменная names: Нужные столбцы
+        Переменная start: Позиция первой записи
+        Переменная stop: Позиция после последней записи
+        '''
+        wanted = [col for col in self.schema if col['name'] in set(names)]
+        begin = self.offset + start * self.record.size
+        end = self.offset + stop * self.record.size
+        registry.add('bytes_read', end - begin)
+        fields = list(zip(*struct.iter_unpack(
+            _record_format(self.schema, names), self.records[begin:end]
+        ))) or [()] * sum(len(_BINARY_FIELDS[col['type']]) for col in wanted)
+
+        heap = self.heap
+        columns, pos = {}, 0
+        for col in wanted:
+            if col['type'] == 'str':
+                offsets, lengths = fields[pos], fields[pos + 1]
+                columns[col['name']] = [
+                    heap[off:off + size].decode('utf-8')
+                    for off, size in zip(offsets, lengths)
+                ]
+                registry.add('bytes_read', sum(lengths))
+                pos += 2
+            else:
+                columns[col['name']] = fields[pos]
+                pos += 1
+        return columns
+
+
+class BinaryStorage(JsonStorage):
+    '''
+    Двоичное хранилище для таблиц с числами и логическими значениями:
+    data/<имя_таблицы>.bin - заголовок со схемой (json) и записи фиксированной
+    длины в порядке ID (int - 8 байт, bool - 1 байт, str - ссылка на строку),
+    data/<имя_таблицы>.<n>.heap - куча строк в UTF-8, на которую ссылаются
+    записи (номер кучи записан в заголовке).
+
+    Файл читается через mmap (BinaryFile), поэтому часть таблицы по диапазону
+    ID и нужным столбцам читается без разбора остальных записей и полей.
+    Вставка дописывает записи в конец файла, а изменение записывает новые
+    значения полей на их место (новая строка дописывается в кучу, старая
+    остается в ней до compact). Удаление переписывает файл и кучу целиком:
+    новая куча записывается в новый файл, а старая удаляется после замены
+    файла записей, поэтому файл записей всегда ссылается на целую кучу.
+    '''
+    name = 'binary'
+    extension = '.bin'
+
+    def heap_path(self, table_name: str, number: int) -> str:
+        '''
+        Функция для получения пути до кучи строк
+
+        Переменная table_name: Название таблицы
+        Переменная number: Номер файла кучи
+        '''
+        return os.path.join(DATA_DIR, f"{table_name}.{number}.heap")
+
+    def _open(self, table_name: str) -> Optional[BinaryFile]:
+        '''
+        Функция открытия файла таблицы (None - файла еще нет)
+
+        Переменная table_name: Название таблицы
+        '''
+        if not os.path.exists(self.path(table_name)):
+            return None
+        return BinaryFile(
+            self.path(table_name), lambda number: self.heap_path(table_name, number)
+        )
+
+    def _heap_number(self, table_name: str) -> int:
+        binary = self._open(table_name)
+        if binary is None:
+            return 0
+        with binary:
+            return binary.header['heap']
+
+    def load_table(self, table_name: str, schema: List[Dict[str, str]]) -> Table:
+        table = Table(schema)
+        binary = self._open(table_name)
+        if binary is None:
+            return table
+        with binary:
+            present = {col['name'] for col in binary.schema}
+            columns = binary.decode(list(table.names), 0, binary.count)
+        for name in table.names:
+            if name not in present:
+                columns[name] = [_BINARY_DEFAULTS[table.types[name]]] * len(
+                    columns['ID']
+                )
+        table.extend_columns(columns)
+        return table
+
+    def load(self, table_name: str) -> List[Dict[str, Any]]:
+        binary = self._open(table_name)
+        if binary is None:
+            return []
+        with binary:
+            schema = binary.schema
+        return list(self.load_table(table_name, schema))
+
+    def load_part(
+        self,
+        table_name: str,
+        schema: List[Dict[str, str]],
+        low: Any,
+        high: Any,
+        columns: Optional[List[str]] = None
+    ) -> Optional[Table]:
+        binary = self._open(table_name)
+        if binary is None:
+            return None
+        with binary:
+            start, stop = binary.positions(low, high)
+            present = {col['name'] for col in binary.schema}
+            names = [
+                col['name'] for col in schema
+                if col['name'] == 'ID' or columns is None or col['name'] in columns
+            ]
+            if (start, stop) == (0, binary.count) and len(names) == len(schema):
+                return None
+            if not set(names) <= present:
+                return None
+            values = binary.decode(names, start, stop)
+        part = Table([col for col in schema if col['name'] in names])
+        part.extend_columns(values)
+        return part
+
+    def _encode(
+        self, data: Table, positions: range, heap_start: int
+    ) -> Tuple[bytes, bytes]:
+        '''
+        Функция упаковки записей в двоичный вид (удаленные записи
+        пропускаются). Одинаковые строки записываются в кучу один раз.
+        Возвращает записи и добавляемую часть кучи.
+
+        Переменная data: Таблица
+        Переменная positions: Позиции упаковываемых записей
+        Переменная heap_start: Размер кучи до добавления
+        '''
+        heap = bytearray()
+        slots: Dict[str, Tuple[int, int]] = {}
+        fields = []
+        for name in data.names:
+            column = data.live_values(name, positions.start, positions.stop)
+            if data.types[name] != 'str':
+                fields.append(column)
+                continue
+            offsets, lengths = [], []
+            for value in column:
+                slot = slots.get(value)
+                if slot is None:
+                    raw = value.encode('utf-8')
+                    slot = slots[value] = (heap_start + len(heap), len(raw))
+                    heap += raw
+                offsets.append(slot[0])
+                lengths.append(slot[1])
+            fields += [offsets, lengths]
+        record = struct.Struct(_record_format(data.schema, data.names))
+        return b''.join(itertools.starmap(record.pack, zip(*fields))), bytes(heap)
+
+    def _header(self, schema: List[Dict[str, str]], heap: int) -> bytes:
+        '''
+        Функция упаковки заголовка: метка, длина и описание в json,
+        дополненные до границы 8 байт (с нее начинаются записи)
+
+        Переменная schema: Столбцы таблицы
+        Переменная heap: Номер файла кучи
+        '''
+        header = {'columns': schema, 'heap': heap, 'data': 0}
+        size = _BINARY_PREFIX.size + len(json.dumps(header)) + 16
+        header['data'] = size + (-size) % 8
+        text = json.dumps(header).encode('utf-8')
+        padding = header['data'] - _BINARY_PREFIX.size - len(text)
+        return _BINARY_PREFIX.pack(_BINARY_MAGIC, len(text)) + text + (
+            b' ' * padding
+        )
+
+    def _write_new(self, table_name: str, data: Table) -> Tuple[bytes, List[str]]:
+        '''
+        Функция записи новой кучи строк для всей таблицы.
+        Возвращает содержимое нового файла записей и файлы, которые нужно
+        удалить после его замены.
+
+        Переменная table_name: Название таблицы
+        Переменная data: Таблица
+        '''
+        os.makedirs(DATA_DIR, exist_ok=True)
+        old = self._heap_number(table_name)
+        number = old + 1
+        records, heap = self._encode(data, range(len(data)), 0)
+        write_file(
+            self.heap_path(table_name, number), lambda f: f.write(heap), True
+        )
+        removed = [self.heap_path(table_name, old)] if old else []
+        return self._header(data.schema, number) + records, removed
+
+    def _write_changes(
+        self, table_name: str, data: Table, changes: List[Change]
+    ) -> bool:
+        '''
+        Функция записи вставок и изменений без переписывания файла:
+        новые строки дописываются в кучу, новые записи - в конец файла,
+        а измененные поля записываются на свое место.
+        Возвращает False, если так записать нельзя (удаление, другая схема)
+        и файл нужно переписать.
+
+        Переменная table_name: Название таблицы
+        Переменная data: Таблица
+        Переменная changes: Изменения таблицы
+        '''
+        if any(change[0] not in ('insert', 'insert_many', 'update')
+               for change in changes):
+            return False
+        binary = self._open(table_name)
+        if binary is None:
+            return False
+        with binary:
+            if binary.schema != data.schema:
+                return False
+            last_id = binary[binary.count - 1] if binary.count else None
+            updates = []
+            for change in changes:
+                if change[0] != 'update':
+                    continue
+                row_id, values = change[1], change[2]
+                start, stop = binary.positions(row_id, row_id)
+                if start == stop:
+                    return False
+                updates.append((start, data.find(row_id), values))
+            count, offset = binary.count, binary.offset
+            record_size, fields = binary.record.size, binary.field_offsets()
+            heap_size = len(binary.heap)
+            heap_number = binary.header['heap']
+
+        # Удаленные записи уже не записаны в файл (удаление переписывает его),
+        # поэтому все они стоят раньше новых записей
+        new_start = 0 if last_id is None else bisect.bisect_right(data.ids, last_id)
+        if new_start - data.dead != count:
+            return False
+        records, heap = self._encode(data, range(new_start, len(data)), heap_size)
+        heap = bytearray(heap)
+
+        patches = []
+        for file_pos, pos, values in updates:
+            for name in values:
+                col_type = data.types[name]
+                value = data.columns[name][pos]
+                if col_type == 'str':
+                    raw = value.encode('utf-8')
+                    packed = struct.pack('<QI', heap_size + len(heap), len(raw))
+                    heap += raw
+                else:
+                    packed = struct.pack('<' + _BINARY_FIELDS[col_type], value)
+                patches.append(
+                    (offset + file_pos * record_size + fields[name], packed)
+                )
+
+        if heap:
+            with open(self.heap_path(table_name, heap_number), 'ab') as f:
+                f.write(heap)
+                f.flush()
+                os.fsync(f.fileno())
+        with open(self.path(table_name), 'r+b') as f:
+            for pos, packed in patches:
+                f.seek(pos)
+                f.write(packed)
+            f.seek(offset + count * record_size)
+            f.truncate()
+            f.write(records)
+            f.flush()
+            os.fsync(f.fileno())
+        registry.add(
+            'bytes_written',
+            len(heap) + len(records) + sum(len(packed) for _, packed in patches)
+        )
+        return True
+
+    def save(
+        self,
+        table_name: str,
+        data: Table,
+        changes: Optional[List[Change]] = None
+    ) -> None:
+        if changes is not None and self._write_changes(table_name, data, changes):
+            return
+        content, removed = self._write_new(table_name, data)
+        atomic_write(self.path(table_name), lambda f: f.write(content), True)
+        for path in removed:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def prepare(
+        self,
+        table_name: str,
+        data: Table,
+        changes: Optional[List[Change]] = None
+    ) -> List[Step]:
+        '''
+        Функция подготовки сохранения для фиксации через журнал:
+        новая куча записывается сразу (на нее еще не ссылается файл записей),
+        а при фиксации заменяется файл записей и удаляется старая куча
+
+        Переменная table_name: Название таблицы
+        Переменная data: Таблица
+        Переменная changes: Изменения (всегда переписывается весь файл)
+        '''
+        content, removed = self._write_new(table_name, data)
+        step = prepare_replace(
+            self.path(table_name), lambda f: f.write(content), True
+        )
+        return [step] + [{'op': 'remove', 'path': path} for path in removed]
+
+    def _heap_files(self, table_name: str) -> List[str]:
+        '''
+        Функция поиска всех куч строк таблицы, включая оставшиеся после сбоя
+
+        Переменная table_name: Название таблицы
+        '''
+        prefix = f"{table_name}."
+        try:
+            names = os.listdir(DATA_DIR)
+        except FileNotFoundError:
+            return []
+        return [
+            os.path.join(DATA_DIR, name) for name in names
+            if name.startswith(prefix) and name.endswith('.heap')
+            and name[len(prefix):-len('.heap')].isdigit()
+        ]
+
+    def compact(self, table_name: str, data: Table) -> bool:
+        '''
+        Функция сжатия: файл и куча переписываются заново (из кучи
+        убираются строки, замененные изменениями), ненужные кучи удаляются
+
+        Переменная table_name: Название таблицы
+        Переменная data: Таблица
+        '''
+        self.save(table_name, data)
+        live = self.heap_path(table_name, self._heap_number(table_name))
+        for path in self._heap_files(table_name):
+            if path != live:
+                os.remove(path)
+        return True
+
+    def reclaimable(
+        self, table_name: str, data: Table
+    ) -> Optional[Tuple[int, int]]:
+        '''
+        Функция оценки места, которое освободит сжатие: байты куч строк,
+        на которые не ссылаются живые записи (строки, замененные
+        изменениями, и кучи, оставшиеся после сбоя), из всех байт куч
+
+        Переменная table_name: Название таблицы
+        Переменная data: Таблица
+        '''
+        total = sum(os.path.getsize(path) for path in self._heap_files(table_name))
+        strings = set()
+        for name in data.names:
+            if data.types[name] == 'str':
+                strings.update(data.live_values(name))
+        used = sum(len(value.encode('utf-8')) for value in strings)
+        return max(total - used, 0), total
+
+    def files(self, table_name: str) -> List[str]:
+        return [self.path(table_name)] + self._heap_files(table_name)
+
+    def drop(self, table_name: str) -> None:
+        for path in self.files(table_name):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+BACKENDS = {
+    JsonStorage.name: JsonStorage(),
+    LogStorage.name: LogStorage(),
+    SegmentStorage.name: SegmentStorage(),
+    BinaryStorage.name: BinaryStorage(),
+}
+
+
+def get_backend(name: str) -> JsonStorage:
+    '''
+    Функция для получения хранилища по имени
+
+    Переменная name: Название формата хранения
+    '''
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Неизвестный формат хранения '{name}'. "
+            f"Доступны: {set(BACKENDS)}"
+        )
+    return BACKENDS[name]
@@ -0,0 +1,429 @@
+# src/primitive_db/table.py
+
+import bisect
+import functools
+import itertools
+from array import array
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Границы значений столбца int (хранится в array('q'))
+INT_MIN = -2 ** 63
+INT_MAX = 2 ** 63 - 1
+
+# Перекодировка отметок удаления в отметки живых записей (0 <-> 1)
+_FLIP = bytes([1, 0]) + bytes(254)
+
+
+def _new_column(col_type: str):
+    '''
+    Функция создания пустого столбца: int - array('q'), bool - bytearray,
+    str - список
+
+    Переменная col_type: Тип столбца
+    '''
+    if col_type == 'int':
+        return array('q')
+    if col_type == 'bool':
+        return bytearray()
+    return []
+
+
+def _compress(column, keep: bytearray):
+    '''
+    Функция для получения копии столбца без удаленных записей
+
+    Переменная column: Столбец
+    Переменная keep: Отметки оставляемых записей
+    '''
+    kept = itertools.compress(column, keep)
+    if isinstance(column, array):
+        return array(column.typecode, kept)
+    return type(column)(kept)
+
+
+class Table:
+    '''
+    Таблица в памяти, хранящаяся по столбцам. Числа лежат в array('q'),
+    логические значения - в bytearray, строки - в списке, где одинаковые
+    строки ссылаются на один объект. Вместо словаря на каждую запись таблица
+    занимает несколько байт на значение, а условие проверяется перебором
+    одного массива.
+
+    Записи упорядочены по возрастанию ID и адресуются позицией в столбцах.
+    Словарь записи создается только при выводе (row/rows).
+    Для столбцов int запоминаются минимум и максимум (column_range): вставка
+    и изменение расширяют их, а удаление граничного значения сбрасывает,
+    и они пересчитываются при следующем запросе.
+
+    Удаление только отмечает записи в массиве deleted (1 - удалена), не сдвигая
+    столбцы, поэтому занимает время по числу удаляемых записей. Удаленные
+    записи остаются на своих позициях (len считает и их, live - только живые)
+    и пропускаются при чтении, пока vacuum не уберет их из столбцов.
+    '''
+
+    def __init__(self, schema: List[Dict[str, str]]):
+        '''
+        Переменная schema: Столбцы таблицы из метаданных
+        '''
+        self.schema = schema
+        self.types = {col['name']: col['type'] for col in schema}
+        self.names = list(self.types)
+        self.columns = {
+            name: _new_column(col_type) for name, col_type in self.types.items()
+        }
+        self.ids = self.columns['ID']
+        # Общие объекты для одинаковых строк
+        self._strings: Dict[str, str] = {}
+        # Столбец int -> (минимум, максимум); нет ключа - нужно пересчитать
+        self._ranges: Dict[str, Tuple[int, int]] = {}
+        # Статистика analyze из метаданных (для планировщика запросов)
+        self.stats: Optional[Dict[str, Any]] = None
+        # Отметки удаленных записей по позициям (пусто, пока удаленных нет)
+        self.deleted = bytearray()
+        self.dead = 0
+
+    @classmethod
+    def from_rows(
+        cls, schema: List[Dict[str, str]], rows: Iterable[Dict[str, Any]]
+    ) -> 'Table':
+        '''
+        Функция построения таблицы из записей в виде словарей
+
+        Переменная schema: Столбцы таблицы
+        Переменная rows: Записи
+        '''
+        table = cls(schema)
+        table.extend(sorted(rows, key=itemgetter('ID')))
+        return table
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.rows()
+
+    @property
+    def live(self) -> int:
+        '''
+        Количество живых (не удаленных) записей
+        '''
+        return len(self.ids) - self.dead
+
+    def dead_fraction(self) -> float:
+        '''
+        Функция для получения доли удаленных записей среди всех позиций
+        '''
+        return self.dead / len(self) if len(self) else 0.0
+
+    def is_live(self, pos: int) -> bool:
+        '''
+        Функция проверки, что запись на позиции не удалена
+
+        Переменная pos: Позиция записи
+        '''
+        return not self.dead or not self.deleted[pos]
+
+    def live_mask(self) -> Optional[bytes]:
+        '''
+        Функция для получения отметок живых записей (1 - живая) по позициям.
+        Возвращает None, если удаленных записей нет.
+        '''
+        if not self.dead:
+            return None
+        return self.deleted.translate(_FLIP)
+
+    def live_positions(
+        self, positions: Optional[Iterable[int]] = None
+    ) -> Iterable[int]:
+        '''
+        Функция перебора позиций живых записей
+
+        Переменная positions: Позиции (None - все по порядку)
+        '''
+        if positions is None:
+            if not self.dead:
+                return range(len(self))
+            return itertools.compress(range(len(self)), self.live_mask())
+        if not self.dead:
+            return positions
+        return itertools.filterfalse(self.deleted.__getitem__, positions)
+
+    def live_count(self, start: int, stop: int) -> int:
+        '''
+        Функция подсчета живых записей между позициями
+
+        Переменная start: Позиция первой записи
+        Переменная stop: Позиция после последней записи
+        '''
+        if not self.dead:
+            return stop - start
+        return stop - start - self.deleted.count(1, start, stop)
+
+    def live_values(self, name: str, start: int = 0, stop: Optional[int] = None):
+        '''
+        Функция для получения значений столбца у живых записей в том виде,
+        в котором они хранятся (без удаленных записей - копия части столбца)
+
+        Переменная name: Название столбца
+        Переменная start: Позиция первой записи
+        Переменная stop: Позиция после последней записи (None - до конца)
+        '''
+        column = self.columns[name]
+        stop = len(column) if stop is None else stop
+        if not self.dead:
+            return column if (start, stop) == (0, len(column)) else column[start:stop]
+        return _compress(column[start:stop], self.live_mask()[start:stop])
+
+    def _coerce(self, name: str, value: Any) -> Any:
+        '''
+        Функция приведения значения к виду, в котором оно хранится в столбце.
+        Отсутствующее значение заменяется пустым значением типа.
+
+        Переменная name: Название столбца
+        Переменная value: Значение
+        '''
+        col_type = self.types[name]
+        if col_type == 'int':
+            value = int(value or 0)
+            if not INT_MIN <= value <= INT_MAX:
+                raise ValueError(f"Значение {value} вне диапазона int")
+            return value
+        if col_type == 'bool':
+            return 1 if value else 0
+        value = '' if value is None else str(value)
+        return self._strings.setdefault(value, value)
+
+    def _coerce_column(self, name: str, values: List[Any]):
+        '''
+        Функция приведения списка значений к виду столбца.
+        Значения нужного типа преобразуются целиком встроенными функциями,
+        а остальные - по одному через _coerce.
+
+        Переменная name: Название столбца
+        Переменная values: Значения
+        '''
+        col_type = self.types[name]
+        if col_type == 'bool':
+            return bytearray(map(bool, values))
+        try:
+            if col_type == 'int':
+                return array('q', values)
+            if set(map(type, values)) <= {str}:
+                return list(map(self._strings.setdefault, values, values))
+        except (TypeError, OverflowError):
+            pass
+        return list(map(functools.partial(self._coerce, name), values))
+
+    def slice(self, start: int, stop: int, names: List[str]) -> 'Table':
+        '''
+        Функция получения копии части записей с нужными столбцами
+        (для передачи в другой процесс)
+
+        Переменная start: Позиция первой записи
+        Переменная stop: Позиция после последней записи
+        Переменная names: Нужные столбцы (ID добавляется всегда)
+        '''
+        part = Table([
+            col for col in self.schema
+            if col['name'] == 'ID' or col['name'] in names
+        ])
+        for name in part.names:
+            part.columns[name] = self.columns[name][start:stop]
+        part.ids = part.columns['ID']
+        if self.dead:
+            part.deleted = self.deleted[start:stop]
+            part.dead = part.deleted.count(1)
+            if not part.dead:
+                part.deleted = bytearray()
+        return part
+
+    def column_range(self, name: str) -> Optional[Tuple[int, int]]:
+        '''
+        Функция для получения минимума и максимума столбца int
+        (None - таблица пуста)
+
+        Переменная name: Название столбца
+        '''
+        column = self.columns[name]
+        if not self.live:
+            return None
+        if name == 'ID':
+            mask = self.live_mask()
+            if mask is None:
+                return column[0], column[-1]
+            return column[mask.find(1)], column[mask.rfind(1)]
+        if name not in self._ranges:
+            values = self.live_values(name)
+            self._ranges[name] = (min(values), max(values))
+        return self._ranges[name]
+
+    def _widen_range(self, name: str, low: int, high: int) -> None:
+        '''
+        Функция расширения запомненного диапазона столбца новыми значениями
+
+        Переменная name: Название столбца
+        Переменная low: Наименьшее новое значение
+        Переменная high: Наибольшее новое значение
+        '''
+        if name in self._ranges:
+            old_low, old_high = self._ranges[name]
+            self._ranges[name] = (min(old_low, low), max(old_high, high))
+
+    def find(self, row_id: Any) -> Optional[int]:
+        '''
+        Функция поиска позиции записи по ID (двоичный поиск)
+
+        Переменная row_id: ID записи
+        '''
+        try:
+            row_id = int(row_id)
+        except (TypeError, ValueError):
+            return None
+        pos = bisect.bisect_left(self.ids, row_id)
+        if pos < len(self.ids) and self.ids[pos] == row_id and self.is_live(pos):
+            return pos
+        return None
+
+    def value(self, name: str, pos: int) -> Any:
+        '''
+        Функция для получения значения столбца в записи
+
+        Переменная name: Название столбца
+        Переменная pos: Позиция записи
+        '''
+        value = self.columns[name][pos]
+        return bool(value) if self.types[name] == 'bool' else value
+
+    def values(self, name: str) -> Iterable[Any]:
+        '''
+        Функция перебора значений столбца живых записей в порядке ID
+
+        Переменная name: Название столбца
+        '''
+        column = self.live_values(name)
+        return map(bool, column) if self.types[name] == 'bool' else column
+
+    def row(self, pos: int, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        '''
+        Функция получения записи в виде словаря
+
+        Переменная pos: Позиция записи
+        Переменная columns: Нужные столбцы (None - все)
+        '''
+        return {name: self.value(name, pos) for name in columns or self.names}
+
+    def rows(
+        self,
+        positions: Optional[Iterable[int]] = None,
+        columns: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        '''
+        Генератор записей в виде словарей (удаленные записи пропускаются)
+
+        Переменная positions: Позиции записей (None - все по порядку)
+        Переменная columns: Нужные столбцы (None - все)
+        '''
+        getters = [
+            (name, self.columns[name], self.types[name] == 'bool')
+            for name in columns or self.names
+        ]
+        for pos in self.live_positions(positions):
+            yield {
+                name: bool(column[pos]) if flag else column[pos]
+                for name, column, flag in getters
+            }
+
+    def append(self, row: Dict[str, Any]) -> None:
+        '''
+        Функция добавления записи. ID должен быть больше последнего.
+
+        Переменная row: Запись
+        '''
+        self.extend([row])
+
+    def extend(self, rows: List[Dict[str, Any]]) -> None:
+        '''
+        Функция добавления записей, упорядоченных по ID
+
+        Переменная rows: Записи
+        '''
+        self.extend_columns({
+            name: [row.get(name) for row in rows] for name in self.names
+        })
+
+    def extend_columns(self, values: Dict[str, List[Any]]) -> None:
+        '''
+        Функция добавления записей, переданных по столбцам.
+        Значения проверяются до записи, чтобы при ошибке таблица не изменилась.
+
+        Переменная values: Списки значений по названию столбца (одной длины)
+        '''
+        coerced = {name: self._coerce_column(name, values[name]) for name in self.names}
+        new_ids = coerced['ID']
+        if new_ids and self.ids and new_ids[0] <= self.ids[-1]:
+            raise ValueError(f"Запись с ID={new_ids[0]} уже существует")
+        for name, column in self.columns.items():
+            column.extend(coerced[name])
+            if name in self._ranges and coerced[name]:
+                self._widen_range(name, min(coerced[name]), max(coerced[name]))
+        if self.dead:
+            self.deleted.extend(bytes(len(new_ids)))
+
+    def update(self, pos: int, new_values: Dict[str, Any]) -> None:
+        '''
+        Функция изменения значений записи
+
+        Переменная pos: Позиция записи
+        Переменная new_values: Новые значения столбцов
+        '''
+        coerced = {
+            name: self._coerce(name, value) for name, value in new_values.items()
+        }
+        for name, value in coerced.items():
+            if name in self._ranges:
+                if self.columns[name][pos] in self._ranges[name]:
+                    del self._ranges[name]
+                else:
+                    self._widen_range(name, value, value)
+            self.columns[name][pos] = value
+
+    def delete(self, positions: Iterable[int]) -> None:
+        '''
+        Функция удаления записей: записи только отмечаются удаленными,
+        столбцы не изменяются (место освобождает vacuum)
+
+        Переменная positions: Позиции удаляемых записей
+        '''
+        for pos in positions:
+            if not self.dead:
+                self.deleted = bytearray(len(self))
+            if self.deleted[pos]:
+                continue
+            self.deleted[pos] = 1
+            self.dead += 1
+            for name, bounds in list(self._ranges.items()):
+                if self.columns[name][pos] in bounds:
+                    del self._ranges[name]
+
+    def vacuum(self) -> int:
+        '''
+        Функция удаления отмеченных записей из столбцов. Столбцы изменяются
+        на месте, поэтому ссылки на них остаются действительными, но позиции
+        записей сдвигаются. Возвращает количество убранных записей.
+        '''
+        removed = self.dead
+        if not removed:
+            return 0
+        keep = self.live_mask()
+        for column in self.columns.values():
+            column[:] = _compress(column, keep)
+        self.deleted = bytearray()
+        self.dead = 0
+        self._strings = {
+            value: value
+            for name, column in self.columns.items()
+            if self.types[name] == 'str'
+            for value in column
+        }
+        return removed
@@ -0,0 +1,295 @@
+# src/primitive_db/transfer.py
+
+import csv
+import itertools
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from src.primitive_db import core, index
+from src.primitive_db.catalog import Catalog
+from src.primitive_db.constants import IMPORT_BATCH_ROWS
+from src.primitive_db.decorators import handle_db_errors, log_time
+from src.primitive_db.table import INT_MAX, INT_MIN, Table
+
+# Форматы файлов по расширению
+FORMATS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+
+# Допустимые записи логических значений (как в core.cast_value)
+BOOL_WORDS = {
+    'true': True, '1': True, 'yes': True,
+    'false': False, '0': False, 'no': False,
+}
+
+
+def file_format(filepath: str) -> str:
+    '''
+    Функция для определения формата файла по расширению
+
+    Переменная filepath: Путь до файла
+    '''
+    extension = os.path.splitext(filepath)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(
+            f"Неизвестный формат файла '{extension}'. Доступны: {set(FORMATS)}"
+        )
+    return FORMATS[extension]
+
+
+def _batches(records: Iterator[Any], size: int) -> Iterator[List[Any]]:
+    '''
+    Генератор частей по size записей
+
+    Переменная records: Записи
+    Переменная size: Размер части
+    '''
+    while True:
+        batch = list(itertools.islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+def read_columns(
+    filepath: str, names: List[str], batch_size: int = IMPORT_BATCH_ROWS
+) -> Iterator[Dict[str, List[Any]]]:
+    '''
+    Генератор частей файла, разложенных по столбцам: {столбец: значения}.
+    В памяти находится только одна часть. Столбец ID из файла пропускается,
+    ID назначаются из последовательности таблицы.
+
+    Переменная filepath: Путь до файла
+    Переменная names: Ожидаемые столбцы (без ID)
+    Переменная batch_size: Размер части
+    '''
+    if file_format(filepath) == 'csv':
+        yield from _read_csv(filepath, names, batch_size)
+    else:
+        yield from _read_ndjson(filepath, names, batch_size)
+
+
+def _read_csv(
+    filepath: str, names: List[str], batch_size: int
+) -> Iterator[Dict[str, List[Any]]]:
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        unknown = [name for name in header if name not in names and name != 'ID']
+        missing = [name for name in names if name not in header]
+        if unknown or missing:
+            raise ValueError(
+                f"Заголовок CSV не совпадает со схемой: "
+                f"лишние столбцы {unknown}, недостающие {missing}"
+            )
+        positions = {name: header.index(name) for name in names}
+
+        first = 1
+        for batch in _batches(reader, batch_size):
+            for number, record in enumerate(batch, first):
+                if len(record) != len(header):
+                    raise ValueError(
+                        f"Ожидалось {len(header)} значений, "
+                        f"получено {len(record)} (запись {number})"
+                    )
+            first += len(batch)
+            yield {
+                name: [record[pos] for record in batch]
+                for name, pos in positions.items()
+            }
+
+
+def _read_ndjson(
+    filepath: str, names: List[str], batch_size: int
+) -> Iterator[Dict[str, List[Any]]]:
+    with open(filepath, 'r', encoding='utf-8') as f:
+        lines = (line for line in f if line.strip())
+        for batch in _batches(lines, batch_size):
+            try:
+                records = [json.loads(line) for line in batch]
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Некорректная строка NDJSON: {e}")
+            if not all(isinstance(record, dict) for record in records):
+                raise ValueError("Каждая строка NDJSON должна быть объектом")
+            yield {
+                name: [record.get(name) for record in records] for name in names
+            }
+
+
+def _to_int(value: Any) -> int:
+    if type(value) is int:
+        return value
+    if isinstance(value, str):
+        return int(value)
+    raise ValueError(value)
+
+
+def _to_bool(value: Any) -> bool:
+    if type(value) is bool:
+        return value
+    return BOOL_WORDS[str(value).strip().lower()]
+
+
+def _to_str(value: Any) -> str:
+    if value is None or isinstance(value, (dict, list)):
+        raise ValueError(value)
+    return value if isinstance(value, str) else str(value)
+
+
+CASTERS: Dict[str, Callable[[Any], Any]] = {
+    'int': _to_int, 'bool': _to_bool, 'str': _to_str,
+}
+
+
+def _strings_to_bools(values: List[str]) -> List[bool]:
+    return list(map(BOOL_WORDS.__getitem__, map(str.lower, map(str.strip, values))))
+
+
+# Приведение столбца, в котором все значения - строки (CSV), целиком
+STRING_CASTERS: Dict[str, Callable[[List[str]], List[Any]]] = {
+    'int': lambda values: list(map(int, values)),
+    'bool': _strings_to_bools,
+    'str': list,
+}
+
+
+def cast_column(
+    values: List[Any], col_type: str, name: str, first: int = 1
+) -> List[Any]:
+    '''
+    Функция приведения всех значений столбца части к его типу.
+    Столбец из одних строк приводится встроенными функциями без вызова
+    функции Python на каждое значение. При ошибке проход повторяется
+    по одному значению, чтобы найти номер записи с неверным значением.
+
+    Переменная values: Значения столбца
+    Переменная col_type: Тип столбца
+    Переменная name: Название столбца
+    Переменная first: Номер первой записи части в файле
+    '''
+    cast = CASTERS[col_type]
+    try:
+        if set(map(type, values)) <= {str}:
+            result = STRING_CASTERS[col_type](values)
+        else:
+            result = list(map(cast, values))
+    except (ValueError, TypeError, KeyError):
+        for number, value in enumerate(values, first):
+            try:
+                cast(value)
+            except (ValueError, TypeError, KeyError):
+                raise ValueError(
+                    f"Невозможно преобразовать '{value}' в {col_type} "
+                    f"(столбец {name}, запись {number})"
+                )
+        raise
+
+    if col_type == 'int' and result and (
+        min(result) < INT_MIN or max(result) > INT_MAX
+    ):
+        raise ValueError(f"Значение столбца {name} вне диапазона int")
+    return result
+
+
+@handle_db_errors
+@log_time
+def import_file(
+    catalog: Catalog,
+    metadata: Dict[str, Any],
+    table_name: str,
+    filepath: str
+) -> Tuple[int, float]:
+    '''
+    Функция загрузки записей из CSV или NDJSON.
+    Файл читается частями по IMPORT_BATCH_ROWS записей: часть приводится
+    к типам по столбцам, получает блок ID и сохраняется одной записью
+    на диск. Если в части есть ошибка, она не сохраняется, а сохраненные
+    ранее части остаются в таблице.
+    Возвращает количество записей и время загрузки.
+
+    Переменная catalog: Кэш сессии
+    Переменная metadata: Метаданные
+    Переменная table_name: Название таблицы
+    Переменная filepath: Путь до файла
+    '''
+    if table_name not in metadata:
+        raise KeyError(f'Таблица "{table_name}" не найдена в метаданных.')
+    if not os.path.isfile(filepath):
+        raise ValueError(f"Файл '{filepath}' не найден")
+
+    start = time.monotonic()
+    schema = metadata[table_name]['columns']
+    names = [col['name'] for col in schema if col['name'] != 'ID']
+    types = {col['name']: col['type'] for col in schema}
+    table = catalog.table(table_name)
+    indexes = catalog.indexes(table_name)
+
+    total = 0
+    try:
+        for raw in read_columns(filepath, names):
+            columns = {
+                name: cast_column(raw[name], types[name], name, total + 1)
+                for name in names
+            }
+            count = len(columns[names[0]]) if names else 0
+            if not count:
+                continue
+
+            ids = core.next_ids(metadata, table_name, count, table)
+            columns['ID'] = list(ids)
+            # Последовательность сохраняется до записи данных, как в insert
+            catalog.save_metadata(metadata)
+            table.extend_columns(columns)
+
+            names_with_id = list(columns)
+            values = list(zip(*columns.values()))
+            if indexes:
+                index.add_rows(
+                    indexes, [dict(zip(names_with_id, row)) for row in values]
+                )
+            core.select_cache.invalidate(table_name)
+            # Часть записывается в журнал одной строкой
+            catalog.save_table(
+                table_name, table, [('insert_many', names_with_id, values)],
+                with_indexes=False
+            )
+            total += count
+    except ValueError as e:
+        raise ValueError(f"{e}. Загружено записей до ошибки: {total}")
+    finally:
+        if total:
+            catalog.save_indexes(table_name)
+
+    return total, time.monotonic() - start
+
+
+@handle_db_errors
+@log_time
+def export_file(table: Table, filepath: str) -> Tuple[int, float]:
+    '''
+    Функция выгрузки всех записей таблицы в CSV или NDJSON.
+    Записи читаются из столбцов по одной, файл заменяется целиком
+    только после успешной записи.
+    Возвращает количество записей и время выгрузки.
+
+    Переменная table: Таблица
+    Переменная filepath: Путь до файла
+    '''
+    fmt = file_format(filepath)
+    start = time.monotonic()
+    names = table.names
+    records = zip(*(table.values(name) for name in names))
+
+    tmp_path = filepath + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            writer = csv.writer(f)
+            writer.writerow(names)
+            writer.writerows(records)
+        else:
+            for values in records:
+                f.write(json.dumps(dict(zip(names, values)), ensure_ascii=False))
+                f.write('\n')
+    os.replace(tmp_path, filepath)
+
+    return table.live, time.monotonic() - start
@@ -2,11 +2,20 @@
 
 import json
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+from src.primitive_db.constants import DB_HOME
+from src.primitive_db.metrics import registry
+from src.primitive_db.storage import (
+    Change,
+    Step,
+    atomic_write,
+    file_size,
+    get_backend,
+    prepare_replace,
+)
+from src.primitive_db.table import Table
 
-DATA_DIR = os.path.join(BASE_DIR, 'data')
 
 def load_metadata(filepath: str) -> Dict[str, Any]:
     '''
@@ -15,14 +24,21 @@ def load_metadata(filepath: str) -> Dict[str, Any]:
     Переменная filepath: путь до json файла
     '''
     if not os.path.isabs(filepath):
-        filepath = os.path.join(BASE_DIR, filepath)
+        filepath = os.path.join(DB_HOME, filepath)
         
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            registry.add('bytes_read', file_size(f))
+            metadata = json.load(f)
     except (FileNotFoundError, json.JSONDecodeError):
         return {}
 
+    # Старый формат: таблица описывалась только списком столбцов
+    for table_name, table_meta in metadata.items():
+        if isinstance(table_meta, list):
+            metadata[table_name] = {'columns': table_meta, 'storage': 'json'}
+    return metadata
+
 def save_metadata(filepath: str, data: Dict[str, Any]) -> None:
     '''
     Функция для сохранения полученных данных
@@ -31,36 +47,98 @@ def save_metadata(filepath: str, data: Dict[str, Any]) -> None:
     Переменная data: переданные данные
     '''
     if not os.path.isabs(filepath):
-        filepath = os.path.join(BASE_DIR, filepath)
+        filepath = os.path.join(DB_HOME, filepath)
         
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+    atomic_write(
+        filepath, lambda f: json.dump(data, f, indent=4, ensure_ascii=False)
+    )
+
+def prepare_metadata(filepath: str, data: Dict[str, Any]) -> Step:
+    '''
+    Функция подготовки сохранения метаданных для фиксации через журнал
+    
+    Переменная filepath: путь до json файла
+    Переменная data: переданные данные
+    '''
+    if not os.path.isabs(filepath):
+        filepath = os.path.join(DB_HOME, filepath)
+
+    return prepare_replace(
+        filepath, lambda f: json.dump(data, f, indent=4, ensure_ascii=False)
+    )
 
-def load_table_data(table_name: str) -> List[Dict[str, Any]]:
+def load_table_data(
+    table_name: str, storage: str = 'json'
+) -> List[Dict[str, Any]]:
     '''
     Функция для загрузки данных таблиц
     
     Перемнная table_name: Название таблицы
+    Переменная storage: Формат хранения таблицы
     '''
-    filepath = os.path.join(DATA_DIR, f"{table_name}.json")
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+    return get_backend(storage).load(table_name)
+
+def load_table(
+    table_name: str, schema: List[Dict[str, Any]], storage: str = 'json'
+) -> Table:
+    '''
+    Функция для загрузки таблицы по столбцам (table.Table)
+    
+    Перемнная table_name: Название таблицы
+    Переменная schema: Столбцы таблицы из метаданных
+    Переменная storage: Формат хранения таблицы
+    '''
+    return get_backend(storage).load_table(table_name, schema)
 
-def save_table_data(table_name: str, data: List[Dict[str, Any]]) -> None:
+def save_table_data(
+    table_name: str,
+    data: List[Dict[str, Any]],
+    storage: str = 'json',
+    changes: Optional[List[Change]] = None
+) -> None:
     '''
     Функция для сохранения записей таблиц
     
     Перемнная table_name: Название таблицы
     Переменная data: Данные 
+    Переменная storage: Формат хранения таблицы
+    Переменная changes: Изменения с прошлого сохранения (None - записать все)
     '''
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
-        
-    filepath = os.path.join(DATA_DIR, f"{table_name}.json")
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+    get_backend(storage).save(table_name, data, changes)
+
+def prepare_table_data(
+    table_name: str,
+    data: List[Dict[str, Any]],
+    storage: str = 'json',
+    changes: Optional[List[Change]] = None
+) -> List[Step]:
+    '''
+    Функция подготовки сохранения записей таблицы для фиксации через журнал
+    
+    Перемнная table_name: Название таблицы
+    Переменная data: Данные 
+    Переменная storage: Формат хранения таблицы
+    Переменная changes: Изменения с прошлого сохранения (None - записать все)
+    '''
+    return get_backend(storage).prepare(table_name, data, changes)
+
+def compact_table_data(
+    table_name: str, data: List[Dict[str, Any]], storage: str = 'json'
+) -> bool:
+    '''
+    Функция для сжатия хранилища таблицы
+    
+    Перемнная table_name: Название таблицы
+    Переменная data: Данные
+    Переменная storage: Формат хранения таблицы
+    '''
+    return get_backend(storage).compact(table_name, data)
 
-        
\ No newline at end of file
+def drop_table_data(table_name: str, storage: str = 'json') -> None:
+    '''
+    Функция для удаления файлов таблицы
+    
+    Перемнная table_name: Название таблицы
+    Переменная storage: Формат хранения таблицы
+    '''
+    get_backend(storage).drop(table_name)
@@ -0,0 +1,101 @@
+# src/primitive_db/writebehind.py
+
+import threading
+from typing import Any, Dict, Optional
+
+from src.primitive_db.catalog import Catalog
+from src.primitive_db.constants import WRITE_BEHIND_INTERVAL, WRITE_BEHIND_ROWS
+from src.primitive_db.metrics import registry
+
+
+class WriteBehind:
+    '''
+    Фоновая запись: команды изменяют таблицы только в памяти (Catalog
+    в режиме deferred), а поток раз в interval секунд записывает все
+    накопленные изменения одной фиксацией (Catalog.flush_behind).
+    Когда незаписанных изменений записей становится не меньше rows,
+    поток записывает их, не дожидаясь интервала.
+    '''
+
+    def __init__(
+        self,
+        catalog: Catalog,
+        interval: float = WRITE_BEHIND_INTERVAL,
+        rows: int = WRITE_BEHIND_ROWS
+    ):
+        self.catalog = catalog
+        self.interval = interval
+        self.rows = rows
+        self.flushes = 0
+        self.tables_written = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name='write-behind', daemon=True
+        )
+
+    def start(self) -> None:
+        '''
+        Функция запуска фонового потока
+        '''
+        registry.register('write_behind', self.stats, self.reset_counters)
+        self._thread.start()
+
+    def notify(self) -> None:
+        '''
+        Функция проверки порога после команды: при rows и более
+        незаписанных изменениях будит фоновый поток
+        '''
+        if self.catalog.pending_rows() >= self.rows:
+            self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                written = self.catalog.flush_behind()
+            except Exception as e:
+                # Изменения остались отложенными, запись повторится
+                self.failures += 1
+                self.last_error = str(e)
+                continue
+            if written:
+                self.flushes += 1
+                self.tables_written += written
+
+    def stop(self) -> int:
+        '''
+        Функция остановки фонового потока и записи оставшихся изменений
+        (выход, сигнал). Возвращает количество записанных таблиц.
+        '''
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join()
+        return self.catalog.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        '''
+        Функция для получения счетчиков фоновой записи
+        '''
+        return {
+            'pending_tables': self.catalog.pending(),
+            'pending_rows': self.catalog.pending_rows(),
+            'flushes': self.flushes,
+            'tables_written': self.tables_written,
+            'failures': self.failures,
+            'last_error': self.last_error,
+        }
+
+    def reset_counters(self) -> None:
+        '''
+        Функция сброса счетчиков фоновой записи
+        '''
+        self.flushes = 0
+        self.tables_written = 0
+        self.failures = 0
+        self.last_error = None
@@ -0,0 +1,100 @@
+# tests/conftest.py
+
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+# Корень репозитория: другие процессы запускают database отсюда
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Каталог базы задается до импорта модулей базы данных:
+# пути к файлам вычисляются в constants при импорте
+os.environ['PRIMITIVE_DB_HOME'] = tempfile.mkdtemp(prefix='primitive_db_tests_')
+
+from src.primitive_db import core, engine  # noqa: E402
+from src.primitive_db.catalog import Catalog  # noqa: E402
+from src.primitive_db.constants import DATA_DIR, DB_HOME  # noqa: E402
+from src.primitive_db.decorators import set_confirmations  # noqa: E402
+from src.primitive_db.storage import BACKENDS  # noqa: E402
+
+
+class Database:
+    '''
+    База данных для теста: сеанс, как в однократном режиме (без
+    подтверждений, записи select в формате jsonl), и перезапуск
+    '''
+
+    def __init__(self):
+        self.session = None
+        self.restart()
+
+    def restart(self, deferred: bool = False) -> None:
+        '''
+        Функция перезапуска: кэши в памяти сбрасываются, и таблицы
+        заново читаются из файлов
+
+        Переменная deferred: Отложенная запись (как при --write-behind)
+        '''
+        for backend in BACKENDS.values():
+            backend.reset()
+        core.select_cache.clear()
+        self.session = engine.Session(
+            Catalog(on_reload=core.select_cache.invalidate, deferred=deferred),
+            interactive=False
+        )
+        self.session.output_format = 'jsonl'
+
+    @property
+    def catalog(self) -> Catalog:
+        return self.session.catalog
+
+    def execute(self, *commands: str) -> None:
+        '''
+        Функция выполнения команд по одной
+
+        Переменная commands: Команды
+        '''
+        for command in commands:
+            engine.execute(self.session, command)
+
+    def run_elsewhere(self, *commands: str) -> None:
+        '''
+        Функция выполнения команд в другом процессе (database -c),
+        у которого свои кэши
+
+        Переменная commands: Команды
+        '''
+        for command in commands:
+            subprocess.run(
+                [sys.executable, '-m', 'src.primitive_db.main', '-c', command],
+                cwd=ROOT, check=True, capture_output=True
+            )
+
+    def select(self, command: str) -> list:
+        '''
+        Функция выполнения select. Возвращает записи.
+
+        Переменная command: Команда select
+        '''
+        stream = io.StringIO()
+        self.session.output_stream = stream
+        engine.execute(self.session, command)
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+@pytest.fixture
+def db():
+    '''
+    Пустая база данных в каталоге PRIMITIVE_DB_HOME
+    '''
+    shutil.rmtree(DB_HOME, ignore_errors=True)
+    os.makedirs(DATA_DIR)
+    set_confirmations(False)
+    yield Database()
+    set_confirmations(True)
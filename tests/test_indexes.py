@@ -0,0 +1,73 @@
+# tests/test_indexes.py
+
+import os
+
+import pytest
+
+from src.primitive_db import index
+
+COMMANDS = [
+    # Таблицы, столбца или индекса нет
+    'drop_index t name',
+    'drop_index missing name',
+    'create_index missing name',
+    'create_index t missing',
+    # Индекс по ID не нужен, упорядоченный - только по int и str
+    'create_index t ID',
+    'create_index t flag sorted',
+    'create_index t name unknown',
+    # Индекс уже существует
+    'create_index t n',
+    'create_index t n sorted',
+]
+
+
+@pytest.fixture
+def table(db):
+    '''
+    Таблица t с индексом по n
+    '''
+    db.execute(
+        'create_table t name:str n:int flag:bool',
+        'insert into t values ("a", 1, true)',
+        'create_index t n',
+    )
+    return db
+
+
+def read_metadata(db) -> bytes:
+    with open(db.catalog.meta_path, 'rb') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('command', COMMANDS)
+def test_failed_index_command_changes_nothing(table, monkeypatch, capsys, command):
+    content = read_metadata(table)
+    metadata = table.catalog.metadata()
+    cached = repr(metadata)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('Неудачная команда не должна ничего сохранять')
+
+    for method in ('save_metadata', 'save_index', 'drop_index'):
+        monkeypatch.setattr(table.catalog, method, fail)
+    capsys.readouterr()
+    table.execute(command)
+
+    assert 'Ошибка' in capsys.readouterr().out
+    assert read_metadata(table) == content
+    assert repr(table.catalog.metadata()) == cached
+
+
+def test_create_and_drop_index(table):
+    table.execute('create_index t name sorted')
+    assert os.path.exists(index.index_path('t', 'name', 'sorted'))
+    table.restart()
+    meta = table.catalog.metadata()['t']
+    assert (meta['indexes'], meta['sorted_indexes']) == (['n'], ['name'])
+
+    table.execute('drop_index t n')
+    assert not os.path.exists(index.index_path('t', 'n'))
+    table.restart()
+    meta = table.catalog.metadata()['t']
+    assert (meta['indexes'], meta['sorted_indexes']) == ([], ['name'])
@@ -0,0 +1,96 @@
+# tests/test_join.py
+
+import pytest
+
+from src.primitive_db import planner
+
+
+@pytest.fixture
+def shop(db):
+    '''
+    Таблицы users и cities, соединяемые по users.city = cities.code
+    (столбцы без индексов, поэтому соединение идет через хеш-таблицу)
+    '''
+    db.execute(
+        'create_table users name:str city:int',
+        'create_table cities name:str code:int',
+        'insert into users values ("Ann", 1), ("Bob", 2), ("Cid", 9)',
+        'insert into cities values ("Moscow", 1), ("Kazan", 2), ("Omsk", 3), '
+        '("Kazan-2", 2)',
+    )
+    return db
+
+
+def pairs(rows: list) -> list:
+    return sorted((row['users.name'], row['cities.name']) for row in rows)
+
+
+def test_inner_join_returns_matching_pairs(shop, monkeypatch):
+    methods = []
+    choose_join = planner.choose_join
+    monkeypatch.setattr(
+        planner, 'choose_join',
+        lambda *args: methods.append(choose_join(*args)) or methods[-1]
+    )
+    rows = shop.select('select from users join cities on users.city = cities.code')
+    # Хеш-таблица строится на меньшей стороне (users)
+    assert methods == [('hash', 0)]
+    assert pairs(rows) == [('Ann', 'Moscow'), ('Bob', 'Kazan'), ('Bob', 'Kazan-2')]
+    assert set(rows[0]) == {
+        'users.ID', 'users.name', 'users.city',
+        'cities.ID', 'cities.name', 'cities.code',
+    }
+
+
+def test_join_sides_can_be_swapped(shop):
+    rows = shop.select('select from cities join users on code = city')
+    assert pairs(rows) == [('Ann', 'Moscow'), ('Bob', 'Kazan'), ('Bob', 'Kazan-2')]
+
+
+def test_join_with_where_columns_and_order(shop):
+    rows = shop.select(
+        'select users.name, cities.name from users join cities '
+        'on city = code where cities.code = 2 order by cities.name desc'
+    )
+    assert rows == [
+        {'users.name': 'Bob', 'cities.name': 'Kazan-2'},
+        {'users.name': 'Bob', 'cities.name': 'Kazan'},
+    ]
+
+
+@pytest.mark.parametrize('command', [
+    'delete from cities where code > 0',
+    'delete from users where city > 0',
+])
+def test_join_with_empty_side(shop, command):
+    shop.execute(command)
+    assert shop.select('select from users join cities on city = code') == []
+
+
+def test_join_where_filters_out_one_side(shop):
+    rows = shop.select(
+        'select from users join cities on city = code where users.name = "Cid"'
+    )
+    assert rows == []
+
+
+@pytest.mark.parametrize('command, error', [
+    ('select from users join cities on name = code', 'есть в обеих таблицах'),
+    ('select from users join cities on city = missing', 'missing'),
+    ('select from users join cities on users.name = cities.code', 'разных типов'),
+])
+def test_join_rejects_bad_columns(shop, capsys, command, error):
+    capsys.readouterr()
+    assert shop.select(command) == []
+    assert error in capsys.readouterr().out
+
+
+@pytest.mark.parametrize('command, error', [
+    ('select from users join cities on users.city = users.city',
+     'столбцы двух таблиц'),
+    ('select from users join users on city = city', 'с самой собой'),
+    ('select from users join cities on city', 'Неверный формат join'),
+])
+def test_join_parse_errors(shop, command, error):
+    with pytest.raises(ValueError, match=error):
+        shop.execute(command)
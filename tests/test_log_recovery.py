@@ -0,0 +1,55 @@
+# tests/test_log_recovery.py
+
+import json
+
+import pytest
+
+from src.primitive_db.storage import get_backend
+
+# Начало строки журнала, запись которой прервал сбой
+TORN_LINE = '{"op": "insert", "row": {"ID": 2, "name": "lo'
+
+
+def tear_log(table_name: str, text: str = TORN_LINE) -> str:
+    '''
+    Функция имитации сбоя во время записи: к журналу таблицы
+    дописывается строка без перевода строки. Возвращает путь до журнала.
+
+    Переменная table_name: Название таблицы
+    Переменная text: Недописанная строка
+    '''
+    path = get_backend('log').path(table_name)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+
+def read_records(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize('commands', [
+    ['insert into t values ("second")'],
+    ['begin', 'insert into t values ("second")', 'commit'],
+], ids=['append', 'journal'])
+def test_insert_after_torn_line_survives_reload(db, commands):
+    db.execute('create_table t name:str storage=log', 'insert into t values ("first")')
+    path = tear_log('t')
+    db.restart()
+    assert [row['name'] for row in db.select('select * from t')] == ['first']
+
+    db.execute(*commands)
+    db.restart()
+    assert [row['name'] for row in db.select('select * from t')] == [
+        'first', 'second'
+    ]
+    # Недописанная строка обрезана, остальные строки целые
+    assert len(read_records(path)) == 2
+
+
+def test_complete_record_without_newline_is_not_replayed(db):
+    db.execute('create_table t name:str storage=log', 'insert into t values ("first")')
+    tear_log('t', '{"op": "insert", "row": {"ID": 2, "name": "lost"}}')
+    db.restart()
+    assert [row['name'] for row in db.select('select * from t')] == ['first']
@@ -0,0 +1,26 @@
+# tests/test_partial_reads.py
+
+import pytest
+
+from src.primitive_db import storage
+
+
+@pytest.mark.parametrize('storage_name', ['segments', 'binary'])
+def test_partial_read_sees_changes_from_other_process(
+    db, monkeypatch, storage_name
+):
+    # Сегменты по 2 записи, чтобы select по ID читал только один из них
+    monkeypatch.setattr(storage, 'SEGMENT_ROWS', 2)
+    db.execute(
+        f'create_table t name:str n:int storage={storage_name}',
+        'insert into t values ("a", 1), ("b", 2), ("c", 3), ("d", 4)',
+    )
+    db.restart()
+
+    query = 'select name from t where ID = 1'
+    assert db.catalog.table_part('t', (1, 1), ['ID', 'name']) is not None
+    assert db.select(query) == [{'name': 'a'}]
+
+    db.run_elsewhere('update t set name = "CHANGED" where ID = 1')
+    assert db.select(query) == [{'name': 'CHANGED'}]
+    assert db.select('select name from t where ID = 2') == [{'name': 'b'}]
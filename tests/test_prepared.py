@@ -0,0 +1,55 @@
+# tests/test_prepared.py
+
+import pytest
+
+from src.primitive_db import statements
+
+
+def parameters(db, command: str) -> list:
+    '''
+    Функция подготовки команды. Возвращает столбцы ее параметров.
+
+    Переменная db: База данных
+    Переменная command: Подготавливаемая команда
+    '''
+    db.execute(f'prepare p as {command}')
+    return [column for column, _ in db.session.prepared['p'].parameters]
+
+
+@pytest.fixture
+def users(db):
+    statements.statement_cache.clear()
+    db.execute(
+        'create_table users name:str age:int',
+        'insert into users values ("?", 1), ("Ann", 2)',
+    )
+    return db
+
+
+@pytest.mark.parametrize('command, expected', [
+    ('select from users where name = "?"', []),
+    ('select from users where name = ?', ['name']),
+    ("select from users where name in ('?', ?) and age = ?", ['name', 'age']),
+    ('insert into users values ("?", ?)', ['age']),
+    ('update users set name = "?" where age = ?', ['age']),
+    ('update users set name = ? where name = "?"', ['name']),
+])
+def test_only_bare_question_mark_is_parameter(users, command, expected):
+    assert parameters(users, command) == expected
+
+
+def test_quoted_question_mark_is_a_value(users):
+    parameters(users, 'select from users where name = "?"')
+    assert users.select('execute p') == [{'ID': 1, 'name': '?', 'age': 1}]
+
+    parameters(users, 'insert into users values ("?", ?)')
+    users.execute('execute p (3)')
+    assert users.select('select from users where age = 3') == [
+        {'ID': 3, 'name': '?', 'age': 3}
+    ]
+
+
+def test_bare_question_mark_without_prepare_is_a_value(users):
+    assert users.select('select from users where name = ?') == [
+        {'ID': 1, 'name': '?', 'age': 1}
+    ]
@@ -0,0 +1,194 @@
+# tests/test_server.py
+
+import asyncio
+import contextlib
+import os
+import re
+import sys
+import threading
+
+import pytest
+
+from src.primitive_db.constants import DB_HOME
+from src.primitive_db.locks import RWLock
+from src.primitive_db.server import Server
+
+# Сколько секунд ждать команды и остановки сервера (иначе - взаимоблокировка)
+TIMEOUT = 10
+
+SOCKET_PATH = os.path.join(DB_HOME, 'server.sock')
+
+
+@pytest.fixture
+def server(db):
+    '''
+    Сервер над базой db
+    '''
+    return Server(db.catalog, workers=4)
+
+
+@contextlib.asynccontextmanager
+async def running(server: Server):
+    '''
+    Контекст работы сервера на Unix-сокете. При выходе сервер
+    останавливается, как по Ctrl+C: задача serve отменяется,
+    а пул потоков закрывается. Вывод команд собирается по потокам,
+    как в run_server.
+    '''
+    stdout, sys.stdout = sys.stdout, server.output
+    task = asyncio.create_task(server.serve('', 0, SOCKET_PATH))
+    while not os.path.exists(SOCKET_PATH):
+        await asyncio.sleep(0.01)
+    try:
+        yield
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await asyncio.wait_for(task, TIMEOUT)
+        await asyncio.wait_for(asyncio.to_thread(server.close), TIMEOUT)
+        sys.stdout = stdout
+        os.remove(SOCKET_PATH)
+
+
+class Client:
+    '''
+    Соединение с сервером по его протоколу: команда строкой,
+    ответ - длина в байтах и вывод
+    '''
+
+    async def connect(self) -> 'Client':
+        self.reader, self.writer = await asyncio.open_unix_connection(SOCKET_PATH)
+        return self
+
+    async def request(self, command: str) -> str:
+        self.writer.write(command.encode('utf-8') + b'\n')
+        await self.writer.drain()
+        size = int(await asyncio.wait_for(self.reader.readline(), TIMEOUT))
+        return (await self.reader.readexactly(size)).decode('utf-8')
+
+    async def count(self, table_name: str) -> int:
+        text = await self.request(f'select count(*) from {table_name}')
+        return int(re.findall(r'\d+', text)[-1])
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def test_readers_see_whole_writes(server):
+    async def writer(table_name: str) -> None:
+        client = await Client().connect()
+        for batch in range(5):
+            values = ', '.join(f'({batch})' for _ in range(100))
+            text = await client.request(f'insert into {table_name} values {values}')
+            assert 'успешно' in text
+        client.close()
+
+    async def reader(table_name: str) -> list:
+        client = await Client().connect()
+        counts = [await client.count(table_name) for _ in range(20)]
+        client.close()
+        return counts
+
+    async def main():
+        async with running(server):
+            admin = await Client().connect()
+            await admin.request('create_table a n:int')
+            await admin.request('create_table b n:int')
+            results = await asyncio.gather(
+                writer('a'), writer('b'),
+                *[reader(table_name) for table_name in ('a', 'b', 'a', 'b')],
+                *[join_reader() for _ in range(2)],
+            )
+            counts = [count for result in results[2:6] for count in result]
+            # Вставка 100 записей видна целиком или не видна совсем
+            assert all(count % 100 == 0 for count in counts)
+            assert await admin.count('a') == 500
+            assert await admin.count('b') == 500
+            admin.close()
+
+    async def join_reader() -> None:
+        # select с join блокирует обе таблицы (в порядке названий)
+        client = await Client().connect()
+        for _ in range(10):
+            await client.request('select from b join a on a.ID = b.ID')
+        client.close()
+
+    asyncio.run(main())
+
+
+def test_schema_change_waits_for_commands(server):
+    async def main():
+        async with running(server):
+            clients = [await Client().connect() for _ in range(3)]
+            await clients[0].request('create_table t n:int')
+            results = await asyncio.gather(
+                clients[0].request('insert into t values (1)'),
+                clients[1].request('create_table u n:int'),
+                clients[2].request('select from t'),
+            )
+            assert 'успешно' in results[0]
+            assert 'успешно' in results[1]
+            for client in clients:
+                client.close()
+
+    asyncio.run(main())
+
+
+def test_shutdown_with_connected_clients(server):
+    async def main():
+        async with running(server):
+            idle = await Client().connect()
+            await idle.request('list_tables')
+            busy = await Client().connect()
+            await busy.request('create_table t n:int')
+        # Сервер остановлен, хотя клиенты не отключились
+        assert await idle.reader.read() == b''
+        assert server.clients == 0
+
+    asyncio.run(main())
+
+
+def test_rwlock_readers_share_and_writer_excludes():
+    lock = RWLock()
+    both_reading = threading.Barrier(2, timeout=TIMEOUT)
+    events = []
+
+    def read():
+        with lock.read():
+            # Оба читателя внутри одновременно, иначе Barrier не дождется
+            both_reading.wait()
+            events.append('read')
+
+    def write():
+        with lock.write():
+            events.append('write')
+
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    for thread in readers:
+        thread.start()
+    for thread in readers:
+        thread.join(TIMEOUT)
+    assert events == ['read', 'read']
+
+    lock.acquire_read()
+    writer = threading.Thread(target=write)
+    writer.start()
+    writer.join(0.2)
+    # Писатель ждет, пока читатель держит блокировку
+    assert writer.is_alive()
+
+    def read_late():
+        with lock.read():
+            events.append('late read')
+
+    late_reader = threading.Thread(target=read_late)
+    late_reader.start()
+    late_reader.join(0.2)
+    # Новый читатель ждет писателя, который встал в очередь раньше
+    assert late_reader.is_alive()
+
+    lock.release_read()
+    writer.join(TIMEOUT)
+    late_reader.join(TIMEOUT)
+    assert not writer.is_alive() and not late_reader.is_alive()
+    assert events == ['read', 'read', 'write', 'late read']
@@ -0,0 +1,144 @@
+# tests/test_transactions.py
+
+import os
+
+import pytest
+
+from src.primitive_db import journal
+from src.primitive_db.storage import get_backend
+
+STORAGES = ('json', 'log', 'segments', 'binary')
+
+
+class Crash(BaseException):
+    '''
+    Сбой процесса: не перехватывается обработкой ошибок команд
+    '''
+
+
+def crash_on_step(monkeypatch, number: int) -> None:
+    '''
+    Функция имитации сбоя при фиксации: журнал записан, а процесс
+    прерывается перед применением шага с номером number (с 1)
+
+    Переменная monkeypatch: Фикстура pytest
+    Переменная number: Номер шага, на котором происходит сбой
+    '''
+    apply_step = journal.apply_step
+    calls = []
+
+    def failing(step):
+        calls.append(step)
+        if len(calls) == number:
+            raise Crash()
+        apply_step(step)
+
+    monkeypatch.setattr(journal, 'apply_step', failing)
+
+
+def names(db, table_name: str) -> list:
+    return [row['name'] for row in db.select(f'select * from {table_name}')]
+
+
+def read_table_file(db, table_name: str) -> bytes:
+    path = get_backend(db.catalog.storage(table_name)).path(table_name)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture(params=STORAGES)
+def tables(db, request):
+    '''
+    Таблицы a и b с одной записью в формате хранения из параметра
+    '''
+    for table_name in ('a', 'b'):
+        db.execute(
+            f'create_table {table_name} name:str storage={request.param}',
+            f'insert into {table_name} values ("old")',
+        )
+    return db
+
+
+def test_commit_writes_all_tables_with_one_journal(tables, monkeypatch):
+    commits = []
+    commit = journal.commit
+
+    def counting(steps):
+        if steps:
+            commits.append(steps)
+        commit(steps)
+
+    monkeypatch.setattr(journal, 'commit', counting)
+    tables.execute(
+        'begin',
+        'insert into a values ("new")',
+        'update b set name = "new" where ID = 1',
+    )
+    assert commits == []
+    tables.execute('commit')
+    assert len(commits) == 1
+    assert not os.path.exists(journal.JOURNAL_PATH)
+
+    tables.restart()
+    assert names(tables, 'a') == ['old', 'new']
+    assert names(tables, 'b') == ['new']
+
+
+def test_rollback_discards_staged_writes(tables):
+    files = {
+        table_name: read_table_file(tables, table_name) for table_name in ('a', 'b')
+    }
+    tables.execute(
+        'begin',
+        'insert into a values ("new")',
+        'update b set name = "new" where ID = 1',
+        'delete from a where ID = 1',
+    )
+    assert names(tables, 'a') == ['new']
+    tables.execute('rollback')
+
+    assert names(tables, 'a') == ['old']
+    assert names(tables, 'b') == ['old']
+    for table_name, content in files.items():
+        assert read_table_file(tables, table_name) == content
+    tables.restart()
+    assert names(tables, 'a') == ['old']
+
+
+@pytest.mark.parametrize('step', [1, 2, 3])
+def test_recover_after_crash_between_journal_and_apply(tables, monkeypatch, step):
+    tables.execute(
+        'begin',
+        'insert into a values ("new")',
+        'update b set name = "new" where ID = 1',
+    )
+    crash_on_step(monkeypatch, step)
+    with pytest.raises(Crash):
+        tables.execute('commit')
+    assert os.path.exists(journal.JOURNAL_PATH)
+
+    monkeypatch.undo()
+    tables.restart()
+    assert journal.recover()
+    assert not os.path.exists(journal.JOURNAL_PATH)
+    assert names(tables, 'a') == ['old', 'new']
+    assert names(tables, 'b') == ['new']
+    # Журнал уже применен, повторный recover ничего не делает
+    assert not journal.recover()
+    assert names(tables, 'a') == ['old', 'new']
+
+
+def test_crash_before_journal_is_written_applies_nothing(tables, monkeypatch):
+    tables.execute('begin', 'insert into a values ("new")')
+
+    def crash(*args, **kwargs):
+        raise Crash()
+
+    monkeypatch.setattr(journal, 'atomic_write', crash)
+    with pytest.raises(Crash):
+        tables.execute('commit')
+
+    monkeypatch.undo()
+    tables.restart()
+    assert not journal.recover()
+    assert names(tables, 'a') == ['old']
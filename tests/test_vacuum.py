@@ -0,0 +1,137 @@
+# tests/test_vacuum.py
+
+import pytest
+
+from src.primitive_db import storage
+from src.primitive_db.storage import get_backend
+
+STORAGES = ('json', 'log', 'segments', 'binary')
+
+
+def create_table(db, storage_name: str, rows: int = 20) -> None:
+    '''
+    Функция создания таблицы t с записями name1..nameN, n = 1..N
+
+    Переменная db: База данных
+    Переменная storage_name: Формат хранения
+    Переменная rows: Количество записей
+    '''
+    values = ', '.join(f'("name{i}", {i})' for i in range(1, rows + 1))
+    db.execute(
+        f'create_table t name:str n:int storage={storage_name}',
+        f'insert into t values {values}',
+    )
+
+
+def ids(rows: list) -> list:
+    return [row['ID'] for row in rows]
+
+
+@pytest.mark.parametrize('storage_name', STORAGES)
+def test_delete_then_select_skips_dead_rows(db, storage_name):
+    create_table(db, storage_name)
+    db.execute('delete from t where n <= 2')
+
+    table = db.catalog.table('t')
+    assert (len(table), table.live, table.dead) == (20, 18, 2)
+    assert ids(db.select('select * from t')) == list(range(3, 21))
+    assert db.select('select * from t where ID = 1') == []
+    assert ids(db.select('select * from t where n < 5')) == [3, 4]
+
+    db.restart()
+    assert ids(db.select('select * from t')) == list(range(3, 21))
+
+
+@pytest.mark.parametrize('storage_name', STORAGES)
+def test_vacuum_returns_removed_count(db, storage_name):
+    create_table(db, storage_name)
+    db.execute('delete from t where n <= 2')
+
+    assert db.catalog.vacuum_table('t') == 2
+    table = db.catalog.table('t')
+    assert (len(table), table.live, table.dead) == (18, 18, 0)
+    assert db.catalog.vacuum_table('t') == 0
+    assert ids(db.select('select * from t')) == list(range(3, 21))
+
+
+def test_vacuum_compacts_log(db):
+    create_table(db, 'log')
+    db.execute('delete from t where n <= 2')
+    db.restart()
+
+    # 20 вставок и 2 удаления, живых записей 18
+    assert db.catalog.reclaimable('t') == (4, 22)
+    db.catalog.vacuum_table('t')
+    with open(get_backend('log').path('t'), encoding='utf-8') as f:
+        assert len(f.readlines()) == 18
+    assert db.catalog.reclaimable('t') == (0, 18)
+
+
+def test_vacuum_compacts_segments(db, monkeypatch):
+    monkeypatch.setattr(storage, 'SEGMENT_ROWS', 5)
+    create_table(db, 'segments')
+    db.execute('delete from t where n <= 2')
+    db.restart()
+
+    backend = get_backend('segments')
+    rows = [segment['rows'] for segment in backend.manifest('t')['segments']]
+    assert rows == [3, 5, 5, 5]
+    assert db.catalog.reclaimable('t') == (2, 20)
+
+    db.catalog.vacuum_table('t')
+    rows = [segment['rows'] for segment in backend.manifest('t')['segments']]
+    assert rows == [5, 5, 5, 3]
+    assert db.catalog.reclaimable('t') == (0, 18)
+    assert len(backend.files('t')) == 1 + 4
+
+    db.restart()
+    assert ids(db.select('select * from t')) == list(range(3, 21))
+
+
+@pytest.mark.parametrize('storage_name', STORAGES)
+def test_delete_vacuums_storage_automatically(db, storage_name):
+    create_table(db, storage_name)
+    # VACUUM_DEAD_FRACTION (25%) записей
+    db.execute('delete from t where n <= 5')
+
+    table = db.catalog.table('t')
+    assert (len(table), table.dead) == (15, 0)
+    db.restart()
+    reclaimable = db.catalog.reclaimable('t')
+    assert reclaimable is None or reclaimable[0] == 0
+    assert ids(db.select('select * from t')) == list(range(6, 21))
+
+
+def test_automatic_vacuum_in_transaction(db):
+    create_table(db, 'log')
+    db.execute('begin', 'delete from t where n <= 5', 'rollback')
+    assert db.catalog.table('t').live == 20
+
+    db.execute('begin', 'delete from t where n <= 5', 'commit')
+    db.restart()
+    assert db.catalog.reclaimable('t') == (0, 15)
+    assert ids(db.select('select * from t')) == list(range(6, 21))
+
+
+@pytest.mark.parametrize('storage_name, expected', [
+    ('json', 'нет (json переписывается целиком без удаленных записей)'),
+    ('log', '5 устаревших записей журнала из 23 (доля 21.7%)'),
+    ('segments', '2 незанятых мест в сегментах из 20 (доля 10.0%)'),
+    # name20 заменена в куче на renamed, куча name3..name20 и renamed
+    ('binary', '6 лишних байт в кучах строк из 108 (доля 5.6%)'),
+])
+def test_info_after_reload(db, capsys, monkeypatch, storage_name, expected):
+    monkeypatch.setattr(storage, 'SEGMENT_ROWS', 5)
+    create_table(db, storage_name)
+    db.execute(
+        'delete from t where n <= 2',
+        'update t set name = "renamed" where ID = 20',
+    )
+    db.restart()
+    capsys.readouterr()
+
+    db.execute('info t')
+    lines = capsys.readouterr().out.splitlines()
+    assert 'Количество записей: 18' in lines
+    assert 'Удаленных записей в памяти: 0 (доля 0.0%)' in lines
+    assert f'Место для сжатия в файлах: {expected}' in lines
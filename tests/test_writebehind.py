@@ -0,0 +1,113 @@
+# tests/test_writebehind.py
+
+import threading
+import time
+
+import pytest
+
+from src.primitive_db import journal
+from src.primitive_db.storage import get_backend
+from src.primitive_db.writebehind import WriteBehind
+
+# Сколько секунд ждать фоновую запись
+TIMEOUT = 10
+
+
+def names(db) -> list:
+    return [row['name'] for row in db.select('select * from t')]
+
+
+@pytest.fixture
+def behind(db):
+    '''
+    База с таблицей t (log) в режиме фоновой записи
+    '''
+    db.execute('create_table t name:str storage=log')
+    db.restart(deferred=True)
+    return db
+
+
+def test_repeated_saves_collapse_into_one_write(behind, monkeypatch):
+    commits = []
+    commit = journal.commit
+    monkeypatch.setattr(
+        journal, 'commit', lambda steps: commits.append(steps) or commit(steps)
+    )
+    behind.execute(*[f'insert into t values ("row{i}")' for i in range(20)])
+    behind.execute('update t set name = "first" where ID = 1')
+    assert commits == []
+    assert behind.catalog.pending_rows() == 21
+
+    assert behind.catalog.flush_behind() == 1
+    assert len(commits) == 1
+    path = get_backend('log').path('t')
+    assert [step['op'] for step in commits[0] if step.get('path') == path] == [
+        'append'
+    ]
+    assert behind.catalog.pending() == 0
+    assert behind.catalog.flush_behind() == 0
+
+    behind.restart()
+    assert names(behind) == ['first'] + [f'row{i}' for i in range(1, 20)]
+
+
+def test_stop_writes_pending_changes(behind):
+    flusher = WriteBehind(behind.catalog, interval=3600, rows=10 ** 6)
+    flusher.start()
+    behind.execute('insert into t values ("a")', 'insert into t values ("b")')
+    assert flusher.stop() == 1
+
+    behind.restart()
+    assert names(behind) == ['a', 'b']
+
+
+def test_threshold_wakes_flusher(behind):
+    flusher = WriteBehind(behind.catalog, interval=3600, rows=3)
+    flusher.start()
+    try:
+        behind.execute(*[f'insert into t values ("row{i}")' for i in range(3)])
+        flusher.notify()
+        deadline = time.monotonic() + TIMEOUT
+        while behind.catalog.pending() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert behind.catalog.pending() == 0
+        assert flusher.stats()['flushes'] == 1
+    finally:
+        flusher.stop()
+
+    behind.restart()
+    assert names(behind) == ['row0', 'row1', 'row2']
+
+
+def test_read_during_flush_sees_new_data(behind, monkeypatch):
+    catalog = behind.catalog
+    behind.execute('insert into t values ("a")')
+
+    # Фоновая запись останавливается, подготовив копию таблицы
+    # (вне блокировки catalog.lock), пока команды продолжают выполняться
+    preparing = threading.Event()
+    release = threading.Event()
+    prepare_batch = catalog._prepare_batch
+
+    def slow_prepare(batch):
+        preparing.set()
+        release.wait(TIMEOUT)
+        return prepare_batch(batch)
+
+    monkeypatch.setattr(catalog, '_prepare_batch', slow_prepare)
+    flusher = threading.Thread(target=catalog.flush_behind)
+    flusher.start()
+    assert preparing.wait(TIMEOUT)
+
+    with catalog.lock:
+        behind.execute('insert into t values ("b")')
+        assert names(behind) == ['a', 'b']
+    release.set()
+    flusher.join(TIMEOUT)
+
+    # "b" добавлена после копирования таблицы и ждет следующей записи
+    assert names(behind) == ['a', 'b']
+    assert catalog.pending() == 1
+    assert catalog.flush() == 1
+    behind.restart()
+    assert names(behind) == ['a', 'b']